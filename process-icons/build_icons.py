@@ -0,0 +1,411 @@
+"""
+Builds the icon assets for the server and the client from the raw icon sets.
+
+    python build_icons.py             # incremental build
+    python build_icons.py --force     # ignore the manifest and rebuild everything
+    python build_icons.py --prune     # also delete files the build ignores from the sources
+    python build_icons.py --jobs 8    # number of worker processes for SVG optimization
+
+For every icon set the server gets <name>.json (base64 data URLs) and the compact
+<name>.idx / <name>.blob bundle in server/app/assets, and the client gets the
+optimized SVGs under client/src/assets, mirroring the source folders.
+
+Optimized SVGs are cached by content hash in .icon-build/ together with a
+manifest of source sizes, modification times and hashes, so a run only reads and
+optimizes the icons that changed, and only rewrites outputs when something did.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPT_DIR)
+
+# The compact bundle format is defined once, next to the server's reader, which
+# only needs the standard library.
+sys.path.insert(0, os.path.join(REPO_DIR, "server"))
+from app.core.icon_catalog import (  # noqa: E402
+    BUNDLE_HEADER,
+    BUNDLE_MAGIC,
+    BUNDLE_RECORD,
+    BUNDLE_VERSION,
+)
+
+# Bumped whenever the optimizer or an output format changes, to invalidate caches.
+BUILD_VERSION = 1
+
+BUILD_DIR = os.path.join(SCRIPT_DIR, ".icon-build")
+CACHE_DIR = os.path.join(BUILD_DIR, f"svg-v{BUILD_VERSION}")
+MANIFEST_PATH = os.path.join(BUILD_DIR, "manifest.json")
+
+# Below this many icons to optimize, starting worker processes costs more than it saves.
+MIN_ICONS_FOR_PROCESS_POOL = 64
+
+SIZE_SUFFIX_PATTERN = re.compile(r"(.*)_(\d+)\.svg$", re.IGNORECASE)
+
+
+@dataclass
+class IconSet:
+    name: str
+    source_dir: str
+    server_assets_dir: str
+    client_assets_dir: str
+    # Top-level source folders, mapped to a keyword describing the kind of icon.
+    folder_keywords: dict
+
+
+ICON_SETS = [
+    IconSet(
+        name="aws_icons",
+        source_dir=os.path.join(SCRIPT_DIR, "aws_icons"),
+        server_assets_dir=os.path.join(REPO_DIR, "server", "app", "assets"),
+        client_assets_dir=os.path.join(REPO_DIR, "client", "src", "assets", "aws-icons"),
+        folder_keywords={
+            "Architecture-Group-Icons": "group",
+            "Architecture-Service-Icons": "service",
+            "Category-Icons": "category",
+            "Resource-Icons": "resource",
+        },
+    ),
+]
+
+
+def minify_svg(svg_content):
+    """Drops what a renderer ignores: prolog, comments, titles, unused ids and whitespace."""
+    svg = svg_content.decode("utf-8")
+    svg = re.sub(r"<\?xml.*?\?>", "", svg, flags=re.DOTALL)
+    svg = re.sub(r"<!--.*?-->", "", svg, flags=re.DOTALL)
+    svg = re.sub(r"<(title|desc)>.*?</\1>", "", svg, flags=re.DOTALL)
+
+    # Keep ids that something references (gradients, masks, <use>).
+    referenced = set(re.findall(r"#([^\s\"'()]+)", svg))
+    svg = re.sub(
+        r'\s+id="([^"]*)"',
+        lambda match: match.group(0) if match.group(1) in referenced else "",
+        svg,
+    )
+    if "xlink:" not in svg.replace('xmlns:xlink="http://www.w3.org/1999/xlink"', ""):
+        svg = svg.replace(' xmlns:xlink="http://www.w3.org/1999/xlink"', "")
+    svg = svg.replace(' version="1.1"', "")
+
+    svg = re.sub(r">\s+<", "><", svg)
+    svg = re.sub(r"\s+", " ", svg)
+    return svg.strip().encode("utf-8")
+
+
+def icon_keywords(icon_set, relative_dir, icon_name):
+    """Category words from the icon's folders that aren't already in its name."""
+    words = []
+    for part in relative_dir.split(os.sep):
+        folder = part.rsplit("_", 1)[0]
+        if folder in icon_set.folder_keywords:
+            words.append(icon_set.folder_keywords[folder])
+            continue
+        part = re.sub(r"^(Arch-Category|Arch|Res)_", "", part)
+        words.extend(word.lower() for word in re.split(r"[-_\s]+", part))
+
+    name_words = set(icon_name.split())
+    keywords = []
+    for word in words:
+        if word and not word.isdigit() and word not in name_words and word not in keywords:
+            keywords.append(word)
+    return " ".join(keywords)
+
+
+def scan_sources(source_dir):
+    """
+    Returns the SVGs to build (relative paths) and the files the build ignores.
+
+    When an icon comes in several sizes, only the 64px variant is built. Icons
+    without a 64px variant keep all of their sizes.
+    """
+    svg_files = []
+    ignored = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for file in sorted(files):
+            relative_path = os.path.relpath(os.path.join(root, file), source_dir)
+            if file.lower().endswith(".svg"):
+                svg_files.append(relative_path)
+            else:
+                ignored.append(relative_path)
+
+    # Map: base_name -> list of (size, relative path)
+    icon_groups = {}
+    for relative_path in svg_files:
+        match = SIZE_SUFFIX_PATTERN.search(os.path.basename(relative_path))
+        if match:
+            icon_groups.setdefault(match.group(1), []).append(
+                (int(match.group(2)), relative_path)
+            )
+
+    for variants in icon_groups.values():
+        if len(variants) > 1 and any(size == 64 for size, _ in variants):
+            ignored.extend(path for size, path in variants if size != 64)
+
+    ignored_set = set(ignored)
+    return [path for path in svg_files if path not in ignored_set], ignored
+
+
+def prune_sources(source_dir, ignored):
+    deleted = 0
+    for relative_path in ignored:
+        try:
+            os.remove(os.path.join(source_dir, relative_path))
+            deleted += 1
+        except OSError as e:
+            print(f"Error deleting {relative_path}: {e}")
+
+    for root, dirs, files in os.walk(source_dir, topdown=False):
+        for name in dirs:
+            try:
+                os.rmdir(os.path.join(root, name))  # only succeeds when empty
+            except OSError:
+                pass
+    print(f"Pruned {deleted} ignored file(s) from {source_dir}.")
+
+
+def load_manifest(force):
+    if force or not os.path.exists(MANIFEST_PATH):
+        return {"version": BUILD_VERSION, "icon_sets": {}}
+    with open(MANIFEST_PATH, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != BUILD_VERSION:
+        return {"version": BUILD_VERSION, "icon_sets": {}}
+    return manifest
+
+
+def cache_path(content_hash):
+    return os.path.join(CACHE_DIR, f"{content_hash}.svg")
+
+
+def read_cached_svg(content_hash):
+    with open(cache_path(content_hash), "rb") as f:
+        return f.read()
+
+
+def resolve_hashes(icon_set, relative_paths, previous_sources, jobs, force=False):
+    """
+    Returns {relative path: source entry} for every icon, optimizing only icons
+    whose content isn't in the cache yet. Files whose size and modification time
+    match the manifest aren't even read.
+    """
+    sources = {}
+    # Content hash and source of each icon to optimize, read once.
+    to_optimize = []
+    for relative_path in relative_paths:
+        full_path = os.path.join(icon_set.source_dir, relative_path)
+        stat = os.stat(full_path)
+        previous = previous_sources.get(relative_path)
+        if (
+            previous
+            and previous["size"] == stat.st_size
+            and previous["mtime_ns"] == stat.st_mtime_ns
+            and os.path.exists(cache_path(previous["sha256"]))
+        ):
+            sources[relative_path] = previous
+            continue
+
+        with open(full_path, "rb") as f:
+            svg_content = f.read()
+        content_hash = hashlib.sha256(svg_content).hexdigest()
+        sources[relative_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": content_hash,
+        }
+        if force or not os.path.exists(cache_path(content_hash)):
+            to_optimize.append((content_hash, svg_content))
+
+    svg_contents = [svg_content for _, svg_content in to_optimize]
+    if len(svg_contents) >= MIN_ICONS_FOR_PROCESS_POOL and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(minify_svg, svg_contents, chunksize=16))
+    else:
+        results = [minify_svg(svg_content) for svg_content in svg_contents]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for (content_hash, _), optimized_svg in zip(to_optimize, results):
+        with open(cache_path(content_hash), "wb") as f:
+            f.write(optimized_svg)
+
+    return sources, len(to_optimize)
+
+
+def build_fingerprint(sources):
+    digest = hashlib.sha256(str(BUILD_VERSION).encode())
+    for relative_path in sorted(sources):
+        digest.update(f"{relative_path}\0{sources[relative_path]['sha256']}\n".encode())
+    return digest.hexdigest()
+
+
+def write_icon_bundle(icons, index_file, blob_file):
+    records = []
+    strings = bytearray()
+    blob = bytearray()
+
+    def add_string(value):
+        encoded = value.encode("utf-8")
+        offset = len(strings)
+        strings.extend(encoded)
+        return offset, len(encoded)
+
+    for icon in icons:
+        id_offset, id_length = add_string(icon["id"])
+        name_offset, name_length = add_string(icon["name"])
+        keywords_offset, keywords_length = add_string(icon["keywords"])
+        records.append(
+            BUNDLE_RECORD.pack(
+                id_offset,
+                id_length,
+                name_offset,
+                name_length,
+                keywords_offset,
+                keywords_length,
+                len(blob),
+                len(icon["svg"]),
+            )
+        )
+        blob.extend(icon["svg"])
+
+    with open(index_file, "wb") as f:
+        f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, 0, len(records)))
+        f.write(b"".join(records))
+        f.write(strings)
+    with open(blob_file, "wb") as f:
+        f.write(blob)
+
+
+def write_server_assets(icon_set, sources):
+    icons = []
+    for relative_path, entry in sources.items():
+        file_name_no_ext = os.path.splitext(os.path.basename(relative_path))[0]
+        icon_name = file_name_no_ext.replace("-", " ").replace("_", " ").lower()
+        icons.append(
+            {
+                "id": file_name_no_ext,
+                "name": icon_name,
+                "keywords": icon_keywords(
+                    icon_set, os.path.dirname(relative_path), icon_name
+                ),
+                "svg": read_cached_svg(entry["sha256"]),
+                "path": relative_path,
+            }
+        )
+    icons.sort(key=lambda icon: (icon["id"], icon["path"]))
+
+    os.makedirs(icon_set.server_assets_dir, exist_ok=True)
+    base_path = os.path.join(icon_set.server_assets_dir, icon_set.name)
+    with open(f"{base_path}.json", "w") as f:
+        json.dump(
+            [
+                {
+                    "id": icon["id"],
+                    "name": icon["name"],
+                    "url": "data:image/svg+xml;base64,"
+                    + base64.b64encode(icon["svg"]).decode("utf-8"),
+                }
+                for icon in icons
+            ],
+            f,
+            indent=2,
+        )
+    write_icon_bundle(icons, f"{base_path}.idx", f"{base_path}.blob")
+
+
+def write_client_assets(icon_set, sources, previous_outputs):
+    """Mirrors the optimized SVGs into the client, touching only changed files."""
+    written = 0
+    for relative_path, entry in sources.items():
+        target = os.path.join(icon_set.client_assets_dir, relative_path)
+        if previous_outputs.get(relative_path) == entry["sha256"] and os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(read_cached_svg(entry["sha256"]))
+        written += 1
+
+    removed = 0
+    for root, dirs, files in os.walk(icon_set.client_assets_dir, topdown=False):
+        for file in files:
+            relative_path = os.path.relpath(
+                os.path.join(root, file), icon_set.client_assets_dir
+            )
+            if file.lower().endswith(".svg") and relative_path not in sources:
+                os.remove(os.path.join(root, file))
+                removed += 1
+        if root != icon_set.client_assets_dir and not os.listdir(root):
+            os.rmdir(root)
+    return written, removed
+
+
+def build_icon_set(icon_set, manifest, args):
+    start = time.perf_counter()
+    relative_paths, ignored = scan_sources(icon_set.source_dir)
+    if args.prune and ignored:
+        prune_sources(icon_set.source_dir, ignored)
+
+    previous = manifest["icon_sets"].get(icon_set.name, {})
+    sources, optimized = resolve_hashes(
+        icon_set, relative_paths, previous.get("sources", {}), args.jobs, args.force
+    )
+    fingerprint = build_fingerprint(sources)
+
+    base_path = os.path.join(icon_set.server_assets_dir, icon_set.name)
+    server_outputs_exist = all(
+        os.path.exists(f"{base_path}.{extension}") for extension in ("json", "idx", "blob")
+    )
+    if fingerprint != previous.get("fingerprint") or not server_outputs_exist:
+        write_server_assets(icon_set, sources)
+        server_status = "written"
+    else:
+        server_status = "up to date"
+
+    written, removed = write_client_assets(
+        icon_set, sources, previous.get("client_outputs", {})
+    )
+
+    manifest["icon_sets"][icon_set.name] = {
+        "fingerprint": fingerprint,
+        "sources": sources,
+        "client_outputs": {path: entry["sha256"] for path, entry in sources.items()},
+    }
+    print(
+        f"{icon_set.name}: {len(sources)} icons ({optimized} optimized, "
+        f"{len(sources) - optimized} cached, {len(ignored)} ignored); "
+        f"server assets {server_status}; client {written} written, {removed} removed; "
+        f"{time.perf_counter() - start:.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest")
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Delete non-SVG files and redundant sizes from the source folders",
+    )
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.force)
+    for icon_set in ICON_SETS:
+        build_icon_set(icon_set, manifest, args)
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,8 @@ import diagramRoutes from "./routes/diagramRoutes.js";
 
 const app = express();
 
-app.use(express.json());
+// Batches of laid-out graphs are well past express' 100kb default.
+app.use(express.json({ limit: process.env.JSON_BODY_LIMIT || "10mb" }));
 
 // Routes
 app.use("/diagrams", diagramRoutes);
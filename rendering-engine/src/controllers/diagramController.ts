@@ -13,9 +13,9 @@ export const renderGraph = async (
       return;
     }
 
-    const { jsonGraph } = req.body;
+    const { jsonGraph, timeoutMs } = req.body;
 
-    const renderedGraph = await renderGraphUsingELK(jsonGraph);
+    const renderedGraph = await renderGraphUsingELK(jsonGraph, timeoutMs);
 
     res.status(200).json(renderedGraph);
   } catch (error) {
@@ -23,12 +23,48 @@ export const renderGraph = async (
       res
         .status(error.statusCode)
         .json({ error: error.message, details: error.details });
+      return;
     }
     console.error("Error rendering graph from JSON:", error);
     res.status(500).json({ error: "Internal server error" });
   }
 };
 
+export const renderGraphs = async (
+  req: Request,
+  res: Response
+): Promise<void> => {
+  try {
+    if (!req.body || !Array.isArray(req.body.jsonGraphs)) {
+      res.status(400).json({ error: "jsonGraphs array is required" });
+      return;
+    }
+
+    // One failing graph must not fail the rest of the batch.
+    const settled = await Promise.allSettled(
+      req.body.jsonGraphs.map((jsonGraph: any) =>
+        renderGraphUsingELK(jsonGraph, req.body.timeoutMs)
+      )
+    );
+    const results = settled.map((outcome) =>
+      outcome.status === "fulfilled"
+        ? { graph: outcome.value }
+        : {
+            error: String(outcome.reason?.message ?? outcome.reason),
+            status:
+              outcome.reason instanceof AppError
+                ? outcome.reason.statusCode
+                : 500,
+          }
+    );
+
+    res.status(200).json({ results });
+  } catch (error) {
+    console.error("Error rendering graph batch:", error);
+    res.status(500).json({ error: "Internal server error" });
+  }
+};
+
 export const convertMermaidToJSON = (req: Request, res: Response): void => {
   try {
     const { diagram } = req.body;
@@ -2,11 +2,13 @@ import { Router } from "express";
 import {
   convertMermaidToJSON,
   renderGraph,
+  renderGraphs,
 } from "../controllers/diagramController.js";
 
 const router = Router();
 
 router.post("/convert-mermaid-to-json", convertMermaidToJSON);
 router.post("/render-graph", renderGraph);
+router.post("/render-graphs", renderGraphs);
 
 export default router;
@@ -0,0 +1,143 @@
+import { Worker } from "node:worker_threads";
+import { AppError } from "../utils/AppError.js";
+
+const WORKER_URL = new URL("../workers/elkLayoutWorker.js", import.meta.url);
+
+interface LayoutJob {
+  jsonGraph: any;
+  timeoutMs: number;
+  resolve: (graph: any) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+  worker?: Worker;
+}
+
+// Nodes, ports, labels and edges at every level of the graph.
+export const countGraphElements = (graph: any): number => {
+  let count = 0;
+  const stack = [graph];
+  while (stack.length) {
+    const node = stack.pop();
+    for (const key of ["children", "ports", "labels", "edges"]) {
+      const items = node?.[key];
+      if (Array.isArray(items)) {
+        count += items.length;
+        if (key === "children") stack.push(...items);
+      }
+    }
+  }
+  return count;
+};
+
+/**
+ * ELK instances on worker threads, each created once and reused. A layout runs
+ * on the first idle worker, so a big graph only holds up its own worker while
+ * the main thread keeps serving requests. Layouts wait in a queue when all
+ * workers are busy.
+ */
+export class ElkWorkerPool {
+  private idle: Worker[] = [];
+  private queue: LayoutJob[] = [];
+  private running = new Map<Worker, LayoutJob>();
+
+  constructor(
+    size: number,
+    private timeoutMs: number,
+    private maxGraphElements: number
+  ) {
+    for (let i = 0; i < size; i++) {
+      this.idle.push(this.spawn());
+    }
+  }
+
+  // A requested timeout can only shorten the pool's own.
+  layout(jsonGraph: any, timeoutMs?: number): Promise<any> {
+    const elements = countGraphElements(jsonGraph);
+    if (elements > this.maxGraphElements) {
+      return Promise.reject(
+        new AppError(
+          `Graph has ${elements} elements, more than the limit of ${this.maxGraphElements}`,
+          413
+        )
+      );
+    }
+
+    return new Promise((resolve, reject) => {
+      const requestedMs = Number(timeoutMs);
+      const jobTimeoutMs =
+        requestedMs > 0 ? Math.min(requestedMs, this.timeoutMs) : this.timeoutMs;
+      const job: LayoutJob = {
+        jsonGraph,
+        timeoutMs: jobTimeoutMs,
+        resolve,
+        reject,
+        timer: setTimeout(() => this.timeOut(job), jobTimeoutMs),
+      };
+      this.queue.push(job);
+      this.dispatch();
+    });
+  }
+
+  private spawn(): Worker {
+    const worker = new Worker(WORKER_URL);
+    worker.on("message", (message) => this.finish(worker, message));
+    worker.on("error", (error) => this.replace(worker, error));
+    // Idle workers must not keep the process alive on their own.
+    worker.unref();
+    return worker;
+  }
+
+  private dispatch() {
+    while (this.idle.length && this.queue.length) {
+      const worker = this.idle.pop()!;
+      const job = this.queue.shift()!;
+      job.worker = worker;
+      this.running.set(worker, job);
+      worker.postMessage({ jsonGraph: job.jsonGraph });
+    }
+  }
+
+  private finish(worker: Worker, message: { graph?: any; error?: string }) {
+    const job = this.running.get(worker);
+    this.running.delete(worker);
+    this.idle.push(worker);
+    if (job) {
+      clearTimeout(job.timer);
+      if (message.error !== undefined) {
+        job.reject(new Error(message.error));
+      } else {
+        job.resolve(message.graph);
+      }
+    }
+    this.dispatch();
+  }
+
+  private timeOut(job: LayoutJob) {
+    const error = new AppError(
+      `Layout took longer than ${job.timeoutMs}ms`,
+      504
+    );
+    if (!job.worker) {
+      this.queue.splice(this.queue.indexOf(job), 1);
+      job.reject(error);
+      return;
+    }
+    // A layout can't be interrupted, so its worker is replaced.
+    this.replace(job.worker, error);
+  }
+
+  private replace(worker: Worker, error: Error) {
+    const job = this.running.get(worker);
+    this.running.delete(worker);
+    this.idle = this.idle.filter((idleWorker) => idleWorker !== worker);
+    worker.removeAllListeners();
+    worker.on("error", () => {});
+    void worker.terminate();
+    if (job) {
+      clearTimeout(job.timer);
+      job.reject(error);
+    }
+    this.idle.push(this.spawn());
+    this.dispatch();
+  }
+}
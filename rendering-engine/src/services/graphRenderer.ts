@@ -1,7 +1,15 @@
-import ELK from "elkjs/lib/elk.bundled.js";
+import os from "node:os";
+import { ElkWorkerPool } from "./elkWorkerPool.js";
 
-export const renderGraphUsingELK = async (jsonGraph: any): Promise<any> => {
-  const elk = new (ELK as any)();
-  const renderedGraph = await elk.layout(jsonGraph);
-  return renderedGraph;
+const elkWorkerPool = new ElkWorkerPool(
+  Number(process.env.ELK_WORKERS) || os.availableParallelism(),
+  Number(process.env.ELK_LAYOUT_TIMEOUT_MS) || 30000,
+  Number(process.env.ELK_MAX_GRAPH_ELEMENTS) || 20000
+);
+
+export const renderGraphUsingELK = async (
+  jsonGraph: any,
+  timeoutMs?: number
+): Promise<any> => {
+  return elkWorkerPool.layout(jsonGraph, timeoutMs);
 };
@@ -0,0 +1,14 @@
+import { parentPort } from "node:worker_threads";
+import ELK from "elkjs/lib/elk.bundled.js";
+
+// Created once per worker and reused for every layout it runs.
+const elk = new (ELK as any)();
+
+parentPort!.on("message", async ({ jsonGraph }) => {
+  try {
+    const graph = await elk.layout(jsonGraph);
+    parentPort!.postMessage({ graph });
+  } catch (error: any) {
+    parentPort!.postMessage({ error: String(error?.message ?? error) });
+  }
+});
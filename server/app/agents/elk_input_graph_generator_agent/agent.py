@@ -1,13 +1,49 @@
+from functools import lru_cache
+
 from langchain.agents import create_agent
-from app.agents.elk_input_graph_generator_agent.tools import search_aws_icons
+from app.agents.elk_input_graph_generator_agent.tools import search_icons
 from app.agents.elk_input_graph_generator_agent.schemas import Graph
-from app.agents.elk_input_graph_generator_agent.prompts import SYSTEM_PROMPT
-from app.agents.elk_input_graph_generator_agent.chat_models import default_chat_model
+from app.agents.elk_input_graph_generator_agent.prompts import (
+    DSL_SYSTEM_PROMPT,
+    SYSTEM_PROMPT,
+)
+from app.agents.elk_input_graph_generator_agent.graph_dsl import GraphDslMiddleware
+from app.agents.elk_input_graph_generator_agent.chat_models import (
+    get_default_chat_model,
+    get_fast_chat_model,
+)
+from app.agents.elk_input_graph_generator_agent.prompt_cache import (
+    PromptCacheMiddleware,
+)
+from app.config.settings import settings
 from langchain.agents.structured_output import ToolStrategy
 
-agent = create_agent(
-    model=default_chat_model,
-    tools=[search_aws_icons],
-    response_format=ToolStrategy(Graph),
-    system_prompt=SYSTEM_PROMPT,
-)
+
+def build_agent(model):
+    middleware = [PromptCacheMiddleware()] if settings.PROMPT_CACHING_ENABLED else []
+    if settings.AGENT_RESPONSE_FORMAT == "dsl":
+        # The graph is written as plain text and parsed by the middleware.
+        return create_agent(
+            model=model,
+            tools=[search_icons],
+            system_prompt=DSL_SYSTEM_PROMPT,
+            middleware=[*middleware, GraphDslMiddleware()],
+        )
+    return create_agent(
+        model=model,
+        tools=[search_icons],
+        response_format=ToolStrategy(Graph),
+        system_prompt=SYSTEM_PROMPT,
+        middleware=middleware,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_agent():
+    return build_agent(get_default_chat_model())
+
+
+@lru_cache(maxsize=1)
+def get_fast_agent():
+    fast_chat_model = get_fast_chat_model()
+    return build_agent(fast_chat_model) if fast_chat_model is not None else None
@@ -1,18 +1,88 @@
-from langchain.chat_models import init_chat_model
+import importlib
+import logging
+from functools import lru_cache
+
 from app.config.settings import settings
-from langchain_cerebras import ChatCerebras
+from app.agents.elk_input_graph_generator_agent.provider_pool import (
+    ProviderHealth,
+    ProviderPoolChatModel,
+)
 
-chat_model_name = settings.DEFAULT_CHAT_MODEL_NAME
+logger = logging.getLogger(__name__)
 
-if chat_model_name.startswith("cerebras:"):
-    chat_model_name = chat_model_name.split("cerebras:")[1]
 
-    default_chat_model = ChatCerebras(
-        model=chat_model_name,
-    )
-else:
-    default_chat_model = init_chat_model(
+def build_chat_model(chat_model_name: str):
+    # Provider packages pull in their SDKs, so only the one in use is imported.
+    if chat_model_name.startswith("cerebras:"):
+        from langchain_cerebras import ChatCerebras
+
+        chat_model_name = chat_model_name.split("cerebras:")[1]
+
+        return ChatCerebras(
+            model=chat_model_name,
+        )
+    from langchain.chat_models import init_chat_model
+
+    return init_chat_model(
         model_name=chat_model_name,
     )
- 
 
+
+def build_pooled_chat_model(chat_model_name: str, fallback_chat_model_names: list[str]):
+    """Wraps the model in a provider pool when fallbacks are configured."""
+    if not fallback_chat_model_names:
+        return build_chat_model(chat_model_name)
+
+    chat_model_names = [chat_model_name, *fallback_chat_model_names]
+    return ProviderPoolChatModel(
+        providers=[build_chat_model(name) for name in chat_model_names],
+        health=[
+            ProviderHealth(
+                name=name,
+                failure_threshold=settings.CHAT_MODEL_CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                reset_seconds=settings.CHAT_MODEL_CIRCUIT_BREAKER_RESET_SECONDS,
+            )
+            for name in chat_model_names
+        ],
+        timeout_seconds=settings.CHAT_MODEL_PROVIDER_TIMEOUT_SECONDS,
+        hedging_enabled=settings.CHAT_MODEL_HEDGING_ENABLED,
+        hedge_initial_deadline_seconds=settings.CHAT_MODEL_HEDGE_INITIAL_DEADLINE_SECONDS,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_default_chat_model():
+    return build_pooled_chat_model(
+        settings.DEFAULT_CHAT_MODEL_NAME, settings.FALLBACK_CHAT_MODEL_NAMES
+    )
+
+
+@lru_cache(maxsize=1)
+def get_fast_chat_model():
+    """
+    Cheaper, faster model for short and edit-style prompts. Routing is disabled
+    when it isn't configured.
+    """
+    if not settings.FAST_CHAT_MODEL_NAME:
+        return None
+    return build_chat_model(settings.FAST_CHAT_MODEL_NAME)
+
+
+def import_chat_model_providers():
+    """
+    Imports the provider packages of every configured model without creating a
+    client, so a pre-forking server can load them once for all its workers.
+    """
+    chat_model_names = [
+        settings.DEFAULT_CHAT_MODEL_NAME,
+        *settings.FALLBACK_CHAT_MODEL_NAMES,
+        *([settings.FAST_CHAT_MODEL_NAME] if settings.FAST_CHAT_MODEL_NAME else []),
+    ]
+    for chat_model_name in chat_model_names:
+        provider, separator, _ = chat_model_name.partition(":")
+        if not separator:
+            continue
+        try:
+            importlib.import_module(f"langchain_{provider}")
+        except ImportError:
+            logger.warning(f"No LangChain package found for provider '{provider}'")
@@ -0,0 +1,238 @@
+"""
+A terse, line-oriented format the agent can write its graph in instead of a
+``Graph`` tool call, for a fraction of the output tokens:
+
+    # nodes: id = label @icon_id #shape (all but the id optional)
+    vpc = Production VPC @aws:Virtual-private-cloud-VPC_32
+    api = Orders API @aws:Arch_AWS-Lambda_64
+    db = Orders @aws:Arch_Amazon-DynamoDB_64
+    cache = Session cache #cylinder
+    # containment: parent { children }
+    vpc { api cache }
+    # edges, chained and fanned out with commas
+    api -> db, cache
+
+The JSON spends most of its tokens on repeated keys (``"id"``,
+``"children_ids"``, ``"sources"``/``"targets"``) and on an id per edge; here
+edges are numbered by the parser. Parsing is purely syntactic: references to
+undeclared nodes and unknown icons are left to graph validation, exactly as for
+a ``Graph`` tool call.
+"""
+
+import logging
+import re
+from uuid import uuid4
+
+from langchain.agents.middleware import AgentMiddleware, hook_config
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.agents.elk_input_graph_generator_agent.schemas import Graph
+
+logger = logging.getLogger(__name__)
+
+# How often the model is shown its parse errors before the run fails.
+MAX_PARSE_RETRIES = 2
+
+PARSE_FEEDBACK_MESSAGE_ID_PREFIX = "graph-dsl-feedback-"
+
+_ID = r"[A-Za-z0-9_.\-]+"
+_ID_PATTERN = re.compile(rf"^{_ID}$")
+_NODE_PATTERN = re.compile(rf"^(?P<id>{_ID})\s*(?:=\s*(?P<rest>.*))?$")
+_CONTAINMENT_PATTERN = re.compile(rf"^(?P<id>{_ID})\s*\{{(?P<children>[^{{}}]*)\}}$")
+_ICON_TOKEN_PATTERN = re.compile(r"^@\S+$")
+_SHAPE_TOKEN_PATTERN = re.compile(r"^#[A-Za-z_]+$")
+_LIST_SEPARATOR_PATTERN = re.compile(r"[\s,]+")
+
+
+class GraphDslParseError(ValueError):
+    """Raised for text that isn't valid graph DSL; ``errors`` has one entry per line."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def _id_list(text: str) -> list[str]:
+    return [part for part in _LIST_SEPARATOR_PATTERN.split(text.strip()) if part]
+
+
+def _parse_node(match: re.Match) -> dict:
+    tokens = (match["rest"] or "").split()
+    icon_id = shape = None
+    # Icon and shape trail the label, in either order.
+    while tokens:
+        if icon_id is None and _ICON_TOKEN_PATTERN.match(tokens[-1]):
+            icon_id = tokens.pop()[1:]
+        elif shape is None and _SHAPE_TOKEN_PATTERN.match(tokens[-1]):
+            shape = tokens.pop()[1:].lower()
+        else:
+            break
+    return {
+        "id": match["id"],
+        "text": " ".join(tokens) or None,
+        "icon_id": icon_id,
+        "shape": shape,
+    }
+
+
+class GraphDslBuilder:
+    """
+    Builds a graph from DSL fed line by line, so a graph still being streamed
+    can be read as far as it goes. Bad lines are collected in ``errors``.
+    """
+
+    def __init__(self):
+        self.nodes: dict[str, dict] = {}
+        # Children by parent id, as ordered sets.
+        self.children: dict[str, dict[str, None]] = {}
+        self.edges: list[dict] = []
+        self.errors: list[str] = []
+
+    def add_line(self, line: str, line_number: int):
+        line = line.strip()
+        # Models like to wrap their answer in a code fence.
+        if not line or line.startswith(("#", "```")):
+            return
+
+        # Checked first: labels may contain anything, "->" included.
+        match = _NODE_PATTERN.match(line)
+        if match and (match["rest"] is not None or "->" not in line):
+            self.nodes[match["id"]] = _parse_node(match)
+            return
+
+        if "->" in line:
+            groups = [_id_list(part) for part in line.split("->")]
+            if not all(groups) or not all(
+                _ID_PATTERN.match(node_id) for group in groups for node_id in group
+            ):
+                self.errors.append(
+                    f"Line {line_number}: expected `a -> b` with node ids on both "
+                    f"sides, got `{line}`"
+                )
+                return
+            for sources, targets in zip(groups, groups[1:]):
+                self.edges.append(
+                    {"id": f"e{len(self.edges) + 1}", "sources": sources, "targets": targets}
+                )
+            return
+
+        match = _CONTAINMENT_PATTERN.match(line)
+        if match:
+            parent_id = match["id"]
+            if parent_id not in self.nodes:
+                self.nodes[parent_id] = {"id": parent_id}
+            self.children.setdefault(parent_id, {}).update(
+                dict.fromkeys(_id_list(match["children"]))
+            )
+            return
+
+        self.errors.append(
+            f"Line {line_number}: expected `id = label @icon_id`, `parent {{ children }}` "
+            f"or `a -> b`, got `{line}`"
+        )
+
+    def graph_dict(self) -> dict:
+        """The graph read so far, shaped like a ``Graph`` dump."""
+        nodes = [
+            {**node, "children_ids": list(self.children.get(node_id, ()))}
+            for node_id, node in self.nodes.items()
+        ]
+        return {"nodes": nodes, "edges": list(self.edges)}
+
+
+def parse_graph_dsl(text: str) -> Graph:
+    """Parses graph DSL into a ``Graph``; raises ``GraphDslParseError`` listing every bad line."""
+    builder = GraphDslBuilder()
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        builder.add_line(line, line_number)
+    if builder.errors:
+        raise GraphDslParseError(builder.errors)
+    if not builder.nodes:
+        raise GraphDslParseError(["The graph has no nodes"])
+    return Graph.model_validate(builder.graph_dict())
+
+
+def format_graph_dsl(graph: dict) -> str:
+    """Writes a ``Graph`` dict as graph DSL; ``parse_graph_dsl`` reads it back."""
+    lines = []
+    for node in graph.get("nodes", []):
+        parts = [node["id"], "="]
+        if node.get("text"):
+            parts.append(" ".join(node["text"].split()))
+        if node.get("icon_id"):
+            parts.append(f"@{node['icon_id']}")
+        if node.get("shape"):
+            parts.append(f"#{node['shape']}")
+        lines.append(" ".join(parts) if len(parts) > 2 else node["id"])
+    for node in graph.get("nodes", []):
+        if node.get("children_ids"):
+            lines.append(f"{node['id']} {{ {' '.join(node['children_ids'])} }}")
+    for edge in graph.get("edges", []):
+        lines.append(f"{', '.join(edge['sources'])} -> {', '.join(edge['targets'])}")
+    return "\n".join(lines)
+
+
+def _is_parse_feedback(message) -> bool:
+    return (getattr(message, "id", None) or "").startswith(PARSE_FEEDBACK_MESSAGE_ID_PREFIX)
+
+
+def _parse_retries(messages: list) -> int:
+    """Parse feedback messages sent since the latest user message."""
+    retries = 0
+    for message in reversed(messages):
+        if _is_parse_feedback(message):
+            retries += 1
+        elif isinstance(message, HumanMessage):
+            break
+    return retries
+
+
+def without_parse_feedback(messages: list) -> list:
+    """
+    ``messages`` without the parse feedback and the rejected answers it
+    replied to, so only the graph that parsed is kept with the thread.
+    """
+    kept = []
+    for message in messages:
+        if _is_parse_feedback(message):
+            if kept and isinstance(kept[-1], AIMessage):
+                kept.pop()
+            continue
+        kept.append(message)
+    return kept
+
+
+class GraphDslMiddleware(AgentMiddleware):
+    """
+    Reads the graph from the model's final answer, written in graph DSL, into
+    the ``structured_response``. On a parse error the model is shown the bad
+    lines and asked again, up to ``MAX_PARSE_RETRIES`` times.
+    """
+
+    @hook_config(can_jump_to=["model"])
+    def after_model(self, state, runtime) -> dict | None:
+        message = state["messages"][-1]
+        if not isinstance(message, AIMessage) or message.tool_calls:
+            return None
+
+        try:
+            graph = parse_graph_dsl(message.text)
+        except GraphDslParseError as e:
+            retries = _parse_retries(state["messages"])
+            if retries >= MAX_PARSE_RETRIES:
+                raise
+            logger.info("Graph DSL didn't parse, asking the model again: %s", e)
+            return {
+                "messages": [
+                    HumanMessage(
+                        id=f"{PARSE_FEEDBACK_MESSAGE_ID_PREFIX}{uuid4().hex}",
+                        content=(
+                            "Your graph could not be parsed:\n"
+                            + "\n".join(f"- {error}" for error in e.errors)
+                            + "\nPlease write the whole graph again in the graph format."
+                        ),
+                    )
+                ],
+                "jump_to": "model",
+            }
+        return {"structured_response": graph}
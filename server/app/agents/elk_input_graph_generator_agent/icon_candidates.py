@@ -0,0 +1,168 @@
+"""
+Icon candidates retrieved before the agent runs.
+
+Services named in the user's messages ("API Gateway", "Lambda", "S3") are looked
+up in the icon catalog and listed in an extra message, so the model can use
+their ids straight away instead of spending a round trip per ``search_icons``
+call. The list is only a suggestion: a plain word can name an icon the user
+didn't mean, so the model decides what fits, and the tool stays available for
+anything the list doesn't cover.
+
+The message is inserted just before the latest user message and removed from
+the agent's output, so it is never stored with the thread.
+"""
+
+import re
+from typing import Any
+
+from app.agents.elk_input_graph_generator_agent.router import message_role_and_content
+from app.services.icon_registry import IconRegistry
+
+ICON_CANDIDATES_MESSAGE_ID = "icon-candidates"
+
+# Longest service names worth trying, in words ("AWS Elastic Beanstalk", ...).
+MAX_PHRASE_WORDS = 4
+
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+# Everyday words that are also icon names ("Shield", "Config", "Users", "Cloud").
+# On their own they are far more often plain English than the service, so they
+# only count as part of a longer name ("AWS Shield", "AWS Config").
+GENERIC_WORDS = frozenset(
+    {
+        "account",
+        "activate",
+        "alert",
+        "artifact",
+        "backup",
+        "batch",
+        "budget",
+        "camera",
+        "chat",
+        "client",
+        "cloud",
+        "config",
+        "connect",
+        "credential",
+        "database",
+        "detective",
+        "disk",
+        "document",
+        "email",
+        "firewall",
+        "folder",
+        "forecast",
+        "forum",
+        "gear",
+        "globe",
+        "glue",
+        "inspector",
+        "internet",
+        "log",
+        "metric",
+        "multimedia",
+        "question",
+        "recover",
+        "region",
+        "server",
+        "shield",
+        "signer",
+        "support",
+        "toolkit",
+        "transform",
+        "translate",
+        "user",
+        "wavelength",
+    }
+)
+
+
+def _is_generic(word: str) -> bool:
+    word = word.lower()
+    return word in GENERIC_WORDS or (word.endswith("s") and word[:-1] in GENERIC_WORDS)
+
+
+def _user_texts(messages: list[Any]) -> list[str]:
+    texts = []
+    for message in messages:
+        role, content = message_role_and_content(message)
+        if role in ("user", "human") and isinstance(content, str):
+            texts.append(content)
+    return texts
+
+
+def find_icon_candidates(
+    texts: list[str], icon_registry: IconRegistry, limit: int
+) -> dict[str, str]:
+    """
+    Maps service names found in ``texts`` to icon ids, most recent text first.
+    Longer names win over the words they contain ("API Gateway" over "API"),
+    and generic words only match as part of a longer name.
+    """
+    candidates: dict[str, str] = {}
+    seen_icons = set()
+    for text in reversed(texts):
+        words = _WORD_PATTERN.findall(text)
+        position = 0
+        while position < len(words):
+            for length in range(min(MAX_PHRASE_WORDS, len(words) - position), 0, -1):
+                if length == 1 and _is_generic(words[position]):
+                    continue
+                phrase = " ".join(words[position : position + length])
+                icon_id = icon_registry.match_name(phrase)
+                if icon_id is None and phrase.endswith("s") and len(phrase) > 3:
+                    icon_id = icon_registry.match_name(phrase[:-1])
+                if icon_id is not None:
+                    if icon_id not in seen_icons:
+                        seen_icons.add(icon_id)
+                        candidates[phrase] = icon_id
+                        if len(candidates) == limit:
+                            return candidates
+                    position += length
+                    break
+            else:
+                position += 1
+    return candidates
+
+
+def icon_candidates_message(candidates: dict[str, str]):
+    # Imported here to keep LangChain out of the cold start.
+    from langchain_core.messages import HumanMessage
+
+    rows = "\n".join(f"- {name}: {icon_id}" for name, icon_id in candidates.items())
+    return HumanMessage(
+        id=ICON_CANDIDATES_MESSAGE_ID,
+        content=(
+            "Suggested icon ids from the catalog, matched by name to services "
+            "mentioned in this conversation. Use one where it is the service meant; "
+            "call `search_icons` for anything else.\n"
+            f"{rows}"
+        ),
+    )
+
+
+def with_icon_candidates(
+    graph_state: dict, icon_registry: IconRegistry, limit: int
+) -> dict:
+    """``graph_state`` with the candidates message added, if anything was found."""
+    messages = list(graph_state.get("messages") or [])
+    candidates = find_icon_candidates(_user_texts(messages), icon_registry, limit)
+    if not candidates:
+        return graph_state
+    # Before the latest user message, which stays the last thing the model reads
+    # (and the one routing looks at).
+    latest_user_index = max(
+        index
+        for index, message in enumerate(messages)
+        if message_role_and_content(message)[0] in ("user", "human")
+    )
+    messages.insert(latest_user_index, icon_candidates_message(candidates))
+    return {**graph_state, "messages": messages}
+
+
+def without_icon_candidates(messages: list[Any]) -> list[Any]:
+    return [
+        message
+        for message in messages
+        if getattr(message, "id", None) != ICON_CANDIDATES_MESSAGE_ID
+    ]
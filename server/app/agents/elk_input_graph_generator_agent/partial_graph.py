@@ -0,0 +1,170 @@
+"""
+Reads the graph out of the model's token stream while it is being written, so
+a provisional diagram can be drawn before the answer is complete.
+
+With ``ToolStrategy(Graph)`` the graph arrives as the JSON arguments of the
+``Graph`` tool call; every node and edge object is taken as soon as its closing
+brace is streamed. With the graph DSL it arrives as text, read line by line.
+Anything unfinished or malformed is simply not read yet: the final answer is
+still parsed and validated as usual.
+"""
+
+import json
+import re
+from typing import Any
+
+from app.agents.elk_input_graph_generator_agent.graph_dsl import GraphDslBuilder
+
+GRAPH_TOOL_NAME = "Graph"
+
+# The top-level arrays of the ``Graph`` arguments whose objects are read.
+_GRAPH_ARRAYS = ("nodes", "edges")
+
+_STRUCTURAL_CHARACTER_PATTERN = re.compile(r'["\\{}\[\]]')
+
+
+class _GraphArgumentsScanner:
+    """
+    Scans partial ``Graph`` JSON arguments incrementally. Each call only looks
+    at the newly streamed text, jumping between the characters that matter, and
+    only the object being streamed is kept.
+    """
+
+    def __init__(self):
+        self.stack: list[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.last_root_string = None
+        self.array_name = None
+        self.root_string_parts: list[str] | None = None
+        self.object_parts: list[str] | None = None
+        self.items: dict[str, list[dict]] = {name: [] for name in _GRAPH_ARRAYS}
+
+    def feed(self, text: str) -> bool:
+        """Adds streamed text; True if it completed a node or an edge."""
+        completed = False
+        object_from = 0
+        root_string_from = 0
+        escaped_index = 0 if self.escaped else -1
+        for match in _STRUCTURAL_CHARACTER_PATTERN.finditer(text):
+            position = match.start()
+            char = match.group()
+            if self.in_string:
+                if position == escaped_index:
+                    continue
+                if char == "\\":
+                    escaped_index = position + 1
+                elif char == '"':
+                    self.in_string = False
+                    if self.root_string_parts is not None:
+                        # A key of the root object (or a string value, which is
+                        # never followed by an array).
+                        self.root_string_parts.append(text[root_string_from:position])
+                        self.last_root_string = "".join(self.root_string_parts)
+                        self.root_string_parts = None
+                continue
+
+            if char == '"':
+                self.in_string = True
+                if len(self.stack) == 1:
+                    self.root_string_parts = []
+                    root_string_from = position + 1
+            elif char in "{[":
+                if len(self.stack) == 1 and char == "[":
+                    self.array_name = self.last_root_string
+                elif len(self.stack) == 2 and char == "{":
+                    self.object_parts = []
+                    object_from = position
+                self.stack.append(char)
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if len(self.stack) == 2 and char == "}" and self.object_parts is not None:
+                    self.object_parts.append(text[object_from : position + 1])
+                    completed |= self._take("".join(self.object_parts))
+                    self.object_parts = None
+                elif len(self.stack) == 1 and char == "]":
+                    self.array_name = None
+
+        self.escaped = escaped_index == len(text)
+        if self.object_parts is not None:
+            self.object_parts.append(text[object_from:])
+        if self.root_string_parts is not None:
+            self.root_string_parts.append(text[root_string_from:])
+        return completed
+
+    def _take(self, text: str) -> bool:
+        if self.array_name not in self.items:
+            return False
+        try:
+            item = json.loads(text)
+        except ValueError:
+            return False
+        if not isinstance(item, dict):
+            return False
+        self.items[self.array_name].append(item)
+        return True
+
+
+class PartialGraphParser:
+    """
+    Collects the graph from streamed ``AIMessageChunk``s. A chunk of a new
+    message (another model call, e.g. after an icon search or an escalation)
+    starts over, since that message answers with a whole new graph.
+
+    Message text is only read as graph DSL with ``dsl=True``; otherwise it's
+    whatever the model says besides its tool calls.
+    """
+
+    def __init__(self, dsl: bool = False):
+        self.dsl = dsl
+        self._reset(None)
+
+    def _reset(self, message_id: str | None):
+        self.message_id = message_id
+        self._scanner = _GraphArgumentsScanner()
+        self._graph_tool_index = None
+        self._dsl = GraphDslBuilder()
+        self._dsl_pending = ""
+        self._dsl_lines = 0
+
+    def feed(self, chunk: Any) -> bool:
+        """Reads a message chunk; True if the graph read so far grew."""
+        message_id = getattr(chunk, "id", None)
+        if message_id != self.message_id:
+            self._reset(message_id)
+
+        grew = False
+        for tool_call_chunk in getattr(chunk, "tool_call_chunks", None) or []:
+            if tool_call_chunk.get("name") == GRAPH_TOOL_NAME:
+                self._graph_tool_index = tool_call_chunk.get("index")
+            if (
+                self._graph_tool_index is not None
+                and tool_call_chunk.get("index") == self._graph_tool_index
+                and tool_call_chunk.get("args")
+            ):
+                grew |= self._scanner.feed(tool_call_chunk["args"])
+
+        if self.dsl:
+            text = chunk.text if isinstance(chunk.text, str) else chunk.text()
+            if text:
+                grew |= self._feed_dsl(text)
+        return grew
+
+    def _feed_dsl(self, text: str) -> bool:
+        # Only complete lines are read; the last one may still be growing.
+        *lines, self._dsl_pending = (self._dsl_pending + text).split("\n")
+        node_count, edge_count = len(self._dsl.nodes), len(self._dsl.edges)
+        for line in lines:
+            self._dsl_lines += 1
+            self._dsl.add_line(line, self._dsl_lines)
+        return len(self._dsl.nodes) != node_count or len(self._dsl.edges) != edge_count
+
+    def graph(self) -> dict:
+        """The graph read so far, shaped like a ``Graph`` dump."""
+        if not self.dsl:
+            return {
+                "nodes": list(self._scanner.items["nodes"]),
+                "edges": list(self._scanner.items["edges"]),
+            }
+        return self._dsl.graph_dict()
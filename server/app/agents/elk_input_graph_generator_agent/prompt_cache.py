@@ -0,0 +1,159 @@
+"""
+Prompt-prefix caching for agent model calls.
+
+Every call sends the tool definitions (``search_icons`` and the ``Graph``
+structured-output tool), the system prompt and the thread so far. Providers
+cache the longest prefix they have seen recently, so the request is assembled to
+keep that prefix byte-for-byte stable: tools in a fixed order, the system prompt
+first and unchanged, and per-turn additions such as the icon candidates placed
+after the history rather than in front of it.
+
+Anthropic only caches up to explicit ``cache_control`` breakpoints. One goes on
+the system prompt, which covers the tools before it, and one on the newest
+message, so the next call of the same run (after a tool call) reads the whole
+thread from the cache. OpenAI and Gemini cache prefixes implicitly; OpenAI is
+additionally given a ``prompt_cache_key`` so calls sharing the prefix are routed
+to the same cache.
+
+Cached-token counts reported in the responses' usage metadata are recorded per
+provider, giving the hit rate actually achieved.
+"""
+
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import SystemMessage
+
+logger = logging.getLogger(__name__)
+
+ANTHROPIC_CACHE_CONTROL = {"type": "ephemeral"}
+
+# Shared by every call of the agent: all of them start with the same prefix.
+OPENAI_PROMPT_CACHE_KEY = "elk-input-graph-generator"
+
+
+@dataclass
+class PromptCacheMetrics:
+    """In-process token counters for one provider."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+
+    def record(self, usage_metadata: dict):
+        details = usage_metadata.get("input_token_details") or {}
+        self.calls += 1
+        self.input_tokens += usage_metadata.get("input_tokens") or 0
+        self.cache_read_tokens += details.get("cache_read") or 0
+        self.cache_creation_tokens += details.get("cache_creation") or 0
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_creation_tokens": self.cache_creation_tokens,
+            "cache_hit_rate": self.cache_read_tokens / self.input_tokens
+            if self.input_tokens
+            else None,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_prompt_cache_metrics() -> dict[str, PromptCacheMetrics]:
+    """Metrics by provider (``anthropic-chat``, ``openai-chat``, ...)."""
+    return {}
+
+
+def prompt_cache_metrics_snapshot() -> dict:
+    return {
+        provider: metrics.snapshot()
+        for provider, metrics in get_prompt_cache_metrics().items()
+    }
+
+
+def provider_type(model: Any) -> str | None:
+    """
+    The provider behind ``model``, looking through a provider pool; None when a
+    pool mixes providers, since one request then goes to either of them.
+    """
+    providers = getattr(model, "providers", None)
+    if providers is not None:
+        provider_types = {provider_type(provider) for provider in providers}
+        return provider_types.pop() if len(provider_types) == 1 else None
+    return getattr(model, "_llm_type", None)
+
+
+def _with_cache_control(system_message: SystemMessage) -> SystemMessage:
+    content = system_message.content
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    if not content or not isinstance(content[-1], dict):
+        return system_message
+    return SystemMessage(
+        content=[*content[:-1], {**content[-1], "cache_control": ANTHROPIC_CACHE_CONTROL}]
+    )
+
+
+def _tool_name(tool: Any) -> str:
+    if isinstance(tool, dict):
+        return tool.get("name") or tool.get("function", {}).get("name", "")
+    return getattr(tool, "name", "")
+
+
+class PromptCacheMiddleware(AgentMiddleware):
+    """Assembles model requests for prefix caching and records cache hits."""
+
+    def _prepare(self, request):
+        provider = provider_type(request.model)
+        overrides: dict[str, Any] = {
+            "tools": sorted(request.tools, key=_tool_name),
+        }
+        if provider == "anthropic-chat":
+            if request.system_message is not None:
+                overrides["system_message"] = _with_cache_control(request.system_message)
+            # Applied by the model to the last message that can take a breakpoint.
+            overrides["model_settings"] = {
+                **request.model_settings,
+                "cache_control": ANTHROPIC_CACHE_CONTROL,
+            }
+        elif provider == "openai-chat":
+            overrides["model_settings"] = {
+                "prompt_cache_key": OPENAI_PROMPT_CACHE_KEY,
+                **request.model_settings,
+            }
+        return provider, request.override(**overrides)
+
+    @staticmethod
+    def _record(provider: str | None, response):
+        # Middleware returning a command alongside wraps the model response.
+        response = getattr(response, "model_response", response)
+        for message in getattr(response, "result", None) or []:
+            usage_metadata = getattr(message, "usage_metadata", None)
+            if usage_metadata:
+                metrics = get_prompt_cache_metrics().setdefault(
+                    provider or "mixed", PromptCacheMetrics()
+                )
+                metrics.record(usage_metadata)
+                logger.debug(
+                    "Prompt cache for '%s': %s of %s input tokens read from cache",
+                    provider,
+                    (usage_metadata.get("input_token_details") or {}).get("cache_read", 0),
+                    usage_metadata.get("input_tokens"),
+                )
+
+    def wrap_model_call(self, request, handler):
+        provider, request = self._prepare(request)
+        response = handler(request)
+        self._record(provider, response)
+        return response
+
+    async def awrap_model_call(self, request, handler):
+        provider, request = self._prepare(request)
+        response = await handler(request)
+        self._record(provider, response)
+        return response
@@ -0,0 +1,380 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+logger = logging.getLogger(__name__)
+
+# Below this many time-to-first-token samples the p95 is too noisy to hedge on.
+MIN_SAMPLES_FOR_HEDGE_DEADLINE = 20
+
+
+class NoProviderAvailableError(Exception):
+    """Raised when every provider in the pool failed for a request."""
+
+    pass
+
+
+@dataclass
+class ProviderHealth:
+    """
+    Health of one provider, shared by every copy of the pool that wraps it.
+
+    Works as a circuit breaker: after ``failure_threshold`` consecutive failures
+    the circuit opens and the provider is skipped for ``reset_seconds``, after
+    which one trial request is let through (half-open). A success closes it again;
+    other requests skip the provider until the trial has an outcome.
+    """
+
+    name: str
+    failure_threshold: int = 3
+    reset_seconds: float = 30.0
+    consecutive_failures: int = 0
+    opened_at: float | None = None
+    # Start time of the half-open trial call, while it runs.
+    trial_started_at: float | None = None
+    successes: int = 0
+    failures: int = 0
+    ttft_seconds: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def is_available(self) -> bool:
+        state = self.state
+        if state == "half_open":
+            return self.trial_started_at is None
+        return state == "closed"
+
+    def begin_call(self, start: float) -> bool:
+        """
+        Claims the trial call, started at ``start``, when the circuit is
+        half-open. False when another trial is already running.
+        """
+        if self.state == "half_open":
+            if self.trial_started_at is not None:
+                return False
+            self.trial_started_at = start
+        return True
+
+    def cancel_call(self, start: float):
+        """A call given up without an outcome; frees the trial if it was one."""
+        if self.trial_started_at == start:
+            self.trial_started_at = None
+
+    def record_success(self, ttft_seconds: float | None = None):
+        self.trial_started_at = None
+        self.successes += 1
+        self.consecutive_failures = 0
+        if self.opened_at is not None:
+            logger.info("Provider '%s' recovered, closing circuit", self.name)
+        self.opened_at = None
+        if ttft_seconds is not None:
+            self.ttft_seconds.append(ttft_seconds)
+
+    def record_failure(self):
+        self.trial_started_at = None
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning("Provider '%s' is failing, opening circuit", self.name)
+            self.opened_at = time.monotonic()
+
+    def hedge_deadline(self, initial_deadline_seconds: float) -> float:
+        if len(self.ttft_seconds) < MIN_SAMPLES_FOR_HEDGE_DEADLINE:
+            return initial_deadline_seconds
+        samples = sorted(self.ttft_seconds)
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "trial_in_flight": self.trial_started_at is not None,
+            "ttft_samples": len(self.ttft_seconds),
+        }
+
+
+@dataclass
+class _Attempt:
+    provider_index: int
+    task: asyncio.Task
+    first_token: asyncio.Event
+
+
+class ProviderPoolChatModel(BaseChatModel):
+    """
+    Chat model that spreads requests over several providers.
+
+    Providers are tried in order, skipping those whose circuit is open, and a
+    failing or timed-out call fails over to the next one. With hedging enabled,
+    a backup call is started on the next provider when the first one hasn't
+    streamed a token within its p95 time-to-first-token; whichever streams first
+    wins and the other call is cancelled.
+    """
+
+    providers: list[Any]
+    health: list[Any]
+    timeout_seconds: float = 60.0
+    hedging_enabled: bool = False
+    hedge_initial_deadline_seconds: float = 3.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "provider-pool"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"providers": [health.name for health in self.health]}
+
+    def bind_tools(self, tools, *, tool_choice: str | None = None, **kwargs):
+        # A shallow copy keeps the same ProviderHealth objects, so circuit state is
+        # shared between the unbound pool and every bound copy.
+        return self.model_copy(
+            update={
+                "providers": [
+                    provider.bind_tools(tools, tool_choice=tool_choice, **kwargs)
+                    for provider in self.providers
+                ]
+            }
+        )
+
+    def health_snapshot(self) -> dict:
+        return {health.name: health.snapshot() for health in self.health}
+
+    def _candidates(self) -> list[int]:
+        available = [i for i, health in enumerate(self.health) if health.is_available()]
+        # If every circuit is open, trying is still better than failing outright.
+        return available or list(range(len(self.providers)))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        last_error = None
+        for index in self._candidates():
+            health = self.health[index]
+            if not health.begin_call(time.monotonic()):
+                continue
+            try:
+                message = self.providers[index].invoke(messages, stop=stop, **kwargs)
+            except Exception as e:
+                health.record_failure()
+                last_error = e
+                logger.warning("Provider '%s' failed: %s", health.name, e)
+                continue
+            health.record_success()
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise NoProviderAvailableError("All chat model providers failed") from last_error
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        candidates = self._candidates()
+        if self.hedging_enabled and len(candidates) > 1:
+            return await self._hedged_generate(candidates, messages, stop, kwargs)
+        return await self._failover_generate(candidates, messages, stop, kwargs)
+
+    async def _call(
+        self,
+        index: int,
+        messages,
+        stop,
+        kwargs: dict,
+        first_token: asyncio.Event | None = None,
+    ) -> ChatResult:
+        """Calls one provider, streaming so the time to first token is known."""
+        health = self.health[index]
+        start = time.monotonic()
+        ttft = None
+        if not health.begin_call(start):
+            raise NoProviderAvailableError(
+                f"Provider '{health.name}' is busy with its trial call"
+            )
+
+        async def consume():
+            nonlocal ttft
+            merged = None
+            # Callbacks of this call already get the merged result; without this
+            # the provider's own run would report it a second time.
+            async for chunk in self.providers[index].astream(
+                messages, stop=stop, config={"callbacks": []}, **kwargs
+            ):
+                if merged is None:
+                    ttft = time.monotonic() - start
+                    if first_token is not None:
+                        first_token.set()
+                    merged = chunk
+                else:
+                    merged = merged + chunk
+            if merged is None:
+                raise ValueError(f"Provider '{health.name}' returned an empty stream")
+            return message_chunk_to_message(merged)
+
+        try:
+            message = await asyncio.wait_for(consume(), timeout=self.timeout_seconds)
+        except asyncio.CancelledError:
+            # Cancelled because another provider won the hedge; not a failure.
+            health.cancel_call(start)
+            raise
+        except Exception as e:
+            health.record_failure()
+            logger.warning("Provider '%s' failed: %r", health.name, e)
+            raise
+        health.record_success(ttft)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        """
+        Streams from the first available provider, failing over while nothing
+        has been streamed. Chunks already passed on can't be taken back, so a
+        provider failing after its first chunk fails the call. Streamed calls
+        aren't hedged.
+        """
+        last_error = None
+        for index in self._candidates():
+            health = self.health[index]
+            start = time.monotonic()
+            ttft = None
+            if not health.begin_call(start):
+                continue
+            # Callbacks of this call already see every chunk; without this the
+            # provider's own run would report them a second time.
+            chunks = self.providers[index].astream(
+                messages, stop=stop, config={"callbacks": []}, **kwargs
+            )
+            try:
+                while True:
+                    remaining = self.timeout_seconds - (time.monotonic() - start)
+                    try:
+                        chunk = await asyncio.wait_for(
+                            anext(chunks), timeout=max(remaining, 0)
+                        )
+                    except StopAsyncIteration:
+                        break
+                    if ttft is None:
+                        ttft = time.monotonic() - start
+                    yield ChatGenerationChunk(message=chunk)
+            except (asyncio.CancelledError, GeneratorExit):
+                health.cancel_call(start)
+                raise
+            except Exception as e:
+                health.record_failure()
+                last_error = e
+                logger.warning("Provider '%s' failed: %r", health.name, e)
+                if ttft is not None:
+                    raise
+                continue
+            finally:
+                await chunks.aclose()
+            health.record_success(ttft)
+            return
+        raise NoProviderAvailableError("All chat model providers failed") from last_error
+
+    async def _failover_generate(
+        self, candidates: list[int], messages, stop, kwargs: dict, last_error=None
+    ) -> ChatResult:
+        for index in candidates:
+            try:
+                return await self._call(index, messages, stop, kwargs)
+            except Exception as e:
+                last_error = e
+        raise NoProviderAvailableError("All chat model providers failed") from last_error
+
+    def _start_attempt(self, index: int, messages, stop, kwargs: dict) -> _Attempt:
+        first_token = asyncio.Event()
+        task = asyncio.create_task(self._call(index, messages, stop, kwargs, first_token))
+        return _Attempt(index, task, first_token)
+
+    @staticmethod
+    async def _wait_ready(attempt: _Attempt, timeout: float | None = None) -> bool:
+        """Waits until the attempt streams a token or finishes. False on timeout."""
+        token_waiter = asyncio.ensure_future(attempt.first_token.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {attempt.task, token_waiter},
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            token_waiter.cancel()
+        return bool(done)
+
+    async def _race(self, attempts: list[_Attempt]) -> _Attempt | None:
+        """Returns the first attempt to stream a token, or None if all of them failed."""
+        contenders = list(attempts)
+        while contenders:
+            waiters = {
+                asyncio.ensure_future(self._wait_ready(attempt)): attempt
+                for attempt in contenders
+            }
+            done, pending = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in pending:
+                waiter.cancel()
+            for waiter in done:
+                attempt = waiters[waiter]
+                if attempt.first_token.is_set():
+                    return attempt
+                if attempt.task.done():
+                    if attempt.task.exception() is None:
+                        return attempt
+                    contenders.remove(attempt)
+        return None
+
+    async def _hedged_generate(
+        self, candidates: list[int], messages, stop, kwargs: dict
+    ) -> ChatResult:
+        primary, backup = candidates[0], candidates[1]
+        attempts = [self._start_attempt(primary, messages, stop, kwargs)]
+
+        deadline = self.health[primary].hedge_deadline(
+            self.hedge_initial_deadline_seconds
+        )
+        if not await self._wait_ready(attempts[0], timeout=deadline):
+            logger.info(
+                "Provider '%s' has no token after %.2fs, hedging on '%s'",
+                self.health[primary].name,
+                deadline,
+                self.health[backup].name,
+            )
+            attempts.append(self._start_attempt(backup, messages, stop, kwargs))
+
+        winner = await self._race(attempts)
+        for attempt in attempts:
+            if attempt is not winner:
+                attempt.task.cancel()
+
+        last_error = None
+        if winner is not None:
+            try:
+                return await winner.task
+            except Exception as e:
+                last_error = e
+
+        # A loser cancelled because the winner streamed first never failed, so
+        # it is still worth failing over to.
+        failed = {
+            attempt.provider_index
+            for attempt in attempts
+            if attempt is winner
+            or (
+                attempt.task.done()
+                and not attempt.task.cancelled()
+                and attempt.task.exception() is not None
+            )
+        }
+        remaining = [index for index in candidates if index not in failed]
+        return await self._failover_generate(
+            remaining, messages, stop, kwargs, last_error=last_error
+        )
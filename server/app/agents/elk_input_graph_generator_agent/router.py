@@ -0,0 +1,231 @@
+import logging
+import re
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+FAST_ROUTE = "fast"
+STRONG_ROUTE = "strong"
+
+# Follow-ups starting with one of these verbs edit an existing diagram.
+_EDIT_PROMPT_PATTERN = re.compile(
+    r"^\s*(please\s+)?(add|remove|delete|drop|rename|relabel|label|connect|disconnect|"
+    r"link|unlink|move|put|place|change|replace|swap|update|make)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RouteMetrics:
+    """In-process counters for one route. Latencies keep a bounded recent window."""
+
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    escalations: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "escalations": self.escalations,
+            "success_rate": self.successes / self.calls if self.calls else None,
+            "latency_p50_seconds": statistics.median(latencies) if latencies else None,
+            "latency_p95_seconds": latencies[int(0.95 * (len(latencies) - 1))]
+            if latencies
+            else None,
+        }
+
+
+def message_role_and_content(message: Any) -> tuple[str | None, Any]:
+    if isinstance(message, dict):
+        return message.get("role") or message.get("type"), message.get("content")
+    return getattr(message, "type", None), getattr(message, "content", None)
+
+
+def last_user_message(graph_state: dict) -> str:
+    for message in reversed(graph_state.get("messages") or []):
+        role, content = message_role_and_content(message)
+        if role in ("user", "human"):
+            return content if isinstance(content, str) else str(content)
+    return ""
+
+
+class ModelRouter:
+    """
+    Routes agent runs between a fast, cheap model and the default (strong) model.
+
+    Short prompts and edits of an existing diagram start on the fast route. A run
+    escalates to the next route when it raises (including structured-output
+    parsing failures), finishes without a structured response, or is rejected by
+    the caller's ``accept`` check. Without a fast model every run uses the strong
+    route, exactly as before routing existed.
+    """
+
+    def __init__(self, routes: dict[str, Any]):
+        # Insertion order is the escalation order.
+        self.routes = {name: route for name, route in routes.items() if route is not None}
+        self.metrics = {name: RouteMetrics() for name in self.routes}
+
+    def choose_route(self, graph_state: dict) -> str:
+        if FAST_ROUTE not in self.routes:
+            return STRONG_ROUTE
+
+        prompt = last_user_message(graph_state)
+        is_short = len(prompt) <= settings.FAST_ROUTE_MAX_PROMPT_CHARACTERS
+        is_edit = bool(graph_state.get("structured_response")) and bool(
+            _EDIT_PROMPT_PATTERN.match(prompt)
+        )
+        return FAST_ROUTE if is_short or is_edit else STRONG_ROUTE
+
+    async def ainvoke(
+        self,
+        graph_state: dict,
+        config: dict | None = None,
+        accept: Callable[[dict], bool] | None = None,
+        start_route: str | None = None,
+        on_message_chunk: Callable[[Any], None] | None = None,
+    ) -> dict:
+        """
+        Runs the agent, escalating on failure.
+
+        ``accept`` is called on every structured response, including the last
+        route's, so callers can reuse whatever it computed. The last route's
+        response is returned even if ``accept`` rejects it.
+
+        ``on_message_chunk`` is given the model's output as it streams, on every
+        route tried.
+        """
+        route_names = list(self.routes)
+        first_route = start_route or self.choose_route(graph_state)
+        if first_route not in self.routes:
+            first_route = route_names[-1]
+        cascade = route_names[route_names.index(first_route) :]
+
+        for position, route_name in enumerate(cascade):
+            is_last = position == len(cascade) - 1
+            metrics = self.metrics[route_name]
+            metrics.calls += 1
+            route_config = {
+                **(config or {}),
+                "tags": [*(config or {}).get("tags", []), f"route:{route_name}"],
+            }
+
+            start = time.perf_counter()
+            try:
+                response = await self._run_route(
+                    self.routes[route_name], graph_state, route_config, on_message_chunk
+                )
+            except Exception:
+                metrics.latencies.append(time.perf_counter() - start)
+                metrics.failures += 1
+                if is_last:
+                    raise
+                metrics.escalations += 1
+                logger.warning(
+                    "Route '%s' failed, escalating to '%s'",
+                    route_name,
+                    cascade[position + 1],
+                    exc_info=True,
+                )
+                continue
+            metrics.latencies.append(time.perf_counter() - start)
+
+            accepted = "structured_response" in response and (
+                accept is None or accept(response)
+            )
+            if accepted:
+                metrics.successes += 1
+            else:
+                metrics.failures += 1
+
+            if accepted or is_last:
+                logger.info(
+                    "Route '%s' answered in %.2fs (accepted=%s)",
+                    route_name,
+                    metrics.latencies[-1],
+                    accepted,
+                )
+                return response
+
+            metrics.escalations += 1
+            logger.info(
+                "Route '%s' produced an unusable graph, escalating to '%s'",
+                route_name,
+                cascade[position + 1],
+            )
+
+    @staticmethod
+    async def _run_route(
+        route: Any,
+        graph_state: dict,
+        config: dict,
+        on_message_chunk: Callable[[Any], None] | None,
+    ) -> dict:
+        if on_message_chunk is None:
+            return await route.ainvoke(graph_state, config=config)
+
+        # Streaming messages also makes the chat models stream their tokens.
+        response = None
+        async for mode, payload in route.astream(
+            graph_state, config=config, stream_mode=["messages", "values"]
+        ):
+            if mode == "values":
+                response = payload
+                continue
+            chunk, metadata = payload
+            if metadata.get("langgraph_node") == "model":
+                on_message_chunk(chunk)
+        return response
+
+    def metrics_snapshot(self) -> dict:
+        return {name: metrics.snapshot() for name, metrics in self.metrics.items()}
+
+
+@lru_cache(maxsize=1)
+def get_model_router() -> ModelRouter:
+    """
+    Builds the router, and with it the chat models and agents, on first use.
+
+    Importing LangChain and the provider SDKs dominates cold start time, so the
+    agent module is only imported once a request actually needs the agent.
+    """
+    from app.agents.elk_input_graph_generator_agent.agent import (
+        get_agent,
+        get_fast_agent,
+    )
+
+    return ModelRouter({FAST_ROUTE: get_fast_agent(), STRONG_ROUTE: get_agent()})
+
+
+def agent_metrics_snapshot() -> dict:
+    """
+    This process's route metrics, provider pool health and prompt cache hits.
+    Empty until the agent first runs, so reading them never builds the agent.
+    """
+    if not get_model_router.cache_info().currsize:
+        return {"routes": {}, "providers": {}, "prompt_cache": {}}
+    from app.agents.elk_input_graph_generator_agent.chat_models import (
+        get_default_chat_model,
+    )
+    from app.agents.elk_input_graph_generator_agent.prompt_cache import (
+        prompt_cache_metrics_snapshot,
+    )
+
+    # Only a provider pool has health to report.
+    health_snapshot = getattr(get_default_chat_model(), "health_snapshot", None)
+    return {
+        "routes": get_model_router().metrics_snapshot(),
+        "providers": health_snapshot() if health_snapshot else {},
+        "prompt_cache": prompt_cache_metrics_snapshot(),
+    }
@@ -17,6 +17,10 @@ class Node(BaseModel):
     icon_id: Optional[str] = Field(
         default=None, description="Optional identifier for an icon to be displayed"
     )
+    shape: Optional[str] = Field(
+        default=None,
+        description="Optional outline drawn for nodes without an icon: rectangle (default), rounded_rectangle, circle, ellipse, diamond, hexagon, cylinder, ...",
+    )
     children_ids: List[str] = Field(
         default_factory=list,
         description="List of IDs of direct children nodes found inside this node. The actual child nodes should be listed in the top-level 'nodes' list.",
@@ -1,7 +1,15 @@
 from fastapi import APIRouter
+from .endpoints.batches import router as batches_router
 from .endpoints.chat import router as chat_router
+from .endpoints.exports import router as exports_router
+from .endpoints.imports import router as imports_router
+from .endpoints.metrics import router as metrics_router
 
 router = APIRouter(prefix="/v1")
 router.include_router(chat_router)
+router.include_router(exports_router)
+router.include_router(batches_router)
+router.include_router(imports_router)
+router.include_router(metrics_router)
 
 __all__ = ["router"]
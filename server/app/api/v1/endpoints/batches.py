@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.v1.schemas.batch import BatchRequest
+from app.config.settings import settings
+from app.core.rate_limit import global_key, limiter
+from app.core.responses import ORJSONResponse
+from app.services.batch_service import BatchService, get_batch_service
+
+router = APIRouter(prefix="/batches", tags=["batches"])
+
+
+async def _count_diagrams(request: Request):
+    # Runs before the rate limits are checked, which only see the request.
+    try:
+        descriptions = (await request.json()).get("descriptions")
+    except (ValueError, AttributeError):
+        descriptions = None
+    request.state.diagram_count = max(len(descriptions or []), 1)
+
+
+def _diagram_count(request: Request) -> int:
+    return request.state.diagram_count
+
+
+# Each diagram in a batch is charged against the chat limits, like a chat turn.
+@router.post("/", status_code=202, dependencies=[Depends(_count_diagrams)])
+@limiter.limit("; ".join(settings.BATCH_RATE_LIMITS_PER_USER))
+@limiter.limit(
+    "; ".join(settings.DEFAULT_CHAT_RATE_LIMITS_PER_USER), cost=_diagram_count
+)
+@limiter.limit(
+    "; ".join(settings.GLOBAL_CHAT_RATE_LIMITS),
+    key_func=global_key,
+    cost=_diagram_count,
+)
+async def create_batch(
+    request: Request,
+    batch_request: BatchRequest,
+    batch_service: BatchService = Depends(get_batch_service),
+):
+    return await batch_service.create_job(
+        descriptions=batch_request.descriptions, user_id=request.state.uid
+    )
+
+
+@router.get("/{job_id}")
+async def get_batch(
+    job_id: str,
+    request: Request,
+    batch_service: BatchService = Depends(get_batch_service),
+):
+    return await batch_service.get_job(job_id, user_id=request.state.uid)
+
+
+@router.get("/{job_id}/results")
+async def get_batch_results(
+    job_id: str,
+    request: Request,
+    after: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    batch_service: BatchService = Depends(get_batch_service),
+):
+    return ORJSONResponse(
+        await batch_service.get_results(
+            job_id, user_id=request.state.uid, after=after, limit=limit
+        )
+    )
+
+
+@router.get("/{job_id}/events")
+async def stream_batch_results(
+    job_id: str,
+    request: Request,
+    last_event_id: str | None = Header(None),
+    batch_service: BatchService = Depends(get_batch_service),
+):
+    # Checked before streaming starts so unknown jobs get a plain 404.
+    await batch_service.get_job(job_id, user_id=request.state.uid)
+    return StreamingResponse(
+        batch_service.stream_results(job_id, after=last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
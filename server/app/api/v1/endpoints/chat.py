@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from app.api.v1.schemas.chat import ChatRequest
 from app.services.chat_service import get_chat_service, ChatService
+from app.services.chat_job_service import get_chat_job_service, ChatJobService
 from app.config.settings import settings
 from app.core.rate_limit import limiter, global_key
+from app.core.responses import ORJSONResponse
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -18,10 +21,86 @@ async def chat_endpoint(
     chat_request: ChatRequest,
     chat_service: ChatService = Depends(get_chat_service),
 ):
-    return await chat_service.chat(
+    # Returned as a response so the scene isn't walked by jsonable_encoder first.
+    return ORJSONResponse(
+        await chat_service.chat(
+            user_message=chat_request.user_message,
+            thread_id=chat_request.thread_id,
+            user_id=request.state.uid,
+            layout_profile=chat_request.layout_profile,
+        )
+    )
+
+
+@router.post("/stream")
+@limiter.limit("; ".join(settings.DEFAULT_CHAT_RATE_LIMITS_PER_USER))
+@limiter.limit(
+    "; ".join(settings.GLOBAL_CHAT_RATE_LIMITS),
+    key_func=global_key,
+)
+async def stream_chat(
+    request: Request,
+    chat_request: ChatRequest,
+    chat_service: ChatService = Depends(get_chat_service),
+):
+    return StreamingResponse(
+        chat_service.stream_chat(
+            user_message=chat_request.user_message,
+            thread_id=chat_request.thread_id,
+            user_id=request.state.uid,
+            layout_profile=chat_request.layout_profile,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs", status_code=202)
+@limiter.limit("; ".join(settings.DEFAULT_CHAT_RATE_LIMITS_PER_USER))
+@limiter.limit(
+    "; ".join(settings.GLOBAL_CHAT_RATE_LIMITS),
+    key_func=global_key,
+)
+async def create_chat_job(
+    request: Request,
+    chat_request: ChatRequest,
+    idempotency_key: str | None = Header(None, max_length=255),
+    chat_job_service: ChatJobService = Depends(get_chat_job_service),
+):
+    job, created = await chat_job_service.enqueue(
         user_message=chat_request.user_message,
         thread_id=chat_request.thread_id,
         user_id=request.state.uid,
+        layout_profile=chat_request.layout_profile,
+        idempotency_key=idempotency_key,
+    )
+    # A retry of an earlier request (nothing new was queued) gets a plain 200.
+    return ORJSONResponse(job, status_code=202 if created else 200)
+
+
+@router.get("/jobs/{job_id}")
+async def get_chat_job(
+    job_id: str,
+    request: Request,
+    chat_job_service: ChatJobService = Depends(get_chat_job_service),
+):
+    return ORJSONResponse(
+        await chat_job_service.get_job(job_id, user_id=request.state.uid)
+    )
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_chat_job(
+    job_id: str,
+    request: Request,
+    chat_job_service: ChatJobService = Depends(get_chat_job_service),
+):
+    # Checked before streaming starts so unknown jobs get a plain 404.
+    await chat_job_service.get_job(job_id, user_id=request.state.uid)
+    return StreamingResponse(
+        chat_job_service.stream_job(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -32,8 +111,10 @@ async def get_all_chats(
     offset: int = 0,
     chat_service: ChatService = Depends(get_chat_service),
 ):
-    return await chat_service.get_user_chats(
-        user_id=request.state.uid, limit=limit, offset=offset
+    return ORJSONResponse(
+        await chat_service.get_user_chats(
+            user_id=request.state.uid, limit=limit, offset=offset
+        )
     )
 
 
@@ -43,4 +124,46 @@ async def get_chat(
     request: Request,
     chat_service: ChatService = Depends(get_chat_service),
 ):
-    return await chat_service.get_chat(thread_id=thread_id, user_id=request.state.uid)
+    return ORJSONResponse(
+        await chat_service.get_chat(thread_id=thread_id, user_id=request.state.uid)
+    )
+
+
+@router.get("/{thread_id}/scene")
+async def get_chat_scene(
+    thread_id: str,
+    request: Request,
+    chat_service: ChatService = Depends(get_chat_service),
+):
+    return ORJSONResponse(
+        await chat_service.get_chat_scene(thread_id=thread_id, user_id=request.state.uid)
+    )
+
+
+@router.get("/{thread_id}/nodes/{node_id}")
+async def expand_chat_node(
+    thread_id: str,
+    node_id: str,
+    request: Request,
+    chat_service: ChatService = Depends(get_chat_service),
+):
+    return ORJSONResponse(
+        await chat_service.expand_chat_node(
+            thread_id=thread_id, user_id=request.state.uid, node_id=node_id
+        )
+    )
+
+
+@router.get("/{thread_id}/messages")
+async def get_chat_messages(
+    thread_id: str,
+    request: Request,
+    before: int | None = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    chat_service: ChatService = Depends(get_chat_service),
+):
+    return ORJSONResponse(
+        await chat_service.get_chat_messages(
+            thread_id=thread_id, user_id=request.state.uid, before=before, limit=limit
+        )
+    )
@@ -0,0 +1,58 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from app.api.v1.schemas.export import ExportRequest
+from app.config.settings import settings
+from app.services.export_service import (
+    ExportBackendUnavailableError,
+    ExportResult,
+    ExportService,
+    get_export_service,
+)
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+def _export_response(request: Request, result: ExportResult) -> Response:
+    # The cache key identifies the rendered bytes, so it doubles as the ETag.
+    etag = f'"{result.cache_key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=result.content, media_type=result.media_type, headers=headers)
+
+
+@router.post("/")
+async def export_graph(
+    request: Request,
+    export_request: ExportRequest,
+    export_service: ExportService = Depends(get_export_service),
+):
+    try:
+        result = await export_service.export_graph(
+            export_request.graph.model_dump(mode="json"),
+            export_format=export_request.format,
+            scale=export_request.scale,
+            layout_profile=export_request.layout_profile,
+        )
+    except ExportBackendUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return _export_response(request, result)
+
+
+@router.get("/{thread_id}")
+async def export_chat(
+    thread_id: str,
+    request: Request,
+    format: Literal["svg", "png"] = "svg",
+    scale: float = Query(1.0, gt=0, le=settings.EXPORT_MAX_SCALE),
+    export_service: ExportService = Depends(get_export_service),
+):
+    try:
+        result = await export_service.export_chat(
+            thread_id, request.state.uid, export_format=format, scale=scale
+        )
+    except ExportBackendUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return _export_response(request, result)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.v1.schemas.imports import MermaidImportRequest
+from app.core.responses import ORJSONResponse
+from app.services.mermaid_import import (
+    MermaidImportService,
+    MermaidParseError,
+    get_mermaid_import_service,
+)
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+
+@router.post("/mermaid")
+async def import_mermaid(
+    import_request: MermaidImportRequest,
+    import_service: MermaidImportService = Depends(get_mermaid_import_service),
+):
+    try:
+        result = await import_service.import_flowchart(
+            import_request.source, layout_profile=import_request.layout_profile
+        )
+    except MermaidParseError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return ORJSONResponse(result)
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.agents.elk_input_graph_generator_agent.router import agent_metrics_snapshot
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/agent")
+async def get_agent_metrics():
+    return agent_metrics_snapshot()
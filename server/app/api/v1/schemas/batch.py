@@ -0,0 +1,15 @@
+from typing import Annotated, List
+
+from pydantic import BaseModel, Field
+
+from app.config.settings import settings
+
+Description = Annotated[
+    str, Field(min_length=1, max_length=settings.MAX_NUMBER_OF_CHARACTERS_IN_CHAT_MESSAGE)
+]
+
+
+class BatchRequest(BaseModel):
+    descriptions: List[Description] = Field(
+        ..., min_length=1, max_length=settings.BATCH_MAX_DIAGRAMS
+    )
@@ -1,6 +1,9 @@
 from pydantic import BaseModel, Field
 from app.config.settings import settings
+from app.services.layout_profiles import LayoutProfile
 
 class ChatRequest(BaseModel):
     thread_id: str | None = None
     user_message: str = Field(..., max_length=settings.MAX_NUMBER_OF_CHARACTERS_IN_CHAT_MESSAGE)
+    # Chosen by the graph's size when not set.
+    layout_profile: LayoutProfile | None = None
@@ -0,0 +1,14 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from app.agents.elk_input_graph_generator_agent.schemas import Graph
+from app.config.settings import settings
+from app.services.layout_profiles import LayoutProfile
+
+
+class ExportRequest(BaseModel):
+    graph: Graph
+    format: Literal["svg", "png"] = "svg"
+    scale: float = Field(1.0, gt=0, le=settings.EXPORT_MAX_SCALE)
+    layout_profile: LayoutProfile | None = None
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+
+from app.config.settings import settings
+from app.services.layout_profiles import LayoutProfile
+
+
+class MermaidImportRequest(BaseModel):
+    source: str = Field(..., min_length=1, max_length=settings.MERMAID_IMPORT_MAX_LENGTH)
+    layout_profile: LayoutProfile | None = None
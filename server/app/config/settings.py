@@ -2,7 +2,7 @@ from pydantic import ConfigDict, model_validator
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 from pydantic import SecretStr
-from typing import List
+from typing import List, Literal
 
 load_dotenv()
 
@@ -12,9 +12,41 @@ class Settings(BaseSettings):
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_PASSWORD: SecretStr
+    CHAT_STORAGE_BACKEND: Literal["firestore", "sqlite"] = (
+        "firestore"  # "sqlite" keeps chats in an embedded database, for single-node installs
+    )
+    SQLITE_DATABASE_PATH: str = "chats.db"
+    SQLITE_POOL_SIZE: int = 8  # Connections per process, opened on first use
     DEFAULT_CHAT_MODEL_NAME: str
+    FAST_CHAT_MODEL_NAME: str | None = (
+        None  # Cheap model tried first for short/edit prompts; routing is off when unset
+    )
+    FAST_ROUTE_MAX_PROMPT_CHARACTERS: int = 300
+    FALLBACK_CHAT_MODEL_NAMES: List[str] = []  # Tried in order when the default fails
+    CHAT_MODEL_PROVIDER_TIMEOUT_SECONDS: float = 60.0
+    CHAT_MODEL_CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 3
+    CHAT_MODEL_CIRCUIT_BREAKER_RESET_SECONDS: float = 30.0
+    CHAT_MODEL_HEDGING_ENABLED: bool = False
+    CHAT_MODEL_HEDGE_INITIAL_DEADLINE_SECONDS: float = (
+        3.0  # Used until enough time-to-first-token samples exist for a p95
+    )
+    AGENT_RESPONSE_FORMAT: Literal["tool", "dsl"] = (
+        "tool"  # "dsl" has the agent write the graph in the terse graph DSL instead of a Graph tool call
+    )
+    PROGRESSIVE_RENDER_INTERVAL_SECONDS: float = (
+        0.5  # Minimum time between provisional scenes of POST /chat/stream
+    )
+    PROMPT_CACHING_ENABLED: bool = (
+        True  # Mark and keep stable the prompt prefix providers can cache across calls
+    )
+    ICON_PROVIDERS: List[str] = [
+        "aws"
+    ]  # Icon namespaces served (aws, gcp, azure, generic); each loads on first use
     CORES_ALLOWED_ORIGINS: str
     ELK_SERVICE_ENDPOINT: str
+    ELK_BATCH_SERVICE_ENDPOINT: str | None = (
+        None  # The rendering engine's /diagrams/render-graphs; batches lay out graph by graph when unset
+    )
     RATE_LIMIT_ENABLED: bool = True
     DEFAULT_APPLICATION_LEVEL_RATE_LIMITS_PER_USER: List[str] = []
     DEFAULT_CHAT_RATE_LIMITS_PER_USER: List[str] = []
@@ -26,6 +58,69 @@ class Settings(BaseSettings):
     DEFAULT_EXCALIDRAW_ELEMENT_TEXT_LINE_HEIGHT: float = 1.25
     DEFAULT_EXCALIDRAW_ELEMENT_FONT_FAMILY: int = 5
     DEFAULT_EXCALIDRAW_ELEMENT_TEXT_FONT_TO_WIDTH_RATIO: float = 0.54
+    LAYOUT_BALANCED_PROFILE_MIN_SIZE: int = (
+        300  # Nodes plus edges from which graphs are laid out with the cheaper "balanced" profile
+    )
+    LAYOUT_FAST_PROFILE_MIN_SIZE: int = 2000  # ...and with the "fast" profile
+    LAYOUT_PROFILE_DEEP_NESTING: int = (
+        8  # Graphs nested this deep get the next cheaper profile
+    )
+    LAYOUT_TIME_BUDGET_SECONDS: float = (
+        10.0  # A layout taking longer is retried with the next cheaper profile; 0 disables it
+    )
+    LOD_MAX_ELEMENTS: int = (
+        1000  # Nodes plus edges a scene shows before containers are collapsed; 0 disables it
+    )
+    LOD_MAX_DEPTH: int = 3  # Containers nested deeper are collapsed first in oversized scenes
+    LAYOUT_DECOMPOSITION_MIN_NODES: int = (
+        100  # Graphs this large have their unconnected parts laid out concurrently; 0 disables it
+    )
+    BATCH_MAX_DIAGRAMS: int = 500
+    BATCH_MAX_CONCURRENT_GENERATIONS: int = (
+        4  # Agent runs in flight per process across all batch jobs; interactive chats aren't counted
+    )
+    BATCH_LAYOUT_MAX_GRAPHS: int = 16  # Graphs sent to the rendering engine per batch call
+    BATCH_LAYOUT_MAX_WAIT_SECONDS: float = (
+        0.05  # How long a finished graph waits for others to share a layout call
+    )
+    BATCH_JOB_TTL_SECONDS: int = 24 * 60 * 60
+    BATCH_RATE_LIMITS_PER_USER: List[str] = ["10/hour"]
+    CHAT_JOBS_ENABLED: bool = (
+        False  # Accept asynchronous /chat/jobs; needs `python -m app.worker` running
+    )
+    CHAT_JOB_WORKER_CONCURRENCY: int = 4  # Jobs one worker process runs at a time
+    CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS: int = (
+        300  # A job not renewed for this long is taken over by another worker
+    )
+    CHAT_JOB_MAX_ATTEMPTS: int = 3
+    CHAT_JOB_TTL_SECONDS: int = 24 * 60 * 60  # Also how long idempotency keys are kept
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # Worker processes of `python -m app.serve`; 0 means one per CPU core
+    SERVER_MAX_REQUESTS: int = (
+        5000  # A worker is replaced after this many requests (plus jitter); 0 disables it
+    )
+    SERVER_MAX_REQUESTS_JITTER: int = 500
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = (
+        120  # How long a stopping worker may take to finish in-flight generations
+    )
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    ICON_CANDIDATES_ENABLED: bool = (
+        True  # List catalog icons for services named in the chat before the agent runs
+    )
+    ICON_CANDIDATES_MAX: int = 30
+    EXPORT_CACHE_MAX_BYTES: int = (
+        64 * 1024 * 1024  # Rendered SVG/PNG exports kept in memory, keyed by scene hash
+    )
+    EXPORT_MAX_SCALE: float = 4.0
+    MERMAID_IMPORT_MAX_LENGTH: int = 100_000
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE_BYTES: int = (
+        1024  # Smaller responses are sent uncompressed; it wouldn't pay off
+    )
+    COMPRESSION_CACHE_MAX_ENTRIES: int = (
+        256  # Compressed variants of responses with an ETag, e.g. exports
+    )
     AUTH_DISABLED: bool = (
         False  # Set to True to disable authentication (for testing/dev purposes only)
     )
@@ -33,6 +128,9 @@ class Settings(BaseSettings):
         "test-user"  # Default user ID to use when authentication is disabled
     )
     MAX_NUMBER_OF_CHARACTERS_IN_CHAT_MESSAGE: int = 2000
+    GRAPH_VALIDATION_MAX_FEEDBACK_ROUNDS: int = (
+        1  # How many times the agent is asked to fix a graph that can't be repaired locally
+    )
 
     model_config = ConfigDict(env_file=".env", case_sensitive=True, extra="allow")
 
@@ -0,0 +1,250 @@
+"""
+Response compression negotiated from ``Accept-Encoding``: zstd and brotli when
+their packages are installed (the ``compression`` extra), gzip otherwise.
+
+Only complete, compressible bodies of at least ``COMPRESSION_MINIMUM_SIZE_BYTES``
+are compressed. Streamed responses, including server-sent events, pass through
+untouched so events are not held back by a compressor's buffer. Responses with
+a strong ETag (e.g. exports) identify their bytes, so their compressed variants
+are cached and served again without recompressing.
+
+Encodings of a response are different representations and must not share a
+strong ETag, so a compressed response's ETag gets the encoding appended
+(``"abc"`` becomes ``"abc-gzip"``). The suffix is taken off ``If-None-Match``
+before the request reaches the app, which only knows its own ETags, and put
+back on the ETag of a ``304``.
+"""
+
+import gzip
+import logging
+from collections import OrderedDict
+from typing import Callable
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Levels favour latency: compressing happens on the request path, and most of
+# the size reduction of JSON scenes comes from the first levels.
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+# Bodies above this are compressed in a thread instead of on the event loop.
+THREAD_COMPRESSION_MIN_BYTES = 256 * 1024
+
+COMPRESSIBLE_MEDIA_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _available_encoders() -> dict[str, Callable[[bytes], bytes]]:
+    """Supported encodings, in order of preference."""
+    encoders = {}
+    try:
+        import zstandard
+
+        # A compressor isn't safe to share between threads, so one per body.
+        encoders["zstd"] = lambda body: zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL
+        ).compress(body)
+    except ImportError:
+        pass
+    try:
+        import brotli
+
+        encoders["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    except ImportError:
+        pass
+    encoders["gzip"] = _gzip
+    return encoders
+
+
+ENCODERS = _available_encoders()
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """
+    The encoding to use for an ``Accept-Encoding`` header: the one with the
+    highest q-value, ties broken by our order of preference; ``*`` matches any.
+    """
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in ENCODERS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _is_strong(etag: str | None) -> bool:
+    return etag is not None and not etag.startswith("W/")
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _without_encoded_etags(scope: Scope, encoding: str) -> tuple[Scope, bool]:
+    """
+    ``scope`` with the ``encoding`` suffix taken off the ETags in
+    ``If-None-Match``, and whether there was one.
+    """
+    suffix = f'-{encoding}"'.encode("latin-1")
+    headers, found = [], False
+    for name, value in scope["headers"]:
+        if name == b"if-none-match" and suffix in value:
+            value, found = value.replace(suffix, b'"'), True
+        headers.append((name, value))
+    return ({**scope, "headers": headers}, True) if found else (scope, False)
+
+
+class _CompressedBodyCache:
+    """
+    Compressed bodies keyed by (the app's ETag, encoding), least recently used
+    evicted.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    def get(self, etag: str, encoding: str) -> bytes | None:
+        body = self._entries.get((etag, encoding))
+        if body is not None:
+            self._entries.move_to_end((etag, encoding))
+        return body
+
+    def put(self, etag: str, encoding: str, body: bytes):
+        if self.max_entries <= 0:
+            return
+        self._entries[(etag, encoding)] = body
+        self._entries.move_to_end((etag, encoding))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        cache_max_entries: int = 256,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = _CompressedBodyCache(cache_max_entries)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        scope, revalidating = _without_encoded_etags(scope, encoding)
+        responder = _CompressionResponder(self, encoding, send, revalidating)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: str,
+        send: Send,
+        revalidating: bool = False,
+    ):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        # The client revalidates a variant in this encoding.
+        self.revalidating = revalidating
+        self.start_message: Message | None = None
+        self.passthrough = False
+
+    def _should_compress(self, headers: Headers) -> bool:
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return (
+            "content-encoding" not in headers
+            and media_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+        )
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = MutableHeaders(raw=message["headers"])
+            if message["status"] == 304:
+                # Confirms the client's compressed variant, so it keeps its ETag.
+                if self.revalidating and _is_strong(headers.get("etag")):
+                    headers["ETag"] = _encoded_etag(headers["etag"], self.encoding)
+                self.passthrough = True
+            else:
+                self.passthrough = not self._should_compress(headers)
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        if message.get("more_body", False) or len(body) < self.middleware.minimum_size:
+            # Streamed or too small to be worth it: send as is.
+            self.passthrough = True
+            await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        etag = headers.get("etag")
+        compressed = await self._compress(body, etag)
+        if _is_strong(etag):
+            headers["ETag"] = _encoded_etag(etag, self.encoding)
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _compress(self, body: bytes, etag: str | None) -> bytes:
+        cacheable = _is_strong(etag)
+        if cacheable:
+            cached = self.middleware.cache.get(etag, self.encoding)
+            if cached is not None:
+                return cached
+
+        encoder = ENCODERS[self.encoding]
+        if len(body) >= THREAD_COMPRESSION_MIN_BYTES:
+            compressed = await anyio.to_thread.run_sync(encoder, body)
+        else:
+            compressed = encoder(body)
+
+        if cacheable:
+            self.middleware.cache.put(etag, self.encoding, compressed)
+        return compressed
@@ -0,0 +1,175 @@
+import base64
+import json
+import logging
+import mmap
+import os
+import struct
+from functools import lru_cache
+
+# This file: server/app/core/icon_catalog.py
+# Targets: server/app/assets/<provider>_icons.{idx,blob,json}
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS_PATH = os.path.join(BASE_PATH, "assets")
+
+# Compact bundle, written by process-icons/build_icons.py, which imports these.
+#
+# <name>.idx  header:  magic b"TPIB", version (u16), reserved (u16), icon count (u32)
+#             records: one per icon, sorted by id, each
+#                      id, name, keywords: offset (u32) and length (u16) into the strings
+#                      svg: offset (u32) and length (u32) into the blob
+#             strings: UTF-8 text the records point into
+# <name>.blob minified SVG bytes, back to back
+BUNDLE_MAGIC = b"TPIB"
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct("<4sHHI")
+BUNDLE_RECORD = struct.Struct("<IHIHIHII")
+
+SVG_DATA_URL_PREFIX = "data:image/svg+xml;base64,"
+
+
+logger = logging.getLogger(__name__)
+
+
+class IconLoadingError(Exception):
+    """Raised when there is an issue loading an icons file."""
+
+    pass
+
+
+class IconCatalog:
+    """
+    The icons of one provider.
+
+    ``icons`` holds the metadata of every icon (``id``, ``name`` and ``keywords``)
+    in catalog order; the SVG of an icon is only read when asked for.
+    """
+
+    def __init__(self, icons: list[dict]):
+        self.icons = icons
+        self.icons_by_id = {icon["id"]: icon for icon in icons}
+
+    def __contains__(self, icon_id: str) -> bool:
+        return icon_id in self.icons_by_id
+
+    def __len__(self) -> int:
+        return len(self.icons)
+
+    def svg(self, icon_id: str) -> bytes:
+        raise KeyError(icon_id)
+
+    def data_url(self, icon_id: str) -> str:
+        return SVG_DATA_URL_PREFIX + base64.b64encode(self.svg(icon_id)).decode("ascii")
+
+
+class JsonIconCatalog(IconCatalog):
+    """Catalog backed by the legacy JSON file of base64 data URLs."""
+
+    def __init__(self, path: str):
+        with open(path, "r") as f:
+            entries = json.load(f)
+        self._data_urls = {entry["id"]: entry["url"] for entry in entries}
+        super().__init__(
+            [
+                {"id": entry["id"], "name": entry["name"], "keywords": ""}
+                for entry in entries
+            ]
+        )
+
+    def svg(self, icon_id: str) -> bytes:
+        return base64.b64decode(self._data_urls[icon_id][len(SVG_DATA_URL_PREFIX) :])
+
+    def data_url(self, icon_id: str) -> str:
+        return self._data_urls[icon_id]
+
+
+class BundleIconCatalog(IconCatalog):
+    """
+    Catalog backed by the compact bundle: a small index of fixed-size records
+    plus a blob of minified SVGs. Both files are memory-mapped, so only the index
+    is read at startup and an SVG is paged in when a scene uses it.
+    """
+
+    def __init__(self, index_path: str, blob_path: str):
+        self._index = self._map(index_path)
+        self._blob = self._map(blob_path)
+
+        magic, version, _, count = BUNDLE_HEADER.unpack_from(self._index, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            raise IconLoadingError(
+                f"Unsupported icon bundle at {index_path} (version {version})"
+            )
+
+        records_end = BUNDLE_HEADER.size + count * BUNDLE_RECORD.size
+        strings_start = records_end
+
+        def read_string(offset: int, length: int) -> str:
+            start = strings_start + offset
+            return self._index[start : start + length].decode("utf-8")
+
+        icons = []
+        self._svg_spans: dict[str, tuple[int, int]] = {}
+        for record in BUNDLE_RECORD.iter_unpack(
+            self._index[BUNDLE_HEADER.size : records_end]
+        ):
+            (
+                id_offset,
+                id_length,
+                name_offset,
+                name_length,
+                keywords_offset,
+                keywords_length,
+                svg_offset,
+                svg_length,
+            ) = record
+            icon_id = read_string(id_offset, id_length)
+            icons.append(
+                {
+                    "id": icon_id,
+                    "name": read_string(name_offset, name_length),
+                    "keywords": read_string(keywords_offset, keywords_length),
+                }
+            )
+            self._svg_spans[icon_id] = (svg_offset, svg_length)
+        super().__init__(icons)
+
+    @staticmethod
+    def _map(path: str) -> mmap.mmap | bytes:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def svg(self, icon_id: str) -> bytes:
+        offset, length = self._svg_spans[icon_id]
+        return self._blob[offset : offset + length]
+
+    # Scenes keep reusing the same few dozen icons, so their data URLs are kept.
+    # Catalogs live as long as the process, so caching on the method is fine.
+    @lru_cache(maxsize=256)
+    def data_url(self, icon_id: str) -> str:
+        return super().data_url(icon_id)
+
+
+def icon_shard_paths(provider: str) -> tuple[str, str, str]:
+    """Returns the bundle index, bundle blob and JSON paths of a provider's icons."""
+    base_path = os.path.join(ASSETS_PATH, f"{provider}_icons")
+    return f"{base_path}.idx", f"{base_path}.blob", f"{base_path}.json"
+
+
+def load_icon_catalog(provider: str) -> IconCatalog:
+    """
+    Loads the icons of one provider. The compact bundle is preferred; the JSON
+    file is only parsed when the bundle hasn't been generated.
+    """
+    index_path, blob_path, json_path = icon_shard_paths(provider)
+    try:
+        if os.path.exists(index_path):
+            return BundleIconCatalog(index_path, blob_path)
+        return JsonIconCatalog(json_path)
+    except IconLoadingError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading {provider} icons from {ASSETS_PATH}: {e}")
+        raise IconLoadingError(
+            f"Failed to load {provider} icons from {ASSETS_PATH}"
+        ) from e
@@ -0,0 +1,21 @@
+from functools import lru_cache
+
+from redis import asyncio as aioredis
+
+from app.config.settings import settings
+
+
+@lru_cache(maxsize=1)
+def get_redis_client() -> aioredis.Redis:
+    """
+    Shared async Redis client. Connections are pooled by the client, so it is
+    created once per process instead of per request.
+    """
+    return aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        password=settings.REDIS_PASSWORD.get_secret_value(),
+        decode_responses=True,
+        socket_connect_timeout=3,
+        retry_on_timeout=True,
+    )
@@ -0,0 +1,37 @@
+"""
+JSON responses serialized with orjson.
+
+Returning an ``ORJSONResponse`` from an endpoint also skips FastAPI's
+``jsonable_encoder`` pass, which walks every value of a scene in Python before
+it is serialized. JSON that is already stored serialized (batch results, chat
+job results) is embedded as an ``orjson.Fragment`` and copied into the response
+without being decoded and encoded again.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    # Types orjson doesn't know (e.g. Firestore's sentinels or pydantic models)
+    # go through FastAPI's encoder, one value at a time.
+    return jsonable_encoder(value)
+
+
+def dumps_json(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def json_fragment(serialized: str | bytes) -> orjson.Fragment:
+    """Wraps already serialized JSON so it is embedded as-is when serializing."""
+    return orjson.Fragment(serialized)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
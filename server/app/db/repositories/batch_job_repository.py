@@ -0,0 +1,106 @@
+import time
+
+import orjson
+
+from app.config.settings import settings
+from app.core.redis import get_redis_client
+from app.core.responses import json_fragment
+
+FINISHED_JOB_STATUSES = ("completed", "failed")
+
+
+class BatchJobRepository:
+    """
+    Batch jobs live in Redis: a hash with the job's state and counters, and a
+    stream of per-diagram results in completion order. Stream entry ids double
+    as cursors for paging and for resuming an event stream. Both keys expire
+    ``BATCH_JOB_TTL_SECONDS`` after the last write.
+
+    Results are read back as ``orjson.Fragment``s: they are only ever sent on,
+    so they are embedded in responses as stored instead of being decoded.
+    """
+
+    def __init__(self):
+        self.redis = get_redis_client()
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"batch_job:{job_id}"
+
+    @staticmethod
+    def _results_key(job_id: str) -> str:
+        return f"batch_job:{job_id}:results"
+
+    async def create_job(self, job_id: str, user_id: str, total: int):
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self._job_key(job_id),
+                mapping={
+                    "user_id": user_id,
+                    "status": "queued",
+                    "total": total,
+                    "succeeded": 0,
+                    "failed": 0,
+                    "created_at": now,
+                    "updated_at": now,
+                },
+            )
+            pipe.expire(self._job_key(job_id), settings.BATCH_JOB_TTL_SECONDS)
+            await pipe.execute()
+
+    async def get_job(self, job_id: str, user_id: str | None = None) -> dict | None:
+        """Fetches a job if it exists and, when ``user_id`` is given, belongs to the user."""
+        data = await self.redis.hgetall(self._job_key(job_id))
+        if not data or (user_id is not None and data.get("user_id") != user_id):
+            return None
+        return {
+            "job_id": job_id,
+            "status": data["status"],
+            "total": int(data["total"]),
+            "succeeded": int(data["succeeded"]),
+            "failed": int(data["failed"]),
+            "created_at": float(data["created_at"]),
+            "updated_at": float(data["updated_at"]),
+        }
+
+    async def set_status(self, job_id: str, status: str):
+        await self.redis.hset(
+            self._job_key(job_id), mapping={"status": status, "updated_at": time.time()}
+        )
+
+    async def add_result(self, job_id: str, result: dict):
+        counter = "succeeded" if result["status"] == "succeeded" else "failed"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self._results_key(job_id), {"result": orjson.dumps(result)})
+            pipe.hincrby(self._job_key(job_id), counter, 1)
+            pipe.hset(self._job_key(job_id), "updated_at", time.time())
+            pipe.expire(self._results_key(job_id), settings.BATCH_JOB_TTL_SECONDS)
+            pipe.expire(self._job_key(job_id), settings.BATCH_JOB_TTL_SECONDS)
+            await pipe.execute()
+
+    async def get_results(
+        self, job_id: str, after: str | None = None, limit: int | None = 50
+    ) -> list[tuple[str, orjson.Fragment]]:
+        """Results in completion order, starting after the ``after`` cursor."""
+        entries = await self.redis.xrange(
+            self._results_key(job_id),
+            min=f"({after}" if after else "-",
+            count=limit,
+        )
+        return [
+            (entry_id, json_fragment(fields["result"])) for entry_id, fields in entries
+        ]
+
+    async def wait_for_results(
+        self, job_id: str, after: str, block_ms: int
+    ) -> list[tuple[str, orjson.Fragment]]:
+        """Like ``get_results``, but waits up to ``block_ms`` for new results."""
+        streams = await self.redis.xread(
+            {self._results_key(job_id): after}, block=block_ms
+        )
+        return [
+            (entry_id, json_fragment(fields["result"]))
+            for _, entries in streams
+            for entry_id, fields in entries
+        ]
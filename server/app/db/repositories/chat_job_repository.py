@@ -0,0 +1,227 @@
+import json
+import time
+
+import orjson
+from redis.exceptions import ResponseError
+
+from app.config.settings import settings
+from app.core.redis import get_redis_client
+from app.core.responses import json_fragment
+
+CHAT_JOB_QUEUE_KEY = "chat_jobs"
+CHAT_JOB_CONSUMER_GROUP = "chat_job_workers"
+FINISHED_CHAT_JOB_STATUSES = ("succeeded", "failed")
+
+
+class IdempotencyKeyConflictError(Exception):
+    """Raised when an idempotency key is reused for a different request."""
+
+    pass
+
+
+class ChatJobRepository:
+    """
+    Asynchronous chat jobs in Redis.
+
+    - ``chat_job:{id}`` is a hash with the request, the status and, once
+      finished, the result or error.
+    - ``chat_jobs`` is the queue: a stream read by the workers through a consumer
+      group, so a job taken by a worker that dies is handed to another one once
+      it has been idle for ``CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS``.
+    - ``chat_job:{id}:events`` gets an entry on every status change, which is
+      what event streams wait on.
+    - ``chat_job_idempotency:{user_id}:{key}`` maps a client's idempotency key
+      to the job it created.
+
+    Results and errors are read back as ``orjson.Fragment``s, embedded in
+    responses as stored instead of being decoded.
+    """
+
+    def __init__(self):
+        self.redis = get_redis_client()
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"chat_job:{job_id}"
+
+    @staticmethod
+    def _events_key(job_id: str) -> str:
+        return f"chat_job:{job_id}:events"
+
+    @staticmethod
+    def _idempotency_key(user_id: str, key: str) -> str:
+        return f"chat_job_idempotency:{user_id}:{key}"
+
+    async def create_job(
+        self,
+        job_id: str,
+        user_id: str,
+        request: dict,
+        fingerprint: str,
+        idempotency_key: str | None = None,
+    ) -> tuple[str, bool]:
+        """
+        Stores and enqueues a job. With an idempotency key that was already used,
+        nothing is enqueued and the id of the earlier job is returned instead.
+        Returns the job id and whether a job was created.
+        """
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self._job_key(job_id),
+                mapping={
+                    "user_id": user_id,
+                    "status": "queued",
+                    "request": json.dumps(request),
+                    "fingerprint": fingerprint,
+                    "attempts": 0,
+                    "created_at": now,
+                    "updated_at": now,
+                },
+            )
+            pipe.expire(self._job_key(job_id), settings.CHAT_JOB_TTL_SECONDS)
+            await pipe.execute()
+
+        # The job is stored before the key is claimed, so whoever finds the key
+        # taken can always read the earlier job.
+        if idempotency_key:
+            claimed = await self.redis.set(
+                self._idempotency_key(user_id, idempotency_key),
+                job_id,
+                nx=True,
+                ex=settings.CHAT_JOB_TTL_SECONDS,
+            )
+            if not claimed:
+                await self.redis.delete(self._job_key(job_id))
+                existing_job_id = await self.redis.get(
+                    self._idempotency_key(user_id, idempotency_key)
+                )
+                existing_fingerprint = await self.redis.hget(
+                    self._job_key(existing_job_id), "fingerprint"
+                )
+                if existing_fingerprint != fingerprint:
+                    raise IdempotencyKeyConflictError(idempotency_key)
+                return existing_job_id, False
+
+        await self.redis.xadd(CHAT_JOB_QUEUE_KEY, {"job_id": job_id})
+        return job_id, True
+
+    async def get_job(self, job_id: str, user_id: str | None = None) -> dict | None:
+        """Fetches a job if it exists and, when ``user_id`` is given, belongs to the user."""
+        data = await self.redis.hgetall(self._job_key(job_id))
+        if not data or (user_id is not None and data.get("user_id") != user_id):
+            return None
+        job = {
+            "job_id": job_id,
+            "status": data["status"],
+            "created_at": float(data["created_at"]),
+            "updated_at": float(data["updated_at"]),
+        }
+        if "result" in data:
+            job["result"] = json_fragment(data["result"])
+        if "error" in data:
+            job["error"] = json_fragment(data["error"])
+        return job
+
+    async def get_job_for_worker(self, job_id: str) -> dict | None:
+        """The owner, request, status and attempt count of a job."""
+        user_id, request, status, attempts = await self.redis.hmget(
+            self._job_key(job_id), ["user_id", "request", "status", "attempts"]
+        )
+        if user_id is None:
+            return None
+        return {
+            "user_id": user_id,
+            "request": json.loads(request),
+            "status": status,
+            "attempts": int(attempts),
+        }
+
+    async def _set_status(self, job_id: str, status: str, **fields):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self._job_key(job_id),
+                mapping={"status": status, "updated_at": time.time(), **fields},
+            )
+            pipe.xadd(self._events_key(job_id), {"status": status})
+            pipe.expire(self._events_key(job_id), settings.CHAT_JOB_TTL_SECONDS)
+            await pipe.execute()
+
+    async def mark_running(self, job_id: str):
+        await self.redis.hincrby(self._job_key(job_id), "attempts", 1)
+        await self._set_status(job_id, "running")
+
+    async def mark_succeeded(self, job_id: str, result: dict):
+        await self._set_status(job_id, "succeeded", result=orjson.dumps(result))
+
+    async def mark_failed(self, job_id: str, error: dict):
+        await self._set_status(job_id, "failed", error=json.dumps(error))
+
+    async def wait_for_status_change(
+        self, job_id: str, after: str, block_ms: int
+    ) -> str | None:
+        """Waits up to ``block_ms`` for a status change after the ``after`` cursor."""
+        streams = await self.redis.xread(
+            {self._events_key(job_id): after}, block=block_ms
+        )
+        entries = [entry for _, stream_entries in streams for entry in stream_entries]
+        return entries[-1][0] if entries else None
+
+    # --- Queue, used by the workers ---
+
+    async def ensure_consumer_group(self):
+        try:
+            await self.redis.xgroup_create(
+                CHAT_JOB_QUEUE_KEY, CHAT_JOB_CONSUMER_GROUP, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def claim_jobs(
+        self, consumer: str, count: int, block_ms: int
+    ) -> list[tuple[str, str]]:
+        """Takes up to ``count`` new jobs off the queue; returns (entry id, job id) pairs."""
+        streams = await self.redis.xreadgroup(
+            CHAT_JOB_CONSUMER_GROUP,
+            consumer,
+            {CHAT_JOB_QUEUE_KEY: ">"},
+            count=count,
+            block=block_ms,
+        )
+        return [
+            (entry_id, fields["job_id"])
+            for _, entries in streams
+            for entry_id, fields in entries
+        ]
+
+    async def reclaim_stale_jobs(self, consumer: str, count: int) -> list[tuple[str, str]]:
+        """Takes over jobs whose worker stopped renewing them."""
+        # Redis 6.2 answers [cursor, entries]; 7+ also lists deleted entry ids.
+        reply = await self.redis.xautoclaim(
+            CHAT_JOB_QUEUE_KEY,
+            CHAT_JOB_CONSUMER_GROUP,
+            consumer,
+            min_idle_time=settings.CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS * 1000,
+            start_id="0-0",
+            count=count,
+        )
+        return [(entry_id, fields["job_id"]) for entry_id, fields in reply[1] if fields]
+
+    async def renew_jobs(self, consumer: str, entry_ids: list[str]):
+        """Resets the idle time of jobs still being worked on."""
+        if entry_ids:
+            await self.redis.xclaim(
+                CHAT_JOB_QUEUE_KEY,
+                CHAT_JOB_CONSUMER_GROUP,
+                consumer,
+                min_idle_time=0,
+                message_ids=entry_ids,
+                justid=True,
+            )
+
+    async def acknowledge_job(self, entry_id: str):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(CHAT_JOB_QUEUE_KEY, CHAT_JOB_CONSUMER_GROUP, entry_id)
+            pipe.xdel(CHAT_JOB_QUEUE_KEY, entry_id)
+            await pipe.execute()
@@ -1,79 +1,91 @@
-from google.cloud import firestore
 import uuid
 
+from app.db.storage.chat_store import get_chat_store
+
 
 class LanggraphCheckpoints:
     def __init__(self, session_id: str = None, user_id: str = "anonymous"):
-        self.db = firestore.Client()
+        self.store = get_chat_store()
         self.user_id = user_id
         # If no session provided, generate a new one
         self.session_id = session_id if session_id else str(uuid.uuid4())
 
-        # References
-        self.session_ref = self.db.collection("chat_sessions").document(self.session_id)
-
     def exists(self) -> bool:
-        """Checks if the session document exists."""
-        return self.session_ref.get().exists
+        """Checks if the session exists."""
+        return self.store.session_exists(self.session_id)
 
     def initialize_session(self):
-        """Creates the session document if it doesn't exist."""
-        if not self.session_ref.get().exists:
-            self.session_ref.set(
-                {
-                    "user_id": self.user_id,
-                    "created_at": firestore.SERVER_TIMESTAMP,
-                    "updated_at": firestore.SERVER_TIMESTAMP,
-                    "checkpoint": None,
-                }
-            )
+        """Creates the session if it doesn't exist."""
+        self.store.create_session(self.session_id, self.user_id)
 
     def store_checkpoint(self, checkpoint_data: dict):
-        """Stores checkpoint data in the session document."""
-        self.session_ref.update({"checkpoint": checkpoint_data})
+        """Stores checkpoint data in the session."""
+        self.store.store_checkpoint(self.session_id, checkpoint_data)
 
     def add_message(self, role: str, content: str):
-        self.session_ref.update(
-            {
-                "checkpoint.messages": firestore.ArrayUnion(
-                    [{"role": role, "content": content}]
-                )
-            }
+        self.store.add_message(self.session_id, {"role": role, "content": content})
+
+    def get_session(self) -> dict | None:
+        """Retrieves the session: the checkpoint plus bookkeeping fields."""
+        return self.store.get_session(self.session_id)
+
+    def store_turn(self, checkpoint_data: dict, scene: str, mirrored_messages: int):
+        """
+        Stores the checkpoint and scene of a finished turn, and mirrors the
+        checkpoint's messages from index ``mirrored_messages`` on (those not
+        mirrored by an earlier turn) for paging.
+        """
+        self.store.store_turn(
+            self.session_id, self.user_id, checkpoint_data, scene, mirrored_messages
         )
 
     def get_checkpoint(self) -> dict | None:
-        """Retrieves checkpoint data from the session document."""
-        doc = self.session_ref.get()
-        if doc.exists:
-            data = doc.to_dict()
-            return data.get("checkpoint", None)
-        return None
+        """Retrieves checkpoint data from the session."""
+        session = self.store.get_session(self.session_id)
+        return session.get("checkpoint", None) if session else None
 
 
 class ChatRepository:
     def __init__(self):
-        self.db = firestore.Client()
-        self.collection = self.db.collection("chat_sessions")
+        self.store = get_chat_store()
 
     def get_user_chats(
         self, user_id: str, limit: int = 20, offset: int = 0
     ) -> list[dict]:
         """Fetches all chats for a given user with pagination."""
-        query = (
-            self.collection.where(filter=firestore.FieldFilter("user_id", "==", user_id))
-            .order_by("created_at", direction=firestore.Query.DESCENDING)
-            .limit(limit)
-            .offset(offset)
-        )
-        docs = query.stream()
-        return [{"id": doc.id, **doc.to_dict()} for doc in docs]
+        return self.store.list_user_sessions(user_id, limit, offset)
 
     def get_chat(self, thread_id: str, user_id: str) -> dict | None:
         """Fetches a specific chat by ID if it belongs to the user."""
-        doc_ref = self.collection.document(thread_id)
-        doc = doc_ref.get()
-        if doc.exists:
-            data = doc.to_dict()
-            if data.get("user_id") == user_id:
-                return {"id": doc.id, **data}
+        data = self.store.get_session(thread_id)
+        if data and data.get("user_id") == user_id:
+            return {"id": thread_id, **data}
         return None
+
+    def get_chat_fields(
+        self, thread_id: str, user_id: str, field_paths: list[str]
+    ) -> dict | None:
+        """Like ``get_chat``, but only transfers the given fields."""
+        data = self.store.get_session_fields(thread_id, ["user_id", *field_paths])
+        if data and data.get("user_id") == user_id:
+            return {"id": thread_id, **data}
+        return None
+
+    def get_scene(self, thread_id: str, user_id: str) -> dict | None:
+        """Fetches the stored latest scene of a chat if it belongs to the user."""
+        data = self.store.get_scene(thread_id)
+        if data and data.get("user_id") == user_id:
+            return data
+        return None
+
+    def store_scene(self, thread_id: str, user_id: str, scene: str):
+        self.store.store_scene(thread_id, user_id, scene)
+
+    def get_messages(
+        self, thread_id: str, before: int | None = None, limit: int = 50
+    ) -> list[dict]:
+        """
+        Up to ``limit`` mirrored messages preceding index ``before`` (the latest
+        ones without it), oldest first.
+        """
+        return self.store.get_messages(thread_id, before, limit)
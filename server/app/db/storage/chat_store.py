@@ -0,0 +1,88 @@
+"""
+Where chat sessions are stored. ``LanggraphCheckpoints`` and ``ChatRepository``
+work on a ``ChatStore`` chosen by ``CHAT_STORAGE_BACKEND``: Firestore, or an
+embedded SQLite database for single-node installs.
+
+A session is a dict with ``user_id``, ``created_at``, ``updated_at``,
+``checkpoint`` and, once a turn has mirrored its messages, ``message_count``.
+Ownership is checked by the repositories, not the stores.
+"""
+
+from functools import lru_cache
+from typing import Protocol
+
+from app.config.settings import settings
+
+
+class ChatStore(Protocol):
+    def session_exists(self, session_id: str) -> bool: ...
+
+    def create_session(self, session_id: str, user_id: str):
+        """Creates the session unless it exists."""
+        ...
+
+    def get_session(self, session_id: str) -> dict | None: ...
+
+    def get_session_fields(
+        self, session_id: str, field_paths: list[str]
+    ) -> dict | None:
+        """
+        Only the given fields of a session, nested like the session for dotted
+        paths (``checkpoint.structured_response``); missing fields are left out.
+        """
+        ...
+
+    def store_checkpoint(self, session_id: str, checkpoint: dict): ...
+
+    def add_message(self, session_id: str, message: dict):
+        """Appends ``message`` to the checkpoint's messages unless it is already there."""
+        ...
+
+    def store_turn(
+        self,
+        session_id: str,
+        user_id: str,
+        checkpoint: dict,
+        scene: str,
+        mirrored_messages: int,
+    ):
+        """
+        Stores the checkpoint and scene of a finished turn, and mirrors the
+        checkpoint's messages from index ``mirrored_messages`` on.
+        """
+        ...
+
+    def list_user_sessions(self, user_id: str, limit: int, offset: int) -> list[dict]:
+        """A user's sessions with their ``id``, newest first."""
+        ...
+
+    def get_scene(self, session_id: str) -> dict | None:
+        """``user_id``, ``scene`` and ``updated_at`` of the latest scene."""
+        ...
+
+    def store_scene(self, session_id: str, user_id: str, scene: str): ...
+
+    def get_messages(
+        self, session_id: str, before: int | None, limit: int
+    ) -> list[dict]:
+        """
+        Up to ``limit`` mirrored messages preceding index ``before`` (the latest
+        ones without it), oldest first.
+        """
+        ...
+
+
+@lru_cache(maxsize=1)
+def get_chat_store() -> ChatStore:
+    """The process-wide store; its clients and connections are shared."""
+    if settings.CHAT_STORAGE_BACKEND == "sqlite":
+        from app.db.storage.sqlite_chat_store import SqliteChatStore
+
+        return SqliteChatStore(
+            settings.SQLITE_DATABASE_PATH, pool_size=settings.SQLITE_POOL_SIZE
+        )
+
+    # Importing the Firestore client is slow, so only installs using it pay.
+    from app.db.storage.firestore_chat_store import FirestoreChatStore
+
+    return FirestoreChatStore()
@@ -0,0 +1,147 @@
+from functools import lru_cache
+
+from google.cloud import firestore
+
+
+@lru_cache(maxsize=1)
+def get_firestore_client() -> firestore.Client:
+    """
+    Creating a client resolves credentials and opens a new channel, so one client
+    is shared by every repository instead of paying that on each request.
+    """
+    return firestore.Client()
+
+
+# A batched write takes at most 500 operations; leaves room for the session and
+# scene writes that go with the last batch of messages.
+MAX_MESSAGES_PER_BATCH = 450
+
+
+def _scene_ref(session_ref):
+    """The latest scene of a session, kept apart so it can be read on its own."""
+    return session_ref.collection("scenes").document("latest")
+
+
+def _messages_ref(session_ref):
+    """One document per message, mirrored from the checkpoint for paging."""
+    return session_ref.collection("messages")
+
+
+class FirestoreChatStore:
+    """Sessions as ``chat_sessions`` documents, with scene and message subcollections."""
+
+    def __init__(self):
+        self.db = get_firestore_client()
+        self.collection = self.db.collection("chat_sessions")
+
+    def session_exists(self, session_id: str) -> bool:
+        return self.collection.document(session_id).get().exists
+
+    def create_session(self, session_id: str, user_id: str):
+        session_ref = self.collection.document(session_id)
+        if not session_ref.get().exists:
+            session_ref.set(
+                {
+                    "user_id": user_id,
+                    "created_at": firestore.SERVER_TIMESTAMP,
+                    "updated_at": firestore.SERVER_TIMESTAMP,
+                    "checkpoint": None,
+                }
+            )
+
+    def get_session(self, session_id: str) -> dict | None:
+        doc = self.collection.document(session_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def get_session_fields(
+        self, session_id: str, field_paths: list[str]
+    ) -> dict | None:
+        doc = self.collection.document(session_id).get(field_paths=field_paths)
+        return doc.to_dict() if doc.exists else None
+
+    def store_checkpoint(self, session_id: str, checkpoint: dict):
+        self.collection.document(session_id).update({"checkpoint": checkpoint})
+
+    def add_message(self, session_id: str, message: dict):
+        self.collection.document(session_id).update(
+            {"checkpoint.messages": firestore.ArrayUnion([message])}
+        )
+
+    def store_turn(
+        self,
+        session_id: str,
+        user_id: str,
+        checkpoint: dict,
+        scene: str,
+        mirrored_messages: int,
+    ):
+        session_ref = self.collection.document(session_id)
+        messages = checkpoint.get("messages") or []
+        messages_ref = _messages_ref(session_ref)
+        message_writes = [
+            (messages_ref.document(f"{index:08d}"), {"index": index, **message})
+            for index, message in enumerate(messages)
+            if index >= mirrored_messages
+        ]
+        chunks = [
+            message_writes[start : start + MAX_MESSAGES_PER_BATCH]
+            for start in range(0, len(message_writes), MAX_MESSAGES_PER_BATCH)
+        ] or [[]]
+
+        # The message count only moves with the last batch, so a turn that fails
+        # halfway is mirrored again by the next one.
+        for chunk in chunks[:-1]:
+            batch = self.db.batch()
+            for ref, data in chunk:
+                batch.set(ref, data)
+            batch.commit()
+
+        batch = self.db.batch()
+        for ref, data in chunks[-1]:
+            batch.set(ref, data)
+        batch.update(
+            session_ref,
+            {
+                "checkpoint": checkpoint,
+                "message_count": len(messages),
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        batch.set(
+            _scene_ref(session_ref),
+            {
+                "user_id": user_id,
+                "scene": scene,
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        batch.commit()
+
+    def list_user_sessions(self, user_id: str, limit: int, offset: int) -> list[dict]:
+        query = (
+            self.collection.where(filter=firestore.FieldFilter("user_id", "==", user_id))
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .limit(limit)
+            .offset(offset)
+        )
+        return [{"id": doc.id, **doc.to_dict()} for doc in query.stream()]
+
+    def get_scene(self, session_id: str) -> dict | None:
+        doc = _scene_ref(self.collection.document(session_id)).get()
+        return doc.to_dict() if doc.exists else None
+
+    def store_scene(self, session_id: str, user_id: str, scene: str):
+        _scene_ref(self.collection.document(session_id)).set(
+            {"user_id": user_id, "scene": scene, "updated_at": firestore.SERVER_TIMESTAMP}
+        )
+
+    def get_messages(
+        self, session_id: str, before: int | None, limit: int
+    ) -> list[dict]:
+        query = _messages_ref(self.collection.document(session_id)).order_by(
+            "index", direction=firestore.Query.DESCENDING
+        )
+        if before is not None:
+            query = query.where(filter=firestore.FieldFilter("index", "<", before))
+        docs = query.limit(limit).stream()
+        return [doc.to_dict() for doc in docs][::-1]
@@ -0,0 +1,309 @@
+"""
+Chat sessions in an embedded SQLite database, for single-node installs that
+don't need Firestore.
+
+The database runs in WAL mode with ``synchronous=NORMAL``: readers don't block
+the writer, and a commit appends to the log without waiting for an fsync, so
+writes take well under a millisecond. Checkpoints are kept as JSON text, which
+lets ``get_session_fields`` read parts of one with ``->`` (SQLite 3.38+)
+instead of loading the whole checkpoint.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator
+
+import orjson
+
+# How long a write waits for another connection's transaction to finish.
+BUSY_TIMEOUT_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    checkpoint TEXT,
+    message_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS chat_sessions_by_user
+    ON chat_sessions (user_id, created_at DESC);
+CREATE TABLE IF NOT EXISTS chat_scenes (
+    session_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    scene TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chat_messages (
+    session_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (session_id, idx)
+) WITHOUT ROWID;
+"""
+
+# Columns ``get_session_fields`` can read; a message count of NULL means the
+# session has no mirrored messages yet and is left out.
+_SESSION_FIELDS = {"user_id", "created_at", "updated_at", "checkpoint", "message_count"}
+
+
+def _dumps(value) -> str:
+    return orjson.dumps(value).decode()
+
+
+def _timestamp(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+def _session(row: sqlite3.Row) -> dict:
+    session = {
+        "user_id": row["user_id"],
+        "created_at": _timestamp(row["created_at"]),
+        "updated_at": _timestamp(row["updated_at"]),
+        "checkpoint": orjson.loads(row["checkpoint"]) if row["checkpoint"] else None,
+    }
+    if row["message_count"] is not None:
+        session["message_count"] = row["message_count"]
+    return session
+
+
+class SqliteConnectionPool:
+    """
+    Up to ``size`` connections, opened on first use and reused. SQLite
+    connections are cheap but not free to open (the schema is read and the
+    pragmas set each time), and one may only be used by a thread at a time.
+    """
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        # Autocommit, so transactions are only those ``transaction`` begins.
+        connection = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if not can_open:
+                connection = self._idle.get()
+            else:
+                try:
+                    connection = self._open()
+                except BaseException:
+                    # Frees the slot, or the pool would shrink for good.
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """A connection in a write transaction, committed unless the block raises."""
+        with self.connection() as connection:
+            # Takes the write lock up front rather than failing to upgrade a
+            # read lock halfway through.
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+
+class SqliteChatStore:
+    def __init__(self, path: str, pool_size: int = 8):
+        self.pool = SqliteConnectionPool(path, pool_size)
+        with self.pool.connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    def session_exists(self, session_id: str) -> bool:
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT 1 FROM chat_sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        return row is not None
+
+    def create_session(self, session_id: str, user_id: str):
+        now = time.time()
+        with self.pool.connection() as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO chat_sessions (id, user_id, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?)",
+                (session_id, user_id, now, now),
+            )
+
+    def get_session(self, session_id: str) -> dict | None:
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT * FROM chat_sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        return _session(row) if row else None
+
+    def get_session_fields(
+        self, session_id: str, field_paths: list[str]
+    ) -> dict | None:
+        columns, params, paths = [], [], []
+        for field_path in field_paths:
+            column, _, json_path = field_path.partition(".")
+            if column not in _SESSION_FIELDS or (json_path and column != "checkpoint"):
+                continue
+            if json_path:
+                columns.append("checkpoint -> ?")
+                params.append(f"$.{json_path}")
+            else:
+                columns.append(column)
+            paths.append(field_path)
+
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                f"SELECT {', '.join(['1', *columns])} FROM chat_sessions WHERE id = ?",
+                (*params, session_id),
+            ).fetchone()
+        if row is None:
+            return None
+
+        fields = {}
+        for field_path, value in zip(paths, tuple(row)[1:]):
+            if field_path in ("created_at", "updated_at"):
+                value = _timestamp(value)
+            elif field_path.startswith("checkpoint") and value is not None:
+                value = orjson.loads(value)
+            elif value is None and field_path != "checkpoint":
+                continue
+            *parents, key = field_path.split(".")
+            target = fields
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = value
+        return fields
+
+    def store_checkpoint(self, session_id: str, checkpoint: dict):
+        with self.pool.connection() as connection:
+            connection.execute(
+                "UPDATE chat_sessions SET checkpoint = ? WHERE id = ?",
+                (_dumps(checkpoint), session_id),
+            )
+
+    def add_message(self, session_id: str, message: dict):
+        # Appended in place, without reading the checkpoint back; an identical
+        # message is skipped, as Firestore's ArrayUnion does.
+        with self.pool.connection() as connection:
+            connection.execute(
+                """
+                UPDATE chat_sessions
+                SET checkpoint = json_set(
+                    coalesce(checkpoint, '{}'),
+                    '$.messages',
+                    json_insert(coalesce(checkpoint -> '$.messages', '[]'), '$[#]', json(?1))
+                )
+                WHERE id = ?2 AND NOT EXISTS (
+                    SELECT 1 FROM json_each(chat_sessions.checkpoint, '$.messages')
+                    WHERE value = json(?1)
+                )
+                """,
+                (_dumps(message), session_id),
+            )
+
+    def store_turn(
+        self,
+        session_id: str,
+        user_id: str,
+        checkpoint: dict,
+        scene: str,
+        mirrored_messages: int,
+    ):
+        messages = checkpoint.get("messages") or []
+        now = time.time()
+        # One transaction, so unlike Firestore there are no partial turns.
+        with self.pool.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO chat_messages (session_id, idx, message)"
+                " VALUES (?, ?, ?)",
+                [
+                    (session_id, index, _dumps(message))
+                    for index, message in enumerate(messages)
+                    if index >= mirrored_messages
+                ],
+            )
+            connection.execute(
+                "UPDATE chat_sessions SET checkpoint = ?, message_count = ?, updated_at = ?"
+                " WHERE id = ?",
+                (_dumps(checkpoint), len(messages), now, session_id),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO chat_scenes (session_id, user_id, scene, updated_at)"
+                " VALUES (?, ?, ?, ?)",
+                (session_id, user_id, scene, now),
+            )
+
+    def list_user_sessions(self, user_id: str, limit: int, offset: int) -> list[dict]:
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT * FROM chat_sessions WHERE user_id = ?"
+                " ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (user_id, limit, offset),
+            ).fetchall()
+        return [{"id": row["id"], **_session(row)} for row in rows]
+
+    def get_scene(self, session_id: str) -> dict | None:
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT user_id, scene, updated_at FROM chat_scenes WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "user_id": row["user_id"],
+            "scene": row["scene"],
+            "updated_at": _timestamp(row["updated_at"]),
+        }
+
+    def store_scene(self, session_id: str, user_id: str, scene: str):
+        with self.pool.connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO chat_scenes (session_id, user_id, scene, updated_at)"
+                " VALUES (?, ?, ?, ?)",
+                (session_id, user_id, scene, time.time()),
+            )
+
+    def get_messages(
+        self, session_id: str, before: int | None, limit: int
+    ) -> list[dict]:
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT idx, message FROM chat_messages"
+                " WHERE session_id = ? AND idx < ? ORDER BY idx DESC LIMIT ?",
+                (session_id, before if before is not None else 2**62, limit),
+            ).fetchall()
+        return [
+            {"index": row["idx"], **orjson.loads(row["message"])} for row in reversed(rows)
+        ]
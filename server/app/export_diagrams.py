@@ -0,0 +1,140 @@
+"""
+Bulk export of diagrams to SVG or PNG, headless.
+
+Each input is a JSON file holding an agent ``Graph`` (``nodes`` and ``edges``),
+the shape stored as ``structured_response`` in chat checkpoints. Layouts are
+requested from the rendering engine concurrently, a batch of graphs per call when
+``ELK_BATCH_SERVICE_ENDPOINT`` is set (``ELK_SERVICE_ENDPOINT`` otherwise), and
+scenes are rendered in a process pool, so hundreds of diagrams export in
+parallel without a browser. Run from the ``server`` directory:
+
+    python -m app.export_diagrams graphs/*.json --output-dir exports --format png
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.services.diagram_service import DiagramService
+from app.services.export_service import (
+    ExportBackendUnavailableError,
+    ExportService,
+    render_scene,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Graphs laid out per call to the rendering engine's batch route.
+LAYOUT_BATCH_SIZE = 16
+
+
+def _layout_input(export_service: ExportService, path: str) -> dict:
+    with open(path, "r") as f:
+        graph = json.load(f)
+    return export_service.prepare_layout_input(graph)
+
+
+def _layout_batch(
+    export_service: ExportService, paths: list[str]
+) -> list[dict | Exception]:
+    """Layouts of ``paths``, or the exception for each one that failed."""
+    results: dict[str, dict | Exception] = {}
+    elk_inputs = {}
+    for path in paths:
+        try:
+            elk_inputs[path] = _layout_input(export_service, path)
+        except Exception as e:
+            results[path] = e
+    if elk_inputs:
+        layouts = export_service.diagram_service.generate_elk_output_json_many(
+            list(elk_inputs.values())
+        )
+        results.update(zip(elk_inputs, layouts))
+    return [results[path] for path in paths]
+
+
+def export_diagrams(
+    paths: list[str], output_dir: str, export_format: str, scale: float, jobs: int
+) -> tuple[int, int]:
+    """Exports every graph in ``paths``; returns (exported, failed)."""
+    os.makedirs(output_dir, exist_ok=True)
+    export_service = ExportService(DiagramService())
+    exported = failed = 0
+
+    # Layout is I/O bound (calls to the rendering engine), rendering is CPU bound.
+    with ThreadPoolExecutor(max_workers=jobs) as layout_pool, ProcessPoolExecutor(
+        max_workers=jobs
+    ) as render_pool:
+        batches = [
+            paths[start : start + LAYOUT_BATCH_SIZE]
+            for start in range(0, len(paths), LAYOUT_BATCH_SIZE)
+        ]
+        layouts = [
+            (batch, layout_pool.submit(_layout_batch, export_service, batch))
+            for batch in batches
+        ]
+        renders = {}
+        for batch, layout in layouts:
+            try:
+                results = layout.result()
+            except Exception as e:
+                results = [e] * len(batch)
+            for path, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Layout of {path} failed: {result}")
+                    failed += 1
+                    continue
+                renders[path] = render_pool.submit(
+                    render_scene, result, export_format, scale
+                )
+
+        for path, render in renders.items():
+            try:
+                content = render.result()
+            except ExportBackendUnavailableError:
+                raise
+            except Exception as e:
+                logger.error(f"Rendering {path} failed: {e}")
+                failed += 1
+                continue
+            name = os.path.splitext(os.path.basename(path))[0]
+            with open(os.path.join(output_dir, f"{name}.{export_format}"), "wb") as f:
+                f.write(content)
+            exported += 1
+
+    return exported, failed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("graphs", nargs="+", help="Graph JSON files to export")
+    parser.add_argument("--output-dir", default="exports")
+    parser.add_argument("--format", choices=["svg", "png"], default="svg")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    start = time.perf_counter()
+    try:
+        exported, failed = export_diagrams(
+            args.graphs, args.output_dir, args.format, args.scale, args.jobs
+        )
+    except ExportBackendUnavailableError as e:
+        print(e, file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(
+        f"Exported {exported} diagram(s) to {args.output_dir} in {elapsed:.2f}s"
+        + (f", {failed} failed" if failed else "")
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
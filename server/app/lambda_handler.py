@@ -0,0 +1,14 @@
+"""
+Entry point for running the API on AWS Lambda behind API Gateway.
+
+Configure the function handler as ``app.lambda_handler.handler``. Importing
+``app.main`` only sets up FastAPI; the chat models, the agent, the icon catalog
+and the Langfuse client are created by the first request that needs them, which
+keeps the Lambda init phase short.
+"""
+
+from mangum import Mangum
+
+from app.main import app
+
+handler = Mangum(app, lifespan="auto")
@@ -3,13 +3,14 @@ from fastapi import FastAPI
 from app.api.v1 import router as v1_router
 from app.config.settings import settings
 from contextlib import asynccontextmanager
-from firebase_admin import initialize_app, delete_app
 from app.utils.auth import authentication_middleware
 from fastapi.middleware.cors import CORSMiddleware
-from langfuse import get_client
 import redis
 from fastapi import HTTPException
+from app.core.compression import CompressionMiddleware
 from app.core.rate_limit import limiter
+from app.core.responses import ORJSONResponse
+from app.services.batch_service import drain_running_jobs
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIASGIMiddleware
@@ -26,12 +27,18 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- STARTUP LOGIC ---
+    # Heavy clients (chat models, agent, icon catalog, Langfuse) are created on
+    # first use rather than here, to keep cold starts short.
+    from firebase_admin import initialize_app, delete_app
+
     firebase_app = initialize_app()
-    _ = get_client()
 
     yield  # The application runs here
 
     # --- SHUTDOWN LOGIC ---
+    # Requests have drained by now; batch jobs run outside of them.
+    await drain_running_jobs(timeout_seconds=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS)
+
     # Shutdown Firebase
     try:
         delete_app(firebase_app)
@@ -43,6 +50,7 @@ async def lifespan(app: FastAPI):
 app = FastAPI(
     root_path="/main_backend_service",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.state.limiter = limiter
@@ -68,6 +76,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+# Outermost, so it also compresses responses produced by the other middlewares.
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE_BYTES,
+        cache_max_entries=settings.COMPRESSION_CACHE_MAX_ENTRIES,
+    )
 app.include_router(v1_router)
 
 
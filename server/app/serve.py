@@ -0,0 +1,108 @@
+"""
+Production server: gunicorn managing uvicorn workers, one per CPU core by
+default. Run from the ``server`` directory:
+
+    python -m app.serve
+    python -m app.serve --workers 8 --port 8000
+
+- The app and its read-only state (icon catalogs, LangChain and the provider
+  packages) are loaded once in the master before it forks, then frozen out of
+  the garbage collector, so workers keep sharing those pages copy-on-write.
+- On SIGTERM workers stop accepting connections and finish in-flight requests
+  and batch jobs, for up to ``SERVER_GRACEFUL_TIMEOUT_SECONDS``.
+- A worker is replaced after ``SERVER_MAX_REQUESTS`` requests, with jitter so
+  workers don't all restart at once, to contain memory growth.
+
+Everything else in memory (caches, circuit breakers, running batch jobs) is per
+worker; state that must be shared lives in Redis or Firestore.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import sys
+
+from gunicorn.app.base import BaseApplication
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_count() -> int:
+    # Honours CPU affinity (e.g. taskset or cpusets), which os.cpu_count() ignores.
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def preload_shared_state(server=None):
+    """
+    Loads what every worker would otherwise load on its own, then freezes it so
+    collections in the workers don't write to (and so copy) those pages.
+
+    Only read-only state belongs here: no sockets, clients or threads, which
+    don't survive a fork.
+    """
+    from app.agents.elk_input_graph_generator_agent import agent  # noqa: F401
+    from app.agents.elk_input_graph_generator_agent.chat_models import (
+        import_chat_model_providers,
+    )
+    from app.services.icon_registry import get_icon_registry
+
+    import_chat_model_providers()
+    get_icon_registry().load_all()
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded shared state; {gc.get_freeze_count()} objects frozen")
+
+
+class ProductionServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+
+        return app
+
+
+def build_options(host: str, port: int, workers: int) -> dict:
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn_worker.UvicornWorker",
+        "preload_app": True,
+        "when_ready": preload_shared_state,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+        "loglevel": "debug" if settings.DEBUG else "info",
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS or default_worker_count(),
+    )
+    args = parser.parse_args()
+
+    ProductionServer(build_options(args.host, args.port, args.workers)).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Bulk diagram generation.
+
+A batch job runs many descriptions through the agent, layout and conversion
+stages in the background, and its results are stored in Redis as they complete
+(see ``BatchJobRepository``). Compared to one ``/chat`` call per diagram, a
+batch authenticates and is rate limited once, skips chat persistence, reuses
+one connection to the rendering engine and lays out finished graphs together.
+
+Agent runs, the expensive part, are capped per process across every batch job
+by ``BATCH_MAX_CONCURRENT_GENERATIONS``, so a large batch queues behind that cap
+instead of competing with interactive chats.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator
+from uuid import uuid4
+
+import httpx
+from fastapi import Depends, HTTPException
+
+from app.config.settings import settings
+from app.core.responses import dumps_json
+from app.db.repositories.batch_job_repository import (
+    FINISHED_JOB_STATUSES,
+    BatchJobRepository,
+)
+from app.services.diagram_service import DiagramService, get_diagram_service
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_TIMEOUT_SECONDS = 120.0
+# How long an event stream waits for a result before sending a keep-alive.
+EVENT_STREAM_BLOCK_MS = 15_000
+
+# Shared by every batch job in the process. Interactive chats don't take it.
+generation_slots = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENT_GENERATIONS)
+
+# Keeps running jobs referenced; the event loop only holds weak references to tasks.
+_running_jobs: set[asyncio.Task] = set()
+
+
+class _LayoutBatcher:
+    """
+    Collects the graphs of concurrent generations and lays them out together,
+    once ``max_graphs`` are waiting, no running generation could add another
+    one, or the oldest has waited ``max_wait_seconds``.
+    """
+
+    def __init__(
+        self,
+        diagram_service: DiagramService,
+        client: httpx.AsyncClient,
+        max_graphs: int,
+        max_wait_seconds: float,
+    ):
+        self.diagram_service = diagram_service
+        self.client = client
+        self.max_graphs = max_graphs
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._calls: set[asyncio.Task] = set()
+        self._generating = 0
+
+    def start_generation(self):
+        self._generating += 1
+
+    def abandon_generation(self):
+        """For a generation that failed before producing a graph."""
+        self._generating -= 1
+        if self._pending and self._generating == 0:
+            self._flush()
+
+    async def layout(self, elk_graph: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self._generating -= 1
+        self._pending.append((elk_graph, future))
+        if len(self._pending) >= self.max_graphs or self._generating == 0:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.max_wait_seconds, self._flush
+            )
+        return await future
+
+    def _flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            call = asyncio.create_task(self._layout_pending(pending))
+            self._calls.add(call)
+            call.add_done_callback(self._calls.discard)
+
+    async def _layout_pending(self, pending: list[tuple[dict, asyncio.Future]]):
+        try:
+            results = await self.diagram_service.agenerate_elk_output_json_many(
+                [elk_graph for elk_graph, _ in pending], self.client
+            )
+        except Exception as e:
+            results = [e] * len(pending)
+
+        for (_, future), result in zip(pending, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def _error_message(error: Exception) -> str:
+    return str(getattr(error, "detail", None) or error) or type(error).__name__
+
+
+class BatchService:
+    def __init__(self, diagram_service: DiagramService):
+        self.diagram_service = diagram_service
+        self.batch_job_repository = BatchJobRepository()
+
+    async def _generate_one(self, description: str, batcher: _LayoutBatcher) -> dict:
+        graph_state = {"messages": [{"role": "user", "content": description}]}
+        async with generation_slots:
+            batcher.start_generation()
+            try:
+                (
+                    elk_input,
+                    agent_response,
+                ) = await self.diagram_service.generate_elk_json_input_using_agent(
+                    graph_state
+                )
+            except BaseException:
+                batcher.abandon_generation()
+                raise
+        elk_output = await batcher.layout(elk_input)
+        return {
+            "excalidraw": self.diagram_service.convert_elk_json_to_excalidraw(
+                elk_output
+            ),
+            "graph": agent_response["structured_response"].model_dump(mode="json"),
+        }
+
+    async def generate_batch(self, descriptions: list[str]) -> AsyncIterator[dict]:
+        """
+        Generates a diagram per description and yields each result as soon as it
+        is done, in completion order. A failed diagram yields an error result
+        instead of failing the batch.
+        """
+        indexes: asyncio.Queue[int] = asyncio.Queue()
+        for index in range(len(descriptions)):
+            indexes.put_nowait(index)
+        results: asyncio.Queue[dict] = asyncio.Queue()
+
+        async with httpx.AsyncClient(timeout=LAYOUT_TIMEOUT_SECONDS) as client:
+            batcher = _LayoutBatcher(
+                self.diagram_service,
+                client,
+                max_graphs=settings.BATCH_LAYOUT_MAX_GRAPHS,
+                max_wait_seconds=settings.BATCH_LAYOUT_MAX_WAIT_SECONDS,
+            )
+
+            async def worker():
+                while not indexes.empty():
+                    index = indexes.get_nowait()
+                    try:
+                        result = await self._generate_one(descriptions[index], batcher)
+                        await results.put(
+                            {"index": index, "status": "succeeded", **result}
+                        )
+                    except Exception as e:
+                        logger.exception(f"Batch diagram {index} failed")
+                        await results.put(
+                            {"index": index, "status": "failed", "error": _error_message(e)}
+                        )
+
+            # A few workers per job rather than a task per diagram, so concurrent
+            # jobs take turns on the shared generation slots instead of queueing
+            # behind every diagram of the first job.
+            workers = [
+                asyncio.create_task(worker())
+                for _ in range(
+                    min(len(descriptions), settings.BATCH_MAX_CONCURRENT_GENERATIONS)
+                )
+            ]
+            try:
+                for _ in descriptions:
+                    yield await results.get()
+            finally:
+                for task in workers:
+                    task.cancel()
+
+    async def create_job(self, descriptions: list[str], user_id: str) -> dict:
+        job_id = str(uuid4())
+        await self.batch_job_repository.create_job(job_id, user_id, len(descriptions))
+
+        task = asyncio.create_task(self.run_job(job_id, descriptions))
+        _running_jobs.add(task)
+        task.add_done_callback(_running_jobs.discard)
+        return {"job_id": job_id, "status": "queued", "total": len(descriptions)}
+
+    async def run_job(self, job_id: str, descriptions: list[str]):
+        try:
+            await self.batch_job_repository.set_status(job_id, "running")
+            async for result in self.generate_batch(descriptions):
+                await self.batch_job_repository.add_result(job_id, result)
+            await self.batch_job_repository.set_status(job_id, "completed")
+        except Exception:
+            logger.exception(f"Batch job {job_id} failed")
+            await self.batch_job_repository.set_status(job_id, "failed")
+
+    async def get_job(self, job_id: str, user_id: str) -> dict:
+        job = await self.batch_job_repository.get_job(job_id, user_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Batch job not found")
+        return job
+
+    async def get_results(
+        self, job_id: str, user_id: str, after: str | None = None, limit: int = 50
+    ) -> dict:
+        job = await self.get_job(job_id, user_id)
+        entries = await self.batch_job_repository.get_results(job_id, after, limit)
+        return {
+            **job,
+            "results": [result for _, result in entries],
+            "next_cursor": entries[-1][0] if entries else after,
+        }
+
+    async def stream_results(self, job_id: str, after: str | None = None) -> AsyncIterator[str]:
+        """
+        Server-sent events: a ``result`` event per finished diagram, whose id can
+        be sent back as ``Last-Event-ID`` to resume, then a final ``done`` event
+        with the job's counters.
+        """
+        cursor = after or "0-0"
+        while True:
+            job = await self.batch_job_repository.get_job(job_id)
+            # Counters are updated together with the result stream, so once they
+            # add up every result is already readable.
+            finished = (
+                job is None
+                or job["status"] in FINISHED_JOB_STATUSES
+                or job["succeeded"] + job["failed"] >= job["total"]
+            )
+            if finished:
+                entries = await self.batch_job_repository.get_results(
+                    job_id, cursor, limit=None
+                )
+            else:
+                entries = await self.batch_job_repository.wait_for_results(
+                    job_id, cursor, EVENT_STREAM_BLOCK_MS
+                )
+
+            for entry_id, result in entries:
+                cursor = entry_id
+                yield f"id: {entry_id}\nevent: result\ndata: {dumps_json(result).decode()}\n\n"
+            if finished:
+                yield f"event: done\ndata: {dumps_json(job).decode()}\n\n"
+                return
+            if not entries:
+                yield ": keep-alive\n\n"
+
+
+async def drain_running_jobs(timeout_seconds: float):
+    """Waits for the batch jobs running in this process, e.g. before shutting down."""
+    if not _running_jobs:
+        return
+    logger.info(f"Waiting for {len(_running_jobs)} running batch job(s)")
+    _, pending = await asyncio.wait(set(_running_jobs), timeout=timeout_seconds)
+    if pending:
+        logger.warning(f"Shutting down with {len(pending)} unfinished batch job(s)")
+
+
+def get_batch_service(
+    diagram_service: DiagramService = Depends(get_diagram_service),
+) -> BatchService:
+    return BatchService(diagram_service)
@@ -0,0 +1,106 @@
+"""
+Asynchronous chat: the request is queued and ``ChatService.chat`` runs in a
+worker process (``python -m app.worker``), so API workers don't hold a
+connection open for the whole LLM, layout and persistence pipeline.
+"""
+
+import hashlib
+import json
+from typing import AsyncIterator
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.config.settings import settings
+from app.core.responses import dumps_json
+from app.db.repositories.chat_job_repository import (
+    FINISHED_CHAT_JOB_STATUSES,
+    ChatJobRepository,
+    IdempotencyKeyConflictError,
+)
+from app.services.layout_profiles import LayoutProfile
+
+# How long an event stream waits for a status change before sending a keep-alive.
+EVENT_STREAM_BLOCK_MS = 15_000
+
+
+def _request_fingerprint(request: dict) -> str:
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ChatJobService:
+    def __init__(self):
+        self.chat_job_repository = ChatJobRepository()
+
+    async def enqueue(
+        self,
+        user_message: str,
+        thread_id: str | None,
+        user_id: str,
+        layout_profile: LayoutProfile | None = None,
+        idempotency_key: str | None = None,
+    ) -> tuple[dict, bool]:
+        """
+        Queues a chat turn. Retrying with the same idempotency key returns the
+        job of the first attempt instead of generating again. Returns the job and
+        whether it was created by this call.
+        """
+        if not settings.CHAT_JOBS_ENABLED:
+            raise HTTPException(
+                status_code=503, detail="Asynchronous chat jobs are not enabled"
+            )
+
+        request = {"user_message": user_message, "thread_id": thread_id}
+        # Only when set, so earlier requests keep their fingerprints.
+        if layout_profile:
+            request["layout_profile"] = layout_profile
+        try:
+            job_id, created = await self.chat_job_repository.create_job(
+                job_id=str(uuid4()),
+                user_id=user_id,
+                request=request,
+                fingerprint=_request_fingerprint(request),
+                idempotency_key=idempotency_key,
+            )
+        except IdempotencyKeyConflictError:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        return await self.get_job(job_id, user_id), created
+
+    async def get_job(self, job_id: str, user_id: str) -> dict:
+        job = await self.chat_job_repository.get_job(job_id, user_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Chat job not found")
+        return job
+
+    async def stream_job(self, job_id: str) -> AsyncIterator[str]:
+        """
+        Server-sent events: the job as an event named after its status, sent
+        again on every change, ending with ``succeeded`` or ``failed``.
+        """
+        cursor = "0-0"
+        last_status = None
+        while True:
+            job = await self.chat_job_repository.get_job(job_id)
+            if job is None:
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: {last_status}\ndata: {dumps_json(job).decode()}\n\n"
+            if last_status in FINISHED_CHAT_JOB_STATUSES:
+                return
+
+            change = await self.chat_job_repository.wait_for_status_change(
+                job_id, cursor, EVENT_STREAM_BLOCK_MS
+            )
+            if change is None:
+                yield ": keep-alive\n\n"
+            else:
+                cursor = change
+
+
+def get_chat_job_service() -> ChatJobService:
+    return ChatJobService()
@@ -1,9 +1,18 @@
+import asyncio
+import logging
+from typing import AsyncIterator
 from uuid import uuid4
 from app.services.diagram_service import DiagramService, get_diagram_service
 from fastapi import Depends
 from app.db.repositories.chat_repository import LanggraphCheckpoints, ChatRepository
 from fastapi import HTTPException
 from app.utils.serialize_checkpoint import serialize_checkpoint
+from app.utils.serialize_scene import deserialize_scene, serialize_scene
+from app.core.responses import dumps_json
+from app.services.layout_profiles import LayoutProfile
+from app.services.level_of_detail import subtree_elk_graph
+
+logger = logging.getLogger(__name__)
 
 
 class ChatService:
@@ -12,8 +21,65 @@ class ChatService:
         self.chat_repository = ChatRepository()
 
     async def chat(
-        self, user_message: str, thread_id: str | None, user_id: str
+        self,
+        user_message: str,
+        thread_id: str | None,
+        user_id: str,
+        layout_profile: LayoutProfile | None = None,
     ) -> dict:
+        checkpoint, session = self._start_turn(user_message, thread_id, user_id)
+        (
+            excalidraw,
+            agent_response,
+        ) = await self.diagram_service.generate_excalidraw_from_description(
+            session.get("checkpoint"), layout_profile
+        )
+        self._finish_turn(checkpoint, session, excalidraw, agent_response)
+        return {"excalidraw": excalidraw, "thread_id": checkpoint.session_id}
+
+    def stream_chat(
+        self,
+        user_message: str,
+        thread_id: str | None,
+        user_id: str,
+        layout_profile: LayoutProfile | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        A chat turn as server-sent events: ``scene`` events with provisional
+        scenes while the model is writing the graph, then ``done`` with the same
+        body ``chat`` returns, or ``error``. An unknown thread raises right away,
+        before anything is streamed.
+        """
+        checkpoint, session = self._start_turn(user_message, thread_id, user_id)
+        return self._stream_turn(checkpoint, session, layout_profile)
+
+    async def _stream_turn(
+        self,
+        checkpoint: LanggraphCheckpoints,
+        session: dict,
+        layout_profile: LayoutProfile | None = None,
+    ) -> AsyncIterator[str]:
+        scenes = self.diagram_service.generate_excalidraw_progressively(
+            session.get("checkpoint"), layout_profile
+        )
+        try:
+            async for kind, payload in scenes:
+                if kind == "provisional":
+                    scene = {"excalidraw": payload}
+                    yield f"event: scene\ndata: {dumps_json(scene).decode()}\n\n"
+                    continue
+                excalidraw, agent_response = payload
+                self._finish_turn(checkpoint, session, excalidraw, agent_response)
+                result = {"excalidraw": excalidraw, "thread_id": checkpoint.session_id}
+                yield f"event: done\ndata: {dumps_json(result).decode()}\n\n"
+        except Exception:
+            logger.exception("Streamed chat turn failed")
+            error = {"detail": "Diagram generation failed"}
+            yield f"event: error\ndata: {dumps_json(error).decode()}\n\n"
+
+    def _start_turn(
+        self, user_message: str, thread_id: str | None, user_id: str
+    ) -> tuple[LanggraphCheckpoints, dict]:
         if thread_id:
             checkpoint = LanggraphCheckpoints(session_id=thread_id, user_id=user_id)
             if not checkpoint.exists():
@@ -25,15 +91,20 @@ class ChatService:
             checkpoint.initialize_session()
 
         checkpoint.add_message(role="user", content=user_message)
+        return checkpoint, checkpoint.get_session()
 
-        (
-            excalidraw,
-            agent_response,
-        ) = await self.diagram_service.generate_excalidraw_from_description(
-            checkpoint.get_checkpoint()
+    def _finish_turn(
+        self,
+        checkpoint: LanggraphCheckpoints,
+        session: dict,
+        excalidraw: dict,
+        agent_response: dict,
+    ):
+        checkpoint.store_turn(
+            serialize_checkpoint(agent_response),
+            serialize_scene(excalidraw),
+            mirrored_messages=session.get("message_count", 0),
         )
-        checkpoint.store_checkpoint(serialize_checkpoint(agent_response))
-        return {"excalidraw": excalidraw, "thread_id": checkpoint.session_id}
 
     async def get_user_chats(
         self, user_id: str, limit: int = 20, offset: int = 0
@@ -49,6 +120,111 @@ class ChatService:
         # But we assume storage is JSON compatible as per repository code.
         return chat_data
 
+    async def get_chat_scene(self, thread_id: str, user_id: str) -> dict:
+        """The latest scene of a chat, read without the rest of the thread."""
+        stored = self.chat_repository.get_scene(thread_id, user_id)
+        if stored is None:
+            stored = await self._store_scene_from_checkpoint(thread_id, user_id)
+        return {
+            "thread_id": thread_id,
+            "excalidraw": deserialize_scene(
+                stored["scene"], self.diagram_service.icon_registry
+            ),
+            "updated_at": stored["updated_at"],
+        }
+
+    async def _store_scene_from_checkpoint(self, thread_id: str, user_id: str) -> dict:
+        # Threads from before scenes were stored: lay out the last graph once
+        # and keep the scene for the next time.
+        chat_data = self.chat_repository.get_chat_fields(
+            thread_id, user_id, ["checkpoint.structured_response", "updated_at"]
+        )
+        if not chat_data:
+            raise HTTPException(status_code=404, detail="Chat thread not found")
+        graph = (chat_data.get("checkpoint") or {}).get("structured_response")
+        if not graph:
+            raise HTTPException(status_code=404, detail="Chat has no diagram yet")
+
+        elk_graph = self.diagram_service.collapse_for_display(
+            self.diagram_service.convert_agent_response_to_elk_json(graph)
+        )
+        scene = serialize_scene(await self._render_elk_graph(elk_graph))
+        self.chat_repository.store_scene(thread_id, user_id, scene)
+        return {"scene": scene, "updated_at": chat_data.get("updated_at")}
+
+    async def expand_chat_node(
+        self, thread_id: str, user_id: str, node_id: str
+    ) -> dict:
+        """
+        A scene of just ``node_id`` and what it contains, for expanding a node
+        the chat's scene shows collapsed. Large subtrees are collapsed again
+        the same way, a level further down.
+        """
+        chat_data = self.chat_repository.get_chat_fields(
+            thread_id, user_id, ["checkpoint.structured_response"]
+        )
+        if not chat_data:
+            raise HTTPException(status_code=404, detail="Chat thread not found")
+        graph = (chat_data.get("checkpoint") or {}).get("structured_response")
+        if not graph:
+            raise HTTPException(status_code=404, detail="Chat has no diagram yet")
+
+        subtree = subtree_elk_graph(
+            self.diagram_service.convert_agent_response_to_elk_json(graph), node_id
+        )
+        if subtree is None:
+            raise HTTPException(status_code=404, detail="Node not found")
+        elk_graph = self.diagram_service.collapse_for_display(subtree)
+        return {
+            "thread_id": thread_id,
+            "node_id": node_id,
+            "excalidraw": await self._render_elk_graph(elk_graph),
+        }
+
+    async def _render_elk_graph(self, elk_graph: dict) -> dict:
+        self.diagram_service.add_layout_options_to_elk_graph(elk_graph)
+        elk_output = await asyncio.to_thread(
+            self.diagram_service.generate_elk_output_json, elk_graph
+        )
+        return self.diagram_service.convert_elk_json_to_excalidraw(elk_output)
+
+    async def get_chat_messages(
+        self, thread_id: str, user_id: str, before: int | None = None, limit: int = 50
+    ) -> dict:
+        """
+        A page of a chat's message history, oldest first, ending with the latest
+        message unless ``before`` is given. ``next_before`` is the cursor for the
+        page of older messages, None once there are none.
+        """
+        chat_data = self.chat_repository.get_chat_fields(
+            thread_id, user_id, ["message_count"]
+        )
+        if not chat_data:
+            raise HTTPException(status_code=404, detail="Chat thread not found")
+
+        if "message_count" in chat_data:
+            messages = self.chat_repository.get_messages(thread_id, before, limit)
+        else:
+            # Not mirrored yet (no turn since messages were mirrored): page
+            # through the checkpoint instead.
+            chat_data = self.chat_repository.get_chat_fields(
+                thread_id, user_id, ["checkpoint.messages"]
+            )
+            all_messages = (chat_data.get("checkpoint") or {}).get("messages") or []
+            end = len(all_messages) if before is None else min(before, len(all_messages))
+            start = max(end - limit, 0)
+            messages = [
+                {"index": index, **message}
+                for index, message in enumerate(all_messages[start:end], start)
+            ]
+
+        first_index = messages[0]["index"] if messages else 0
+        return {
+            "thread_id": thread_id,
+            "messages": messages,
+            "next_before": first_index if first_index > 0 else None,
+        }
+
 
 def get_chat_service(
     diagram_service: DiagramService = Depends(get_diagram_service),
@@ -1,13 +1,118 @@
-from typing import Dict, List, Any, TypedDict
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Any, TypedDict
 from app.config.settings import settings
+from app.constants.diagrams import mermaid_to_excalidraw_shape_map
 from uuid import uuid4
 import httpx
-import json
-import os
-from app.agents.elk_input_graph_generator_agent.agent import (
-    agent as elk_input_graph_generator_agent,
+from app.agents.elk_input_graph_generator_agent.router import (
+    STRONG_ROUTE,
+    ModelRouter,
+    get_model_router,
+    last_user_message,
 )
-from langfuse.langchain import CallbackHandler
+from app.agents.elk_input_graph_generator_agent.icon_candidates import (
+    with_icon_candidates,
+    without_icon_candidates,
+)
+from app.agents.elk_input_graph_generator_agent.schemas import Graph as AgentGraph
+from app.services.graph_validation import (
+    VALIDATION_FEEDBACK_MESSAGE_ID_PREFIX,
+    GraphValidationReport,
+    validate_and_repair_graph,
+    without_validation_feedback,
+)
+from app.services.icon_registry import IconRegistry, get_icon_registry
+from app.services.layout_decomposition import plan_layout
+from app.services.level_of_detail import collapse_elk_graph
+from app.services.layout_profiles import (
+    LayoutProfile,
+    apply_layout_profile,
+    cheaper_layout_profile,
+    choose_layout_profile,
+)
+from app.services.edit_commands import apply_edit_command, parse_edit_command
+from app.utils.serialize_scene import icon_file_id
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Provisional layouts are skipped rather than waited for when this slow.
+PROVISIONAL_LAYOUT_TIMEOUT_SECONDS = 10.0
+
+# Layouts queue for the rendering engine's workers, which time out each layout
+# on their own.
+LAYOUT_REQUEST_TIMEOUT_SECONDS = 120.0
+
+# Layout calls made at once when graphs are laid out without the batch route.
+MAX_CONCURRENT_LAYOUT_CALLS = 8
+
+
+class LayoutError(Exception):
+    """Raised for a graph the rendering engine could not lay out."""
+
+    pass
+
+
+class LayoutTimeoutError(LayoutError):
+    """Raised for a layout that took longer than its budget."""
+
+    pass
+
+
+class AgentResponseError(Exception):
+    """Raised when the agent finishes without producing a graph."""
+
+    pass
+
+
+def _raise_layout_errors(layouts: list[dict | Exception]) -> list[dict]:
+    for layout in layouts:
+        if isinstance(layout, Exception):
+            raise layout
+    return layouts
+
+
+def _raise_for_layout_status(response: httpx.Response):
+    if response.status_code == 504:
+        try:
+            message = response.json().get("error")
+        except ValueError:
+            message = response.text
+        raise LayoutTimeoutError(message)
+    response.raise_for_status()
+
+
+def _layout_payload(key: str, value: Any, timeout_ms: int | None) -> dict:
+    payload = {key: value}
+    if timeout_ms is not None:
+        payload["timeoutMs"] = timeout_ms
+    return payload
+
+
+def _layout_budget_ms(elk_graph: dict) -> int | None:
+    # Without a cheaper profile to fall back to, the layout may take as long
+    # as the rendering engine allows.
+    if (
+        not settings.LAYOUT_TIME_BUDGET_SECONDS
+        or cheaper_layout_profile(elk_graph.get("layoutProfile")) is None
+    ):
+        return None
+    return int(settings.LAYOUT_TIME_BUDGET_SECONDS * 1000)
+
+
+def _with_cheaper_profile(elk_graph: dict) -> dict:
+    profile = cheaper_layout_profile(elk_graph.get("layoutProfile"))
+    logger.warning(
+        f"Layout with the '{elk_graph.get('layoutProfile')}' profile exceeded "
+        f"{settings.LAYOUT_TIME_BUDGET_SECONDS}s, retrying with '{profile}'"
+    )
+    direction = (elk_graph.get("layoutOptions") or {}).get("elk.direction", "RIGHT")
+    elk_graph = dict(elk_graph)
+    apply_layout_profile(elk_graph, profile, direction)
+    return elk_graph
 
 
 class DiagramType(TypedDict):
@@ -33,16 +138,20 @@ class Graph(TypedDict):
 
 
 class DiagramService:
-    def __init__(self):
-        base_path = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        )
-        icons_path = os.path.join(base_path, "app", "assets", "aws_icons.json")
-        try:
-            with open(icons_path, "r") as f:
-                self.aws_icons = {icon["id"]: icon for icon in json.load(f)}
-        except Exception:
-            self.aws_icons = {}
+    def __init__(self, model_router: ModelRouter | None = None):
+        # Icons, the agent and its chat models are loaded on first use
+        # and shared between instances, so creating a service per request is free.
+        self._model_router = model_router
+
+    @property
+    def icon_registry(self) -> IconRegistry:
+        return get_icon_registry()
+
+    @property
+    def model_router(self) -> ModelRouter:
+        if self._model_router is None:
+            self._model_router = get_model_router()
+        return self._model_router
 
     def _convert_elk_elements_to_excalidraw_elements(
         self,
@@ -67,7 +176,7 @@ class DiagramService:
                 "id": elk_element["id"],
                 "text": elk_element.get("text"),
                 "icon_id": elk_element.get("icon_id"),
-                "shape": "rectangle",
+                "shape": elk_element.get("shape"),
             }
             is_container = bool(elk_element.get("children", []))
             excalidraw_elements_in_current_step = (
@@ -75,6 +184,11 @@ class DiagramService:
                     node, x, y, height, width, files, is_container=is_container
                 )
             )
+            if elk_element.get("collapsed"):
+                # Tells the client the node can be expanded, and what it hides.
+                for element in excalidraw_elements_in_current_step:
+                    if element["id"] == elk_element["id"]:
+                        element["customData"] = {"collapsed": elk_element["collapsed"]}
             excalidraw_elements.extend(excalidraw_elements_in_current_step)
 
             child_elements = elk_element.get("children", [])
@@ -160,6 +274,9 @@ class DiagramService:
                 "endArrowhead": "arrow",
                 "elbowed": True,
             }
+            if edge.get("bundled"):
+                excalidraw_edge["strokeWidth"] = 4
+                excalidraw_edge["customData"] = {"bundled": edge["bundled"]}
 
             if edge.get("sources"):
                 source_id = edge["sources"][0]
@@ -298,7 +415,7 @@ class DiagramService:
         group_id = str(uuid4())
 
         # 1. Determine layout configuration
-        has_valid_icon = icon_id and icon_id in self.aws_icons
+        has_valid_icon = icon_id and icon_id in self.icon_registry
         should_render_rect = is_container or not has_valid_icon
         icon_size = 32 if is_container else 128
 
@@ -307,7 +424,10 @@ class DiagramService:
         if should_render_rect:
             shape = {
                 "id": node["id"],
-                "type": "rectangle",
+                # Containers are always drawn as rectangles.
+                "type": "rectangle"
+                if is_container
+                else mermaid_to_excalidraw_shape_map.get(node.get("shape"), "rectangle"),
                 "x": x,
                 "y": y,
                 "width": width,
@@ -336,12 +456,13 @@ class DiagramService:
 
         # 3. Render Icon if available
         if has_valid_icon:
-            icon_data = self.aws_icons[icon_id]
-            file_id = str(uuid4())
+            # One file per icon, however often it appears; the id also lets a
+            # stored scene drop the data URL and restore it from the registry.
+            file_id = icon_file_id(icon_id)
             # Excalidraw expects "dataURL" in files
             files[file_id] = {
                 "id": file_id,
-                "dataURL": icon_data["url"],
+                "dataURL": self.icon_registry.data_url(icon_id),
                 "mimeType": "image/svg+xml",
                 "created": 1768110275345,  # Dummy timestamp
                 "lastRetrieved": 1768110275345,
@@ -474,6 +595,7 @@ class DiagramService:
                 "id": node_data["id"],
                 "text": node_data.get("text"),
                 "icon_id": node_data.get("icon_id"),
+                "shape": node_data.get("shape"),
                 "children": [],
             }
 
@@ -492,32 +614,166 @@ class DiagramService:
 
         return {"id": "root", "children": root_nodes, "edges": edges}
 
-    async def generate_elk_json_input_using_agent(self, graph_state: dict) -> dict:
-        callback_handler = CallbackHandler()
-        agent_response = await elk_input_graph_generator_agent.ainvoke(
-            graph_state, config={"callbacks": [callback_handler]}
+    def collapse_for_display(self, elk_graph: dict) -> dict:
+        """
+        ``elk_graph`` with containers collapsed until it fits in
+        ``LOD_MAX_ELEMENTS``, for scenes sent to clients.
+        """
+        return collapse_elk_graph(
+            elk_graph, settings.LOD_MAX_ELEMENTS, settings.LOD_MAX_DEPTH
         )
-        graph_dict = agent_response["structured_response"].model_dump(mode="json")
 
-        elk_graph = self.convert_agent_response_to_elk_json(graph_dict)
-
-        base_layout_options = {
-            "elk.hierarchyHandling": "INCLUDE_CHILDREN",
-            "elk.algorithm": "elk.layered",
-            "nodePlacement.strategy": "BRANDES_KOEPF",
-            "elk.layered.mergeEdges": False,
-            "elk.direction": "RIGHT",
-            "spacing.baseValue": 80,
-            "elk.layered.crossingMinimization.forceNodeModelOrder": False,
-            "elk.layered.considerModelOrder.strategy": "NODES_AND_EDGES",
-            "elk.layered.unnecessaryBendpoints": True,
-            "elk.layered.wrapping.multiEdge.improveCuts": True,
-            "elk.layered.wrapping.multiEdge.improveWrappedEdges": True,
-            "elk.layered.edgeRouting.selfLoopDistribution": "EQUALLY",
-            "elk.layered.mergeHierarchyEdges": True,
+    async def generate_elk_json_input_using_agent(
+        self,
+        graph_state: dict,
+        on_message_chunk: Callable[[Any], None] | None = None,
+        layout_profile: LayoutProfile | None = None,
+    ) -> dict:
+        agent_response = self.try_fast_path_edit(graph_state)
+        if agent_response is not None:
+            graph_dict, _ = self.validate_agent_response(agent_response)
+        else:
+            agent_response, graph_dict = await self.run_agent(
+                self.add_icon_candidates(graph_state), on_message_chunk=on_message_chunk
+            )
+            # Imported here to keep LangChain out of the cold start.
+            from app.agents.elk_input_graph_generator_agent.graph_dsl import (
+                without_parse_feedback,
+            )
+
+            agent_response["messages"] = without_validation_feedback(
+                without_parse_feedback(
+                    without_icon_candidates(agent_response["messages"])
+                )
+            )
+
+        # Persist the repaired graph so follow-up turns start from it.
+        agent_response["structured_response"] = AgentGraph.model_validate(graph_dict)
+
+        elk_graph = self.collapse_for_display(
+            self.convert_agent_response_to_elk_json(graph_dict)
+        )
+        self.add_layout_options_to_elk_graph(elk_graph, profile=layout_profile)
+
+        return elk_graph, agent_response
+
+    def add_icon_candidates(self, graph_state: dict) -> dict:
+        """
+        Lists catalog icons for the services the user mentioned, so the agent
+        rarely needs an icon search round trip.
+        """
+        if not settings.ICON_CANDIDATES_ENABLED:
+            return graph_state
+        return with_icon_candidates(
+            graph_state, self.icon_registry, limit=settings.ICON_CANDIDATES_MAX
+        )
+
+    def try_fast_path_edit(self, graph_state: dict) -> dict | None:
+        """
+        Applies simple structural edits ("rename X to Y", "connect A to B", ...)
+        to the stored graph without running the agent. Returns the new agent state,
+        or None when the request has to go through the agent.
+        """
+        previous_graph = graph_state.get("structured_response")
+        if not previous_graph:
+            return None
+        command = parse_edit_command(last_user_message(graph_state))
+        if command is None:
+            return None
+        if not isinstance(previous_graph, dict):
+            previous_graph = previous_graph.model_dump(mode="json")
+
+        result = apply_edit_command(previous_graph, command)
+        if result is None:
+            return None
+        edited_graph, description = result
+        logger.info("Fast path applied '%s' edit without the agent", command.action)
+
+        # Imported here to keep LangChain out of the cold start.
+        from langchain_core.messages import AIMessage
+
+        return {
+            **graph_state,
+            "messages": [
+                *graph_state.get("messages", []),
+                AIMessage(content=description),
+            ],
+            "structured_response": AgentGraph.model_validate(edited_graph),
         }
 
-        elk_graph["layoutOptions"] = base_layout_options
+    async def run_agent(
+        self, graph_state: dict, on_message_chunk: Callable[[Any], None] | None = None
+    ) -> tuple[dict, dict]:
+        # Langfuse creates its client on first use; importing it here keeps it
+        # out of the cold start.
+        from langfuse.langchain import CallbackHandler
+
+        callback_handler = CallbackHandler()
+        config = {"callbacks": [callback_handler]}
+        validation = {}
+
+        def accept(response: dict) -> bool:
+            validation["result"] = self.validate_agent_response(response)
+            return not validation["result"][1].requires_feedback
+
+        async def invoke(
+            state: dict, **kwargs
+        ) -> tuple[dict, dict, GraphValidationReport]:
+            # Cleared so a graph validated on an earlier route or round is never
+            # taken for this call's.
+            validation.clear()
+            response = await self.model_router.ainvoke(
+                state,
+                config=config,
+                accept=accept,
+                on_message_chunk=on_message_chunk,
+                **kwargs,
+            )
+            if "structured_response" not in response:
+                raise AgentResponseError("The agent finished without producing a graph")
+            return response, *validation["result"]
+
+        agent_response, graph_dict, report = await invoke(graph_state)
+
+        # Only go back to the agent when the graph can't be repaired locally.
+        feedback_rounds = 0
+        while (
+            report.requires_feedback
+            and feedback_rounds < settings.GRAPH_VALIDATION_MAX_FEEDBACK_ROUNDS
+        ):
+            feedback_rounds += 1
+            # Recognizable by its id, so it is left out of the stored thread.
+            feedback = {
+                "id": f"{VALIDATION_FEEDBACK_MESSAGE_ID_PREFIX}{uuid4().hex}",
+                "role": "user",
+                "content": report.feedback_message(),
+            }
+            agent_response, graph_dict, report = await invoke(
+                {"messages": [*agent_response["messages"], feedback]},
+                start_route=STRONG_ROUTE,
+            )
+
+        return agent_response, graph_dict
+
+    def validate_agent_response(
+        self, agent_response: dict
+    ) -> tuple[dict, GraphValidationReport]:
+        graph_dict = agent_response["structured_response"].model_dump(mode="json")
+        return validate_and_repair_graph(graph_dict, self.icon_registry)
+
+    def add_layout_options_to_elk_graph(
+        self,
+        elk_graph: dict,
+        direction: str = "RIGHT",
+        profile: LayoutProfile | None = None,
+    ) -> dict:
+        """
+        Sizes and pads the nodes and sets the layout options of ``profile``,
+        chosen by the graph's size when not given.
+        """
+        apply_layout_profile(
+            elk_graph, profile or choose_layout_profile(elk_graph), direction
+        )
 
         def process_node(node: dict):
             # Check if leaf (no children or empty children list)
@@ -606,24 +862,343 @@ class DiagramService:
         for node in elk_graph.get("children", []):
             process_node(node)
 
-        return elk_graph, agent_response
+        return elk_graph
 
     def generate_elk_output_json(self, elk_graph: dict) -> dict:
-        with httpx.Client() as client:
+        """
+        Lays out ``elk_graph``. A large graph that comes apart into unconnected
+        parts has them laid out concurrently and packed together. A layout over
+        ``LAYOUT_TIME_BUDGET_SECONDS`` is retried with the next cheaper profile.
+        """
+        while True:
+            try:
+                return self._layout_elk_graph(elk_graph, _layout_budget_ms(elk_graph))
+            except LayoutTimeoutError:
+                if _layout_budget_ms(elk_graph) is None:
+                    raise
+                elk_graph = _with_cheaper_profile(elk_graph)
+
+    async def agenerate_elk_output_json(
+        self, elk_graph: dict, client: httpx.AsyncClient
+    ) -> dict:
+        while True:
+            try:
+                return await self._alayout_elk_graph(
+                    elk_graph, client, _layout_budget_ms(elk_graph)
+                )
+            except LayoutTimeoutError:
+                if _layout_budget_ms(elk_graph) is None:
+                    raise
+                elk_graph = _with_cheaper_profile(elk_graph)
+
+    async def agenerate_elk_output_json_many(
+        self, elk_graphs: list[dict], client: httpx.AsyncClient
+    ) -> list[dict | Exception]:
+        """
+        Lays out several graphs like ``agenerate_elk_output_json`` does one: each
+        gets the layout time budget and is retried with a cheaper profile when
+        it runs over, and one that comes apart is laid out in parts. The others
+        share calls to the batch route. Each entry is the laid-out graph, or
+        the exception for a graph that failed.
+        """
+        results: list[dict | Exception | None] = [None] * len(elk_graphs)
+        decomposed, pending = [], {}
+        for index, elk_graph in enumerate(elk_graphs):
+            plan = plan_layout(elk_graph, settings.LAYOUT_DECOMPOSITION_MIN_NODES)
+            if plan is not None:
+                decomposed.append(index)
+            else:
+                pending[index] = elk_graph
+
+        async def layout_decomposed():
+            layouts = await asyncio.gather(
+                *(
+                    self.agenerate_elk_output_json(elk_graphs[index], client)
+                    for index in decomposed
+                ),
+                return_exceptions=True,
+            )
+            for index, layout in zip(decomposed, layouts):
+                results[index] = layout
+
+        async def layout_batch(indices: list[int], timeout_ms: int | None) -> dict:
+            try:
+                layouts = await self.agenerate_elk_output_json_batch(
+                    [pending[index] for index in indices], client, timeout_ms
+                )
+            except Exception as e:
+                layouts = [e] * len(indices)
+            retries = {}
+            for index, layout in zip(indices, layouts):
+                if isinstance(layout, LayoutTimeoutError) and timeout_ms is not None:
+                    retries[index] = _with_cheaper_profile(pending[index])
+                else:
+                    results[index] = layout
+            return retries
+
+        decomposed_layouts = asyncio.ensure_future(layout_decomposed())
+        try:
+            # One batch call per budget, since a call has a single ``timeoutMs``.
+            while pending:
+                by_budget: dict[int | None, list[int]] = {}
+                for index, elk_graph in pending.items():
+                    by_budget.setdefault(_layout_budget_ms(elk_graph), []).append(index)
+                retries = await asyncio.gather(
+                    *(
+                        layout_batch(indices, timeout_ms)
+                        for timeout_ms, indices in by_budget.items()
+                    )
+                )
+                pending = {
+                    index: elk_graph
+                    for batch_retries in retries
+                    for index, elk_graph in batch_retries.items()
+                }
+        finally:
+            await decomposed_layouts
+        return results
+
+    def generate_elk_output_json_many(
+        self, elk_graphs: list[dict]
+    ) -> list[dict | Exception]:
+        """Blocking ``agenerate_elk_output_json_many``."""
+
+        async def layout() -> list[dict | Exception]:
+            async with httpx.AsyncClient(
+                timeout=LAYOUT_REQUEST_TIMEOUT_SECONDS
+            ) as client:
+                return await self.agenerate_elk_output_json_many(elk_graphs, client)
+
+        return asyncio.run(layout())
+
+    def _layout_elk_graph(self, elk_graph: dict, timeout_ms: int | None) -> dict:
+        plan = plan_layout(elk_graph, settings.LAYOUT_DECOMPOSITION_MIN_NODES)
+        if plan is None:
+            return self._post_elk_graph(elk_graph, timeout_ms=timeout_ms)
+        layouts = self.generate_elk_output_json_batch(plan.graphs, timeout_ms)
+        return plan.assemble(_raise_layout_errors(layouts))
+
+    async def _alayout_elk_graph(
+        self, elk_graph: dict, client: httpx.AsyncClient, timeout_ms: int | None
+    ) -> dict:
+        plan = plan_layout(elk_graph, settings.LAYOUT_DECOMPOSITION_MIN_NODES)
+        if plan is None:
+            return await self._apost_elk_graph(elk_graph, client, timeout_ms)
+        layouts = await self.agenerate_elk_output_json_batch(
+            plan.graphs, client, timeout_ms
+        )
+        return plan.assemble(_raise_layout_errors(layouts))
+
+    def _post_elk_graph(
+        self,
+        elk_graph: dict,
+        client: httpx.Client | None = None,
+        timeout_ms: int | None = None,
+    ) -> dict:
+        if client is None:
+            with httpx.Client(timeout=LAYOUT_REQUEST_TIMEOUT_SECONDS) as client:
+                return self._post_elk_graph(elk_graph, client, timeout_ms)
+        response = client.post(
+            settings.ELK_SERVICE_ENDPOINT,
+            json=_layout_payload("jsonGraph", elk_graph, timeout_ms),
+        )
+        _raise_for_layout_status(response)
+        return response.json()
+
+    async def _apost_elk_graph(
+        self,
+        elk_graph: dict,
+        client: httpx.AsyncClient,
+        timeout_ms: int | None = None,
+    ) -> dict:
+        response = await client.post(
+            settings.ELK_SERVICE_ENDPOINT,
+            json=_layout_payload("jsonGraph", elk_graph, timeout_ms),
+        )
+        _raise_for_layout_status(response)
+        return response.json()
+
+    async def agenerate_elk_output_json_batch(
+        self,
+        elk_graphs: list[dict],
+        client: httpx.AsyncClient,
+        timeout_ms: int | None = None,
+    ) -> list[dict | Exception]:
+        """
+        Lays out several graphs with one call to the rendering engine's batch
+        route. Each entry is the laid-out graph, or the exception for a graph
+        that failed, so one bad graph doesn't fail the others.
+        """
+        if not settings.ELK_BATCH_SERVICE_ENDPOINT:
+            return await asyncio.gather(
+                *(
+                    self._apost_elk_graph(elk_graph, client, timeout_ms)
+                    for elk_graph in elk_graphs
+                ),
+                return_exceptions=True,
+            )
+
+        response = await client.post(
+            settings.ELK_BATCH_SERVICE_ENDPOINT,
+            json=_layout_payload("jsonGraphs", elk_graphs, timeout_ms),
+        )
+        response.raise_for_status()
+        return self._batch_results(response.json())
+
+    def generate_elk_output_json_batch(
+        self, elk_graphs: list[dict], timeout_ms: int | None = None
+    ) -> list[dict | Exception]:
+        """Blocking ``agenerate_elk_output_json_batch``."""
+        if not settings.ELK_BATCH_SERVICE_ENDPOINT:
+            # Clients are slow to create; one is shared by the threads.
+            with httpx.Client(
+                timeout=LAYOUT_REQUEST_TIMEOUT_SECONDS
+            ) as client, ThreadPoolExecutor(
+                max_workers=MAX_CONCURRENT_LAYOUT_CALLS
+            ) as pool:
+                layouts = [
+                    pool.submit(self._post_elk_graph, elk_graph, client, timeout_ms)
+                    for elk_graph in elk_graphs
+                ]
+            return [layout.exception() or layout.result() for layout in layouts]
+
+        with httpx.Client(timeout=LAYOUT_REQUEST_TIMEOUT_SECONDS) as client:
             response = client.post(
-                settings.ELK_SERVICE_ENDPOINT, json={"jsonGraph": elk_graph}
+                settings.ELK_BATCH_SERVICE_ENDPOINT,
+                json=_layout_payload("jsonGraphs", elk_graphs, timeout_ms),
             )
             response.raise_for_status()
-            return response.json()
+            return self._batch_results(response.json())
+
+    @staticmethod
+    def _batch_results(body: dict) -> list[dict | Exception]:
+        results = []
+        for result in body["results"]:
+            if "graph" in result:
+                results.append(result["graph"])
+            elif result.get("status") == 504:
+                results.append(LayoutTimeoutError(result.get("error")))
+            else:
+                results.append(LayoutError(result.get("error")))
+        return results
 
-    async def generate_excalidraw_from_description(self, graph_state: dict) -> dict:
+    async def generate_excalidraw_from_description(
+        self, graph_state: dict, layout_profile: LayoutProfile | None = None
+    ) -> dict:
         elk_input_graph, graph_state = await self.generate_elk_json_input_using_agent(
-            graph_state
+            graph_state, layout_profile=layout_profile
+        )
+        # Layout blocks on the rendering engine, so it runs off the event loop.
+        elk_output_graph = await asyncio.to_thread(
+            self.generate_elk_output_json, elk_input_graph
         )
-        elk_output_graph = self.generate_elk_output_json(elk_input_graph)
         excalidraw_json = self.convert_elk_json_to_excalidraw(elk_output_graph)
         return excalidraw_json, graph_state
 
+    async def generate_excalidraw_progressively(
+        self, graph_state: dict, layout_profile: LayoutProfile | None = None
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Like ``generate_excalidraw_from_description``, but yields
+        ``("provisional", excalidraw)`` for the part of the graph the model has
+        streamed so far while it is still writing, then
+        ``("final", (excalidraw, graph_state))``.
+
+        Provisional scenes are laid out at most every
+        ``PROGRESSIVE_RENDER_INTERVAL_SECONDS``, and only when the graph grew;
+        the model keeps streaming meanwhile.
+        """
+        # Imported here to keep LangChain out of the cold start.
+        from app.agents.elk_input_graph_generator_agent.partial_graph import (
+            PartialGraphParser,
+        )
+
+        parser = PartialGraphParser(dsl=settings.AGENT_RESPONSE_FORMAT == "dsl")
+        grew = asyncio.Event()
+
+        def on_message_chunk(chunk):
+            if parser.feed(chunk):
+                grew.set()
+
+        generation = asyncio.create_task(
+            self.generate_elk_json_input_using_agent(
+                graph_state,
+                on_message_chunk=on_message_chunk,
+                layout_profile=layout_profile,
+            )
+        )
+        try:
+            async with httpx.AsyncClient(
+                timeout=PROVISIONAL_LAYOUT_TIMEOUT_SECONDS
+            ) as client:
+                while True:
+                    growth = asyncio.ensure_future(grew.wait())
+                    await asyncio.wait(
+                        {generation, growth}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    growth.cancel()
+                    if generation.done():
+                        break
+                    grew.clear()
+                    rendered_at = time.monotonic()
+                    excalidraw = await self.render_provisional_graph(
+                        parser.graph(), client, layout_profile
+                    )
+                    if excalidraw is not None:
+                        yield "provisional", excalidraw
+                    # Throttle, but stop waiting as soon as the answer is complete.
+                    await asyncio.wait(
+                        {generation},
+                        timeout=settings.PROGRESSIVE_RENDER_INTERVAL_SECONDS
+                        - (time.monotonic() - rendered_at),
+                    )
+                    if generation.done():
+                        break
+        finally:
+            if not generation.done():
+                generation.cancel()
+
+        elk_input_graph, graph_state = await generation
+        elk_output_graph = await asyncio.to_thread(
+            self.generate_elk_output_json, elk_input_graph
+        )
+        yield "final", (self.convert_elk_json_to_excalidraw(elk_output_graph), graph_state)
+
+    async def render_provisional_graph(
+        self,
+        graph: dict,
+        client: httpx.AsyncClient,
+        layout_profile: LayoutProfile | None = None,
+    ) -> dict | None:
+        """Lays out and converts a partial graph; None if it can't be drawn yet."""
+        if not graph["nodes"]:
+            return None
+        # Converted in a thread: renders repeat while the model streams, and the
+        # event loop also has to keep reading the stream.
+        elk_graph = await asyncio.to_thread(
+            self._provisional_elk_graph, graph, layout_profile
+        )
+        try:
+            elk_output_graph = await self.agenerate_elk_output_json(elk_graph, client)
+        except (httpx.HTTPError, LayoutError) as e:
+            logger.warning("Provisional layout failed: %r", e)
+            return None
+        return await asyncio.to_thread(
+            self.convert_elk_json_to_excalidraw, elk_output_graph
+        )
+
+    def _provisional_elk_graph(
+        self, graph: dict, layout_profile: LayoutProfile | None = None
+    ) -> dict:
+        # Repairs what a cut-off graph lacks: edges to nodes not streamed yet,
+        # children listed before they are declared, unknown icons.
+        graph_dict, _ = validate_and_repair_graph(graph, self.icon_registry)
+        elk_graph = self.collapse_for_display(
+            self.convert_agent_response_to_elk_json(graph_dict)
+        )
+        self.add_layout_options_to_elk_graph(elk_graph, profile=layout_profile)
+        return elk_graph
+
 
 def get_diagram_service() -> DiagramService:
     return DiagramService()
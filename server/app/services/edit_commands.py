@@ -0,0 +1,261 @@
+"""
+Deterministic fast path for simple structural edits.
+
+Follow-ups such as "rename X to Y", "delete the Redis node" or "connect Lambda to
+SQS" are parsed with a small grammar and applied directly to the stored graph, so
+they skip the agent entirely. Anything that doesn't parse, or whose node names
+don't resolve to exactly one node, returns ``None`` and goes to the agent, as
+do compound instructions ("rename X to Y and add Z").
+"""
+
+import copy
+import re
+from dataclasses import dataclass
+
+RENAME = "rename"
+DELETE = "delete"
+CONNECT = "connect"
+DISCONNECT = "disconnect"
+MOVE = "move"
+
+_EDGE_WORDS = r"(?:an?\s+|the\s+)?(?:edge|connection|arrow|link)"
+
+# Checked in order; the first match wins.
+_COMMAND_PATTERNS = [
+    (action, re.compile(pattern, re.IGNORECASE))
+    for action, pattern in [
+        (DISCONNECT, r"^disconnect\s+(?P<subject>.+?)\s+(?:from|and)\s+(?P<target>.+)$"),
+        (
+            DISCONNECT,
+            rf"^(?:remove|delete|drop)\s+{_EDGE_WORDS}\s+(?:from|between)\s+"
+            r"(?P<subject>.+?)\s+(?:to|and)\s+(?P<target>.+)$",
+        ),
+        (
+            CONNECT,
+            rf"^(?:add|draw|create)\s+{_EDGE_WORDS}\s+from\s+"
+            r"(?P<subject>.+?)\s+to\s+(?P<target>.+)$",
+        ),
+        (CONNECT, r"^(?:connect|link)\s+(?P<subject>.+?)\s+(?:to|with|and)\s+(?P<target>.+)$"),
+        (CONNECT, r"^(?:connect\s+)?(?P<subject>[^>]+?)\s*-+>\s*(?P<target>[^>]+)$"),
+        (RENAME, r"^(?:rename|relabel)\s+(?P<subject>.+?)\s+(?:to|as)\s+(?P<target>.+)$"),
+        (
+            MOVE,
+            r"^(?:move|put|place)\s+(?P<subject>.+?)\s+(?:into|inside|in|under)\s+"
+            r"(?P<target>.+)$",
+        ),
+        (DELETE, r"^(?:delete|remove|drop)\s+(?P<subject>.+)$"),
+    ]
+]
+
+# A name containing one of these is really several instructions.
+_CLAUSE_JOINER_PATTERN = re.compile(r",|\s(?:and|then|but)\s", re.IGNORECASE)
+
+_POLITE_PREFIX_PATTERN = re.compile(r"^(?:please|can you|could you)\s+", re.IGNORECASE)
+_ARTICLE_PATTERN = re.compile(r"^(?:the|a|an)\s+", re.IGNORECASE)
+_NODE_NOUN_PATTERN = re.compile(
+    r"\s+(?:node|service|box|component|container|group|icon)$", re.IGNORECASE
+)
+
+
+@dataclass
+class EditCommand:
+    action: str
+    subject: str
+    target: str | None = None
+
+
+def _clean_name(name: str) -> str:
+    name = name.strip().strip("\"'`").strip()
+    name = _ARTICLE_PATTERN.sub("", name)
+    name = _NODE_NOUN_PATTERN.sub("", name)
+    return name.strip().strip("\"'`").strip()
+
+
+def parse_edit_command(message: str) -> EditCommand | None:
+    """Parses a single-line edit command, or returns None if it isn't one."""
+    text = message.strip()
+    if not text or "\n" in text:
+        return None
+    text = _POLITE_PREFIX_PATTERN.sub("", text).rstrip(".!? ").strip()
+    text = re.sub(r"\s+please$", "", text, flags=re.IGNORECASE)
+
+    for action, pattern in _COMMAND_PATTERNS:
+        match = pattern.match(text)
+        if not match:
+            continue
+        # "disconnect X and Y" uses "and" as its separator, so only the names
+        # matched on either side of it are checked.
+        if any(
+            _CLAUSE_JOINER_PATTERN.search(name)
+            for name in match.groupdict().values()
+            if name
+        ):
+            return None
+        subject = _clean_name(match.group("subject"))
+        target = match.groupdict().get("target")
+        if action == RENAME:
+            # Keep the new label as typed, only dropping surrounding quotes.
+            target = target.strip().strip("\"'`").strip() if target else None
+        elif target is not None:
+            target = _clean_name(target)
+        if not subject or (target is not None and not target):
+            return None
+        return EditCommand(action, subject, target)
+    return None
+
+
+def _resolve_node_id(
+    nodes: list[dict], name: str, partial_containers: bool = True
+) -> str | None:
+    """
+    Resolves a user-facing name to exactly one node id, or None. Without
+    ``partial_containers``, a container must be named by its id or full label.
+    """
+    key = name.casefold()
+
+    for node in nodes:
+        if node["id"].casefold() == key:
+            return node["id"]
+
+    exact = [node["id"] for node in nodes if (node.get("text") or "").casefold() == key]
+    if len(exact) == 1:
+        return exact[0]
+    if exact:
+        return None
+
+    word_pattern = re.compile(rf"\b{re.escape(key)}\b")
+    partial = [
+        node
+        for node in nodes
+        if word_pattern.search((node.get("text") or "").casefold())
+        or word_pattern.search(node["id"].casefold().replace("_", " "))
+    ]
+    if len(partial) != 1:
+        return None
+    if not partial_containers and partial[0].get("children_ids"):
+        return None
+    return partial[0]["id"]
+
+
+def _display_name(nodes_by_id: dict, node_id: str) -> str:
+    return nodes_by_id[node_id].get("text") or node_id
+
+
+def apply_edit_command(graph: dict, command: EditCommand) -> tuple[dict, str] | None:
+    """
+    Applies ``command`` to a copy of ``graph`` (a ``Graph`` dict).
+
+    Returns the edited graph and a short description of the change, or None if
+    the command can't be applied unambiguously.
+    """
+    graph = copy.deepcopy(graph)
+    nodes = graph.setdefault("nodes", [])
+    edges = graph.setdefault("edges", [])
+    nodes_by_id = {node["id"]: node for node in nodes}
+
+    # Deleting a container takes everything inside it, so "delete VPC" must
+    # not remove a container that merely has the word in its label.
+    subject_id = _resolve_node_id(
+        nodes, command.subject, partial_containers=command.action != DELETE
+    )
+    if subject_id is None:
+        return None
+
+    if command.action == RENAME:
+        old_name = _display_name(nodes_by_id, subject_id)
+        nodes_by_id[subject_id]["text"] = command.target
+        return graph, f"Renamed '{old_name}' to '{command.target}'."
+
+    if command.action == DELETE:
+        # A container is deleted together with everything inside it.
+        removed = set()
+        stack = [subject_id]
+        while stack:
+            node_id = stack.pop()
+            if node_id in removed or node_id not in nodes_by_id:
+                continue
+            removed.add(node_id)
+            stack.extend(nodes_by_id[node_id].get("children_ids") or [])
+
+        graph["nodes"] = [node for node in nodes if node["id"] not in removed]
+        for node in graph["nodes"]:
+            node["children_ids"] = [
+                child_id
+                for child_id in node.get("children_ids") or []
+                if child_id not in removed
+            ]
+
+        kept_edges = []
+        for edge in edges:
+            sources = [s for s in edge["sources"] if s not in removed]
+            targets = [t for t in edge["targets"] if t not in removed]
+            if sources and targets:
+                kept_edges.append({**edge, "sources": sources, "targets": targets})
+        graph["edges"] = kept_edges
+        return graph, f"Deleted '{_display_name(nodes_by_id, subject_id)}'."
+
+    target_id = _resolve_node_id(nodes, command.target)
+    if target_id is None or target_id == subject_id:
+        return None
+
+    if command.action == CONNECT:
+        description = (
+            f"Connected '{_display_name(nodes_by_id, subject_id)}' "
+            f"to '{_display_name(nodes_by_id, target_id)}'."
+        )
+        for edge in edges:
+            if subject_id in edge["sources"] and target_id in edge["targets"]:
+                return graph, description
+        edge_ids = {edge["id"] for edge in edges}
+        edge_id = f"edge_{subject_id}_{target_id}"
+        suffix = 1
+        while edge_id in edge_ids:
+            edge_id = f"edge_{subject_id}_{target_id}_{suffix}"
+            suffix += 1
+        edges.append({"id": edge_id, "sources": [subject_id], "targets": [target_id]})
+        return graph, description
+
+    if command.action == DISCONNECT:
+        kept_edges = []
+        removed_any = False
+        for edge in edges:
+            connects = (subject_id in edge["sources"] and target_id in edge["targets"]) or (
+                target_id in edge["sources"] and subject_id in edge["targets"]
+            )
+            if not connects:
+                kept_edges.append(edge)
+            elif len(edge["sources"]) == 1 and len(edge["targets"]) == 1:
+                removed_any = True
+            else:
+                # Hyperedges would need splitting; leave those to the agent.
+                return None
+        if not removed_any:
+            return None
+        graph["edges"] = kept_edges
+        return graph, (
+            f"Disconnected '{_display_name(nodes_by_id, subject_id)}' "
+            f"from '{_display_name(nodes_by_id, target_id)}'."
+        )
+
+    if command.action == MOVE:
+        # Refuse moves that would put a node inside its own subtree.
+        stack = [subject_id]
+        while stack:
+            node_id = stack.pop()
+            if node_id == target_id:
+                return None
+            stack.extend(nodes_by_id[node_id].get("children_ids") or [])
+
+        for node in nodes:
+            node["children_ids"] = [
+                child_id
+                for child_id in node.get("children_ids") or []
+                if child_id != subject_id
+            ]
+        nodes_by_id[target_id]["children_ids"].append(subject_id)
+        return graph, (
+            f"Moved '{_display_name(nodes_by_id, subject_id)}' "
+            f"into '{_display_name(nodes_by_id, target_id)}'."
+        )
+
+    return None
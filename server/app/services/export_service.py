@@ -0,0 +1,376 @@
+"""
+Server-side export of generated diagrams to SVG and PNG.
+
+The laid-out ELK graph is drawn straight to SVG with the same geometry the
+Excalidraw conversion uses: outlines for containers and icon-less nodes,
+catalog icons, wrapped labels and orthogonal arrows. PNGs are rasterized from
+that SVG with resvg (the optional ``resvg-py`` package), so no browser is
+involved. Results are cached by scene hash.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from xml.sax.saxutils import escape, quoteattr
+
+from fastapi import Depends, HTTPException
+
+from app.config.settings import settings
+from app.constants.diagrams import mermaid_to_excalidraw_shape_map
+from app.db.repositories.chat_repository import ChatRepository
+from app.services.diagram_service import DiagramService, get_diagram_service
+from app.services.graph_validation import validate_and_repair_graph
+from app.services.icon_registry import IconRegistry, get_icon_registry
+from app.services.layout_profiles import LayoutProfile
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {"svg": "image/svg+xml", "png": "image/png"}
+
+# Blank margin around the diagram, in SVG units.
+SCENE_MARGIN = 20
+CONTAINER_ICON_SIZE = 32
+LEAF_ICON_SIZE = 128
+# resvg maps the generic ``sans-serif`` to Arial, which headless Linux images rarely
+# ship, so the usual Linux sans fonts are named explicitly before it.
+FONT_FAMILY = "Helvetica, Arial, 'Liberation Sans', 'DejaVu Sans', sans-serif"
+
+
+class ExportBackendUnavailableError(Exception):
+    """Raised when PNG export is requested but no rasterizer is installed."""
+
+    pass
+
+
+@dataclass
+class ExportResult:
+    content: bytes
+    media_type: str
+    # Scene hash, format and scale: what the rendered bytes depend on.
+    cache_key: str
+
+
+def scene_hash(elk_graph: dict) -> str:
+    """Stable hash of an ELK input graph, layout options included."""
+    canonical = json.dumps(elk_graph, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _number(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+class _SvgSceneBuilder:
+    def __init__(self, icon_registry: IconRegistry):
+        self.icon_registry = icon_registry
+        self.shapes: list[str] = []
+        self.labels: list[str] = []
+        self.icon_symbols: dict[str, str] = {}
+        self.node_boxes: dict[str, tuple[float, float, float, float]] = {}
+        self.max_x = 0.0
+        self.max_y = 0.0
+
+    def _extend_bounds(self, x: float, y: float):
+        self.max_x = max(self.max_x, x)
+        self.max_y = max(self.max_y, y)
+
+    def _icon_symbol(self, icon_id: str) -> str:
+        # Each distinct icon is embedded once and referenced by every node using it.
+        if icon_id not in self.icon_symbols:
+            self.icon_symbols[icon_id] = f"icon-{len(self.icon_symbols)}"
+        return self.icon_symbols[icon_id]
+
+    def add_nodes(self, elk_nodes: list[dict], parent_x: float = 0, parent_y: float = 0):
+        for elk_node in elk_nodes:
+            if "offset" in elk_node:
+                x = elk_node["offset"]["posX"]
+                y = elk_node["offset"]["posY"]
+            else:
+                x = parent_x + elk_node.get("x", 0)
+                y = parent_y + elk_node.get("y", 0)
+            width = elk_node.get("width", 0)
+            height = elk_node.get("height", 0)
+            children = elk_node.get("children", [])
+
+            self.node_boxes[elk_node["id"]] = (x, y, width, height)
+            self._extend_bounds(x + width, y + height)
+            self.add_node(elk_node, x, y, width, height, is_container=bool(children))
+            if children:
+                self.add_nodes(children, x, y)
+
+    def add_node(
+        self,
+        elk_node: dict,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+        is_container: bool,
+    ):
+        icon_id = elk_node.get("icon_id")
+        text_content = elk_node.get("text")
+        has_valid_icon = bool(icon_id) and icon_id in self.icon_registry
+        icon_size = CONTAINER_ICON_SIZE if is_container else LEAF_ICON_SIZE
+
+        if is_container or not has_valid_icon:
+            outline = (
+                "rectangle"
+                if is_container
+                else mermaid_to_excalidraw_shape_map.get(elk_node.get("shape"), "rectangle")
+            )
+            stroke = (
+                f'fill="none" stroke="{settings.DEFAULT_EXCALIDRAW_ELEMENT_STROKE_COLOR}" '
+                'stroke-width="2"'
+            )
+            if outline == "ellipse":
+                self.shapes.append(
+                    f'<ellipse cx="{_number(x + width / 2)}" cy="{_number(y + height / 2)}" '
+                    f'rx="{_number(width / 2)}" ry="{_number(height / 2)}" {stroke}/>'
+                )
+            elif outline == "diamond":
+                points = " ".join(
+                    f"{_number(px)},{_number(py)}"
+                    for px, py in (
+                        (x + width / 2, y),
+                        (x + width, y + height / 2),
+                        (x + width / 2, y + height),
+                        (x, y + height / 2),
+                    )
+                )
+                self.shapes.append(f'<polygon points="{points}" {stroke}/>')
+            else:
+                self.shapes.append(
+                    f'<rect x="{_number(x)}" y="{_number(y)}" width="{_number(width)}" '
+                    f'height="{_number(height)}" {stroke}/>'
+                )
+
+        if has_valid_icon:
+            self.shapes.append(
+                f'<use href="#{self._icon_symbol(icon_id)}" x="{_number(x)}" '
+                f'y="{_number(y)}" width="{icon_size}" height="{icon_size}"/>'
+            )
+
+        if not text_content:
+            return
+
+        # Same placement rules as the Excalidraw conversion.
+        font_size = settings.DEFAULT_EXCALIDRAW_ELEMENT_TEXT_FONT_SIZE
+        line_height = font_size * settings.DEFAULT_EXCALIDRAW_ELEMENT_TEXT_LINE_HEIGHT
+        lines = text_content.split("\n")
+        text_width = (
+            max(len(line) for line in lines)
+            * font_size
+            * settings.DEFAULT_EXCALIDRAW_ELEMENT_TEXT_FONT_TO_WIDTH_RATIO
+        )
+        text_height = len(lines) * line_height
+
+        if has_valid_icon and is_container:
+            anchor = "start"
+            text_x = x + icon_size + 8
+            text_y = y + (icon_size / 2) - (text_height / 2)
+        elif has_valid_icon:
+            anchor = "middle"
+            text_x = x + text_width / 2
+            text_y = y + icon_size
+        else:
+            anchor = "middle"
+            text_x = x + width / 2
+            text_y = y + (height - text_height) / 2
+
+        self._extend_bounds(
+            text_x + (text_width if anchor == "start" else text_width / 2),
+            text_y + text_height,
+        )
+        tspans = "".join(
+            f'<tspan x="{_number(text_x)}" '
+            f'y="{_number(text_y + index * line_height + (line_height + font_size * 0.7) / 2)}">'
+            f"{escape(line)}</tspan>"
+            for index, line in enumerate(lines)
+        )
+        self.labels.append(
+            f'<text font-size="{font_size}" text-anchor="{anchor}">{tspans}</text>'
+        )
+
+    def add_edges(self, elk_edges: list[dict]):
+        for edge in elk_edges:
+            offset_x = offset_y = 0
+            container = self.node_boxes.get(edge.get("container"))
+            if container:
+                offset_x, offset_y = container[0], container[1]
+
+            points = []
+            for section in edge.get("sections", []):
+                section_points = [
+                    section["startPoint"],
+                    *(section.get("bendPoints") or []),
+                    section["endPoint"],
+                ]
+                for point in section_points:
+                    points.append((point["x"] + offset_x, point["y"] + offset_y))
+            if len(points) < 2:
+                continue
+
+            for point_x, point_y in points:
+                self._extend_bounds(point_x, point_y)
+            self.shapes.append(
+                '<polyline fill="none" '
+                f'stroke="{settings.DEFAULT_EXCALIDRAW_ELEMENT_STROKE_COLOR}" '
+                'stroke-width="2" marker-end="url(#arrow)" points="'
+                + " ".join(f"{_number(px)},{_number(py)}" for px, py in points)
+                + '"/>'
+            )
+
+    def to_svg(self) -> str:
+        width = self.max_x + 2 * SCENE_MARGIN
+        height = self.max_y + 2 * SCENE_MARGIN
+        stroke = settings.DEFAULT_EXCALIDRAW_ELEMENT_STROKE_COLOR
+        symbols = "".join(
+            f'<symbol id="{symbol_id}" viewBox="0 0 1 1">'
+            f'<image width="1" height="1" preserveAspectRatio="xMidYMid meet" '
+            f"href={quoteattr(self.icon_registry.data_url(icon_id))}/></symbol>"
+            for icon_id, symbol_id in self.icon_symbols.items()
+        )
+        return (
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{_number(width)}" height="{_number(height)}" '
+            f'viewBox="{-SCENE_MARGIN} {-SCENE_MARGIN} {_number(width)} {_number(height)}">'
+            "<defs>"
+            '<marker id="arrow" viewBox="0 0 10 10" refX="9" refY="5" '
+            'markerWidth="6" markerHeight="6" orient="auto">'
+            f'<path d="M0,0 L10,5 L0,10 z" fill="{stroke}"/></marker>'
+            f"{symbols}</defs>"
+            f'<rect x="{-SCENE_MARGIN}" y="{-SCENE_MARGIN}" width="{_number(width)}" '
+            f'height="{_number(height)}" fill="#ffffff"/>'
+            + "".join(self.shapes)
+            + f'<g font-family="{FONT_FAMILY}" fill="{stroke}">'
+            + "".join(self.labels)
+            + "</g></svg>"
+        )
+
+
+def render_svg(elk_output: dict, icon_registry: IconRegistry | None = None) -> str:
+    """Draws a laid-out ELK graph (the rendering engine's output) as SVG."""
+    builder = _SvgSceneBuilder(icon_registry or get_icon_registry())
+    builder.add_nodes(elk_output.get("children", []))
+    builder.add_edges(elk_output.get("edges", []))
+    return builder.to_svg()
+
+
+def render_png(svg: str, scale: float = 1.0) -> bytes:
+    try:
+        import resvg_py
+    except ImportError as e:
+        raise ExportBackendUnavailableError(
+            "PNG export needs the optional 'resvg-py' package"
+        ) from e
+    return bytes(resvg_py.svg_to_bytes(svg_string=svg, zoom=scale))
+
+
+def render_scene(elk_output: dict, export_format: str, scale: float = 1.0) -> bytes:
+    """Renders a laid-out ELK graph to ``export_format``. Safe to run in a worker process."""
+    svg = render_svg(elk_output)
+    if export_format == "png":
+        return render_png(svg, scale)
+    return svg.encode("utf-8")
+
+
+class ExportCache:
+    """In-process LRU of rendered exports, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return content
+
+    def put(self, key: str, content: bytes):
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = content
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+export_cache = ExportCache(settings.EXPORT_CACHE_MAX_BYTES)
+
+
+class ExportService:
+    def __init__(self, diagram_service: DiagramService):
+        self.diagram_service = diagram_service
+
+    def prepare_layout_input(
+        self, graph: dict, layout_profile: LayoutProfile | None = None
+    ) -> dict:
+        """Repairs an agent ``Graph`` dict and turns it into ELK input with layout options."""
+        graph, _ = validate_and_repair_graph(graph, self.diagram_service.icon_registry)
+        elk_graph = self.diagram_service.convert_agent_response_to_elk_json(graph)
+        return self.diagram_service.add_layout_options_to_elk_graph(
+            elk_graph, profile=layout_profile
+        )
+
+    async def export_graph(
+        self,
+        graph: dict,
+        export_format: str = "svg",
+        scale: float = 1.0,
+        layout_profile: LayoutProfile | None = None,
+    ) -> ExportResult:
+        elk_input = self.prepare_layout_input(graph, layout_profile)
+        # The layout is a pure function of the ELK input, so the input identifies
+        # the scene and a cache hit skips both layout and rendering.
+        key = scene_hash(elk_input)
+        cache_key = f"{key}:{export_format}:{scale}"
+        media_type = EXPORT_FORMATS[export_format]
+
+        content = export_cache.get(cache_key)
+        if content is None:
+            elk_output = await asyncio.to_thread(
+                self.diagram_service.generate_elk_output_json, elk_input
+            )
+            content = await asyncio.to_thread(
+                render_scene, elk_output, export_format, scale
+            )
+            export_cache.put(cache_key, content)
+        return ExportResult(content=content, media_type=media_type, cache_key=cache_key)
+
+    async def export_chat(
+        self, thread_id: str, user_id: str, export_format: str = "svg", scale: float = 1.0
+    ) -> ExportResult:
+        """Exports the latest diagram of a chat thread."""
+        chat_data = ChatRepository().get_chat_fields(
+            thread_id, user_id, ["checkpoint.structured_response"]
+        )
+        if not chat_data:
+            raise HTTPException(status_code=404, detail="Chat thread not found")
+        graph = (chat_data.get("checkpoint") or {}).get("structured_response")
+        if not graph:
+            raise HTTPException(status_code=404, detail="Chat has no diagram yet")
+        return await self.export_graph(graph, export_format, scale)
+
+
+def get_export_service(
+    diagram_service: DiagramService = Depends(get_diagram_service),
+) -> ExportService:
+    return ExportService(diagram_service)
@@ -0,0 +1,374 @@
+import difflib
+import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, Protocol
+
+from app.constants.diagrams import mermaid_to_excalidraw_shape_map
+
+logger = logging.getLogger(__name__)
+
+# If more than this fraction of the icons the model used cannot be matched to the
+# catalog, it most likely skipped the icon search altogether and is asked again.
+MAX_UNRESOLVED_ICON_RATIO = 0.5
+
+# Resolved icon ids remembered per resolver; the least recently used are
+# dropped first, since models keep inventing new ids.
+MAX_RESOLVED_ICON_IDS = 4096
+
+_ICON_PREFIX_PATTERN = re.compile(r"^(arch|res)[_-]", re.IGNORECASE)
+_ICON_SIZE_SUFFIX_PATTERN = re.compile(r"[_-](16|32|48|64)([_-]dark)?$", re.IGNORECASE)
+_NON_ALPHANUMERIC_PATTERN = re.compile(r"[^a-z0-9]")
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+# Abbreviations models like to use in place of the catalog's full service names.
+ICON_ID_ALIASES = {
+    "s3": "simple-storage-service",
+    "sqs": "simple-queue-service",
+    "sns": "simple-notification-service",
+    "ses": "simple-email-service",
+    "elb": "elastic-load-balancing",
+    "alb": "elastic-load-balancing",
+    "nlb": "elastic-load-balancing",
+    "vpc": "virtual-private-cloud-vpc",
+    "ecs": "elastic-container-service",
+    "eks": "elastic-kubernetes-service",
+    "ecr": "elastic-container-registry",
+    "iam": "identity-and-access-management",
+}
+
+
+# Feedback messages sent to the agent carry ids with this prefix, so they can be
+# left out of the stored thread.
+VALIDATION_FEEDBACK_MESSAGE_ID_PREFIX = "graph-validation-feedback-"
+
+
+@dataclass
+class GraphViolation:
+    kind: str
+    message: str
+    repaired: bool = True
+
+
+@dataclass
+class GraphValidationReport:
+    violations: list[GraphViolation] = field(default_factory=list)
+
+    def add(self, kind: str, message: str, repaired: bool = True):
+        self.violations.append(GraphViolation(kind, message, repaired))
+
+    @property
+    def requires_feedback(self) -> bool:
+        """True if the graph could not be repaired locally and the agent should retry."""
+        return any(not violation.repaired for violation in self.violations)
+
+    def feedback_message(self) -> str:
+        problems = "\n".join(
+            f"- {violation.message}"
+            for violation in self.violations
+            if not violation.repaired
+        )
+        return (
+            "The graph you returned has problems that could not be fixed automatically:\n"
+            f"{problems}\n"
+            "Please return a corrected `Graph`."
+        )
+
+
+def without_validation_feedback(messages: list) -> list:
+    """
+    ``messages`` without the validation feedback and the rejected answers it
+    replied to (with the tool results of their ``Graph`` calls), so only the
+    graph that was accepted is kept with the thread.
+    """
+    kept = []
+    for message in messages:
+        if (getattr(message, "id", None) or "").startswith(
+            VALIDATION_FEEDBACK_MESSAGE_ID_PREFIX
+        ):
+            while kept and getattr(kept[-1], "type", None) == "tool":
+                kept.pop()
+            if kept and getattr(kept[-1], "type", None) == "ai":
+                kept.pop()
+            continue
+        kept.append(message)
+    return kept
+
+
+class IconResolver(Protocol):
+    def resolve(self, icon_id: str) -> str | None: ...
+
+
+class IconIdResolver:
+    """
+    Maps icon ids produced by the model onto ids that exist in the icon catalog.
+
+    Exact ids are returned unchanged. Otherwise common abbreviations are expanded,
+    the id is normalized (case, separators, ``Arch_``/``Res_`` prefixes and size
+    suffixes are ignored) and looked up directly, falling back to a fuzzy match
+    against the normalized catalog. Results are memoized, so a recently seen bad
+    id is resolved once.
+    """
+
+    def __init__(
+        self,
+        icon_ids: Iterable[str],
+        cutoff: float = 0.85,
+        aliases: dict[str, str] | None = None,
+        vendor_prefixes: Iterable[str] = (),
+    ):
+        self.icon_ids = set(icon_ids)
+        self.cutoff = cutoff
+        self.aliases = ICON_ID_ALIASES if aliases is None else aliases
+        self.vendor_prefixes = tuple(vendor_prefixes)
+        self._by_name: dict[str, str] | None = None
+        self._normalized: dict[str, str] = {}
+        # Sorted so "Arch_" service icons win over "Res_" resource icons and the
+        # 64px variant wins over smaller ones when several normalize the same way.
+        for icon_id in sorted(self.icon_ids, key=self._preference):
+            self._normalized.setdefault(self.normalize(icon_id), icon_id)
+        self._normalized_keys = list(self._normalized)
+        self._cache: OrderedDict[str, str | None] = OrderedDict()
+
+    @staticmethod
+    def normalize(icon_id: str) -> str:
+        value = _ICON_PREFIX_PATTERN.sub("", icon_id.strip())
+        value = _ICON_SIZE_SUFFIX_PATTERN.sub("", value)
+        return _NON_ALPHANUMERIC_PATTERN.sub("", value.lower())
+
+    @staticmethod
+    def _preference(icon_id: str) -> tuple:
+        return (
+            not icon_id.startswith("Arch_"),
+            icon_id.startswith("Res_"),
+            not icon_id.endswith("_64"),
+            icon_id,
+        )
+
+    def resolve(self, icon_id: str) -> str | None:
+        if icon_id in self.icon_ids:
+            return icon_id
+        if icon_id in self._cache:
+            self._cache.move_to_end(icon_id)
+            return self._cache[icon_id]
+
+        normalized = self.normalize(
+            _TOKEN_PATTERN.sub(
+                lambda match: self.aliases.get(match.group(0).lower(), match.group(0)),
+                icon_id,
+            )
+        )
+        resolved = self._normalized.get(normalized)
+        if resolved is None and normalized:
+            matches = difflib.get_close_matches(
+                normalized, self._normalized_keys, n=1, cutoff=self.cutoff
+            )
+            if matches:
+                resolved = self._normalized[matches[0]]
+
+        self._cache[icon_id] = resolved
+        if len(self._cache) > MAX_RESOLVED_ICON_IDS:
+            self._cache.popitem(last=False)
+        return resolved
+
+    def _strip_vendor(self, normalized: str) -> str:
+        for prefix in self.vendor_prefixes:
+            if normalized.startswith(prefix) and len(normalized) > len(prefix):
+                return normalized[len(prefix) :]
+        return normalized
+
+    def match_name(self, name: str) -> str | None:
+        """
+        The icon of a service named ``name`` ("Lambda", "API Gateway", "S3"):
+        an exact match of the normalized name, vendor words ("AWS", "Amazon")
+        optional. Unlike ``resolve`` there is no fuzzy matching, since plain
+        labels ("Start", "Users") mostly aren't meant to be icons.
+        """
+        if self._by_name is None:
+            by_name = {}
+            for icon_id in sorted(self.icon_ids, key=self._preference):
+                by_name.setdefault(self._strip_vendor(self.normalize(icon_id)), icon_id)
+            self._by_name = by_name
+
+        expanded = _TOKEN_PATTERN.sub(
+            lambda match: self.aliases.get(match.group(0).lower(), match.group(0)),
+            name,
+        )
+        normalized = self._strip_vendor(self.normalize(expanded))
+        return self._by_name.get(normalized) if normalized else None
+
+
+def validate_and_repair_graph(
+    graph: dict, icon_resolver: IconResolver | None = None
+) -> tuple[dict, GraphValidationReport]:
+    """
+    Validates a ``Graph`` dict produced by the agent and repairs what it can.
+
+    Runs in time linear in the number of nodes, containment links and edges:
+
+    - duplicate node ids are merged into the first occurrence,
+    - a node claimed by several parents stays with the first one,
+    - containment cycles are broken by detaching the node that closes the cycle,
+    - ``children_ids`` and edge endpoints that reference unknown nodes are dropped,
+    - icon ids missing from the catalog are replaced by the closest catalog id or
+      cleared, so the node falls back to a plain rectangle.
+
+    Returns the repaired graph and a report. ``report.requires_feedback`` is only
+    set when the result is not worth laying out as is.
+    """
+    report = GraphValidationReport()
+
+    # 1. Nodes: merge duplicates.
+    nodes: dict[str, dict] = {}
+    for node_data in graph.get("nodes", []):
+        node_id = node_data.get("id")
+        if not node_id:
+            report.add("missing_node_id", "A node without an id was dropped.")
+            continue
+        if node_id in nodes:
+            report.add("duplicate_node_id", f"Node '{node_id}' is defined more than once.")
+            existing = nodes[node_id]
+            existing["children_ids"].extend(node_data.get("children_ids") or [])
+            existing["text"] = existing["text"] or node_data.get("text")
+            existing["icon_id"] = existing["icon_id"] or node_data.get("icon_id")
+            existing["shape"] = existing["shape"] or node_data.get("shape")
+            continue
+        shape = node_data.get("shape")
+        if shape is not None and shape not in mermaid_to_excalidraw_shape_map:
+            report.add("unknown_shape", f"Shape '{shape}' of node '{node_id}' was removed.")
+            shape = None
+        nodes[node_id] = {
+            "id": node_id,
+            "text": node_data.get("text"),
+            "icon_id": node_data.get("icon_id"),
+            "shape": shape,
+            "children_ids": list(node_data.get("children_ids") or []),
+        }
+
+    if not nodes:
+        report.add("empty_graph", "The graph does not contain any nodes.", repaired=False)
+        return {"nodes": [], "edges": []}, report
+
+    # 2. Icons: snap to the catalog.
+    if icon_resolver is not None:
+        icon_count = 0
+        unresolved = []
+        for node in nodes.values():
+            icon_id = node["icon_id"]
+            if not icon_id:
+                continue
+            icon_count += 1
+            resolved = icon_resolver.resolve(icon_id)
+            if resolved is None:
+                unresolved.append(icon_id)
+                node["icon_id"] = None
+                report.add(
+                    "unknown_icon_id",
+                    f"Icon '{icon_id}' of node '{node['id']}' does not exist and was removed.",
+                )
+            elif resolved != icon_id:
+                node["icon_id"] = resolved
+                report.add(
+                    "icon_id_fixed",
+                    f"Icon '{icon_id}' of node '{node['id']}' was replaced by '{resolved}'.",
+                )
+        if icon_count and len(unresolved) / icon_count > MAX_UNRESOLVED_ICON_RATIO:
+            report.add(
+                "unresolved_icons",
+                "These icon ids do not exist: "
+                + ", ".join(sorted(set(unresolved)))
+                + ". Use the icon search tool and only use ids it returns.",
+                repaired=False,
+            )
+
+    # 3. Containment: one parent per node, no unknown children.
+    parent_of: dict[str, str] = {}
+    for node_id, node in nodes.items():
+        for child_id in node["children_ids"]:
+            if child_id == node_id:
+                report.add("self_containment", f"Node '{node_id}' listed itself as a child.")
+            elif child_id not in nodes:
+                report.add(
+                    "unknown_child_id",
+                    f"Node '{node_id}' listed unknown child '{child_id}'.",
+                )
+            elif child_id in parent_of:
+                if parent_of[child_id] != node_id:
+                    report.add(
+                        "multiple_parents",
+                        f"Node '{child_id}' is a child of both '{parent_of[child_id]}' "
+                        f"and '{node_id}'; kept '{parent_of[child_id]}'.",
+                    )
+            else:
+                parent_of[child_id] = node_id
+
+    # 4. Break containment cycles. With a single parent per node the containment
+    # graph is a functional graph, so walking parent pointers with a three-state
+    # marker visits every node once.
+    state: dict[str, int] = {}  # missing = unvisited, 1 = on current path, 2 = done
+    for start_id in nodes:
+        path = []
+        current = start_id
+        while state.get(current) is None:
+            state[current] = 1
+            path.append(current)
+            parent_id = parent_of.get(current)
+            if parent_id is None:
+                break
+            if state.get(parent_id) == 1:
+                del parent_of[current]
+                report.add(
+                    "containment_cycle",
+                    f"Containment cycle through '{current}' and '{parent_id}' was broken.",
+                )
+                break
+            current = parent_id
+        for node_id in path:
+            state[node_id] = 2
+
+    # 5. Rebuild children lists from the repaired parent map, keeping model order.
+    repaired_nodes = []
+    for node_id, node in nodes.items():
+        node["children_ids"] = [
+            child_id
+            for child_id in dict.fromkeys(node["children_ids"])
+            if parent_of.get(child_id) == node_id
+        ]
+        repaired_nodes.append(node)
+
+    # 6. Edges: drop dangling endpoints, keep edge ids unique.
+    repaired_edges = []
+    edge_ids = set()
+    for index, edge in enumerate(graph.get("edges", [])):
+        sources = [s for s in dict.fromkeys(edge.get("sources") or []) if s in nodes]
+        targets = [t for t in dict.fromkeys(edge.get("targets") or []) if t in nodes]
+        edge_id = edge.get("id") or f"edge_{index}"
+
+        if len(sources) != len(edge.get("sources") or []) or len(targets) != len(
+            edge.get("targets") or []
+        ):
+            report.add(
+                "dangling_edge",
+                f"Edge '{edge_id}' referenced unknown or repeated nodes.",
+            )
+        if not sources or not targets:
+            continue
+
+        if edge_id in edge_ids:
+            report.add("duplicate_edge_id", f"Edge id '{edge_id}' is used more than once.")
+            suffix = 1
+            while f"{edge_id}_{suffix}" in edge_ids:
+                suffix += 1
+            edge_id = f"{edge_id}_{suffix}"
+        edge_ids.add(edge_id)
+        repaired_edges.append({"id": edge_id, "sources": sources, "targets": targets})
+
+    if report.violations:
+        logger.info(
+            "Graph validation found %d violation(s): %s",
+            len(report.violations),
+            ", ".join(sorted({violation.kind for violation in report.violations})),
+        )
+
+    return {"nodes": repaired_nodes, "edges": repaired_edges}, report
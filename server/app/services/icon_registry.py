@@ -0,0 +1,193 @@
+"""
+Namespaced registry over the icon sets of every provider.
+
+Icon ids are qualified with their provider (``aws:Arch_AWS-Lambda_64``,
+``gcp:...``, ``azure:...``, ``generic:...``). Unqualified ids are AWS ids, which
+is what graphs stored before other providers existed contain.
+
+Each provider's icons live in their own shard (``<provider>_icons.*`` in
+``app/assets``) that is loaded the first time it is needed, so a deployment only
+holds the providers its diagrams actually use.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+from app.config.settings import settings
+from app.core.icon_catalog import IconCatalog, IconLoadingError, load_icon_catalog
+from app.services.graph_validation import ICON_ID_ALIASES, IconIdResolver
+
+logger = logging.getLogger(__name__)
+
+ICON_PROVIDERS = ("aws", "gcp", "azure", "generic")
+DEFAULT_ICON_PROVIDER = "aws"
+
+# Abbreviations only make sense for the provider whose service names they shorten.
+PROVIDER_ICON_ID_ALIASES = {"aws": ICON_ID_ALIASES}
+
+# Vendor words that start icon names but that people leave out ("Lambda" rather
+# than "AWS Lambda"), normalized.
+PROVIDER_VENDOR_PREFIXES = {
+    "aws": ("amazon", "aws"),
+    "gcp": ("googlecloud", "google", "cloud"),
+    "azure": ("microsoft", "azure"),
+}
+
+
+def split_icon_id(icon_id: str) -> tuple[str, str]:
+    """Splits ``provider:id``; ids without a known provider prefix are AWS ids."""
+    provider, separator, local_id = icon_id.partition(":")
+    if separator and provider in ICON_PROVIDERS:
+        return provider, local_id
+    return DEFAULT_ICON_PROVIDER, icon_id
+
+
+def qualify_icon_id(provider: str, local_id: str) -> str:
+    return f"{provider}:{local_id}"
+
+
+@dataclass
+class _SearchEntry:
+    """An icon with its search fields lower-cased once, when its shard loads."""
+
+    haystack: str
+    keywords: str
+    id: str
+    name: str
+
+
+class _Shard:
+    def __init__(self, provider: str, catalog: IconCatalog):
+        self.provider = provider
+        self.catalog = catalog
+        self.search_entries = [
+            _SearchEntry(
+                haystack=f"{icon['id'].lower()}\n{icon['name'].lower()}",
+                keywords=icon.get("keywords", ""),
+                id=qualify_icon_id(provider, icon["id"]),
+                name=icon["name"],
+            )
+            for icon in catalog.icons
+        ]
+        self.resolver = IconIdResolver(
+            catalog.icons_by_id,
+            aliases=PROVIDER_ICON_ID_ALIASES.get(provider, {}),
+            vendor_prefixes=PROVIDER_VENDOR_PREFIXES.get(provider, ()),
+        )
+
+
+class IconRegistry:
+    """Icons of the enabled providers, loaded per provider on first use."""
+
+    def __init__(self, providers: Iterable[str]):
+        self.providers = []
+        for provider in providers:
+            if provider in ICON_PROVIDERS:
+                self.providers.append(provider)
+            else:
+                logger.warning("Ignoring unknown icon provider '%s'", provider)
+        self._shards: dict[str, _Shard] = {}
+        self._lock = threading.Lock()
+
+    def _shard(self, provider: str) -> _Shard | None:
+        if provider not in self.providers:
+            return None
+        shard = self._shards.get(provider)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.get(provider)
+                if shard is None:
+                    try:
+                        catalog = load_icon_catalog(provider)
+                    except IconLoadingError:
+                        # Remember the failure so it isn't retried on every lookup.
+                        catalog = IconCatalog([])
+                    shard = _Shard(provider, catalog)
+                    self._shards[provider] = shard
+                    logger.info("Loaded %d %s icon(s)", len(catalog), provider)
+        return shard
+
+    def load_all(self):
+        """Loads every enabled provider now instead of on first use."""
+        for provider in self.providers:
+            self._shard(provider)
+
+    @property
+    def loaded_providers(self) -> list[str]:
+        return list(self._shards)
+
+    def __contains__(self, icon_id: str) -> bool:
+        provider, local_id = split_icon_id(icon_id)
+        shard = self._shard(provider)
+        return shard is not None and local_id in shard.catalog
+
+    def data_url(self, icon_id: str) -> str:
+        provider, local_id = split_icon_id(icon_id)
+        shard = self._shard(provider)
+        if shard is None:
+            raise KeyError(icon_id)
+        return shard.catalog.data_url(local_id)
+
+    def resolve(self, icon_id: str) -> str | None:
+        """
+        Maps a possibly wrong icon id onto an existing one of the same provider,
+        keeping the id qualified only if it was.
+        """
+        provider, local_id = split_icon_id(icon_id)
+        shard = self._shard(provider)
+        if shard is None:
+            return None
+        resolved = shard.resolver.resolve(local_id)
+        if resolved is None or icon_id == local_id:
+            return resolved
+        return qualify_icon_id(provider, resolved)
+
+    def match_name(self, name: str) -> str | None:
+        """The qualified id of the icon named ``name``, in provider order, if any."""
+        for provider in self.providers:
+            shard = self._shard(provider)
+            if shard is None:
+                continue
+            local_id = shard.resolver.match_name(name)
+            if local_id is not None:
+                return qualify_icon_id(provider, local_id)
+        return None
+
+    def search(
+        self, search_string: str, provider: str | None = None, limit: int = 5
+    ) -> list[dict]:
+        """
+        Icons whose id or name contains ``search_string`` (case-insensitive), in
+        provider then catalog order. Icons whose category keywords match fill the
+        remaining slots. Searching all providers loads every enabled shard.
+        """
+        providers = self.providers if provider is None else [provider]
+        search_term = search_string.lower()
+        results = []
+        category_matches = []
+
+        for provider_name in providers:
+            shard = self._shard(provider_name)
+            if shard is None:
+                continue
+            for entry in shard.search_entries:
+                if search_term in entry.haystack:
+                    results.append(
+                        {"id": entry.id, "name": entry.name, "provider": provider_name}
+                    )
+                    if len(results) == limit:
+                        return results
+                elif len(category_matches) < limit and search_term in entry.keywords:
+                    category_matches.append(
+                        {"id": entry.id, "name": entry.name, "provider": provider_name}
+                    )
+
+        return (results + category_matches)[:limit]
+
+
+@lru_cache(maxsize=1)
+def get_icon_registry() -> IconRegistry:
+    return IconRegistry(settings.ICON_PROVIDERS)
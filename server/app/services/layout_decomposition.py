@@ -0,0 +1,310 @@
+"""
+Splits an ELK graph into parts that can be laid out independently, and packs the
+laid-out parts back into one graph.
+
+With ``INCLUDE_CHILDREN`` ELK lays a whole hierarchy out as one job, so a diagram
+of several unconnected regions takes as long as all of them together. Here the
+top-level nodes are grouped into connected components (an edge anywhere below
+two nodes connects them); a component that is a single container without edges
+of its own (an account wrapping unconnected regions) is opened up and its
+children are split the same way. Each part is laid out by its own ELK call,
+concurrently, and the results are arranged by shelf packing, so layout time
+follows the largest part rather than the sum.
+
+Edge coordinates are relative to the edge's ``container``: edges contained by
+a part's root are moved with the part, all others move with their container.
+"""
+
+import math
+import re
+from collections.abc import Iterator
+
+# Space between packed parts, and between a container's border and its parts.
+PART_SPACING = 100
+
+# Components with fewer nodes are laid out together, in one part.
+MIN_PART_NODES = 20
+
+# Width to height ratio the packed parts aim for.
+PACKING_ASPECT_RATIO = 1.6
+
+_PADDING_PATTERN = re.compile(r"(top|left|bottom|right)=(\d+(?:\.\d+)?)")
+
+
+def _padding(node: dict) -> dict[str, float]:
+    padding = {"top": 0.0, "left": 0.0, "bottom": 0.0, "right": 0.0}
+    raw = (node.get("layoutOptions") or {}).get("elk.padding", "")
+    for side, value in _PADDING_PATTERN.findall(str(raw)):
+        padding[side] = float(value)
+    return padding
+
+
+def _count_nodes(nodes: list[dict]) -> int:
+    count = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.get("children") or [])
+    return count
+
+
+def _edge_ends(edge: dict) -> list[str]:
+    return [*(edge.get("sources") or []), *(edge.get("targets") or [])]
+
+
+def _shift_edge(edge: dict, dx: float, dy: float):
+    for section in edge.get("sections") or []:
+        for point in (
+            section.get("startPoint"),
+            *(section.get("bendPoints") or []),
+            section.get("endPoint"),
+        ):
+            if point:
+                point["x"] += dx
+                point["y"] += dy
+    for point in edge.get("junctionPoints") or []:
+        point["x"] += dx
+        point["y"] += dy
+    for label in edge.get("labels") or []:
+        label["x"] = label.get("x", 0) + dx
+        label["y"] = label.get("y", 0) + dy
+
+
+class _Assembled:
+    """
+    A laid-out part: ``children`` positioned relative to the part, and
+    ``edges``, of which those with ``container`` None are relative to the part
+    too.
+    """
+
+    def __init__(self, children: list[dict], edges: list[dict], width: float, height: float):
+        self.children = children
+        self.edges = edges
+        self.width = width
+        self.height = height
+
+    def shift(self, dx: float, dy: float):
+        for child in self.children:
+            child["x"] = child.get("x", 0) + dx
+            child["y"] = child.get("y", 0) + dy
+        for edge in self.edges:
+            if edge.get("container") is None:
+                _shift_edge(edge, dx, dy)
+
+
+class _Leaf:
+    """Nodes and edges laid out together by one ELK call."""
+
+    def __init__(self, graph: dict):
+        self.graph = graph
+
+    def graphs(self) -> list[dict]:
+        return [self.graph]
+
+    def assemble(self, layouts: Iterator[dict]) -> _Assembled:
+        layout = next(layouts)
+        edges = layout.get("edges") or []
+        for edge in edges:
+            if edge.get("container") in (None, self.graph["id"]):
+                edge["container"] = None
+        return _Assembled(
+            layout.get("children") or [],
+            edges,
+            layout.get("width", 0),
+            layout.get("height", 0),
+        )
+
+
+class _Packed:
+    """Parts laid out separately and arranged in rows."""
+
+    def __init__(self, parts: list):
+        self.parts = parts
+
+    def graphs(self) -> list[dict]:
+        return [graph for part in self.parts for graph in part.graphs()]
+
+    def assemble(self, layouts: Iterator[dict]) -> _Assembled:
+        assembled = [part.assemble(layouts) for part in self.parts]
+        area = sum(
+            (part.width + PART_SPACING) * (part.height + PART_SPACING)
+            for part in assembled
+        )
+        row_limit = max(
+            max(part.width for part in assembled),
+            math.sqrt(area * PACKING_ASPECT_RATIO),
+        )
+
+        # Tallest first, so each row's height is set by its first part.
+        x = y = row_height = width = 0.0
+        children, edges = [], []
+        for part in sorted(assembled, key=lambda part: -part.height):
+            if x > 0 and x + part.width > row_limit:
+                x = 0.0
+                y += row_height + PART_SPACING
+                row_height = 0.0
+            part.shift(x, y)
+            children.extend(part.children)
+            edges.extend(part.edges)
+            x += part.width + PART_SPACING
+            width = max(width, x - PART_SPACING)
+            row_height = max(row_height, part.height)
+        return _Assembled(children, edges, width, y + row_height)
+
+
+class _Container:
+    """A container whose children are laid out as separate parts inside it."""
+
+    def __init__(self, node: dict, inner):
+        self.node = node
+        self.inner = inner
+
+    def graphs(self) -> list[dict]:
+        return self.inner.graphs()
+
+    def assemble(self, layouts: Iterator[dict]) -> _Assembled:
+        inner = self.inner.assemble(layouts)
+        padding = _padding(self.node)
+        inner.shift(padding["left"], padding["top"])
+        for edge in inner.edges:
+            if edge.get("container") is None:
+                edge["container"] = self.node["id"]
+        node = {
+            **self.node,
+            "x": 0,
+            "y": 0,
+            "width": inner.width + padding["left"] + padding["right"],
+            "height": inner.height + padding["top"] + padding["bottom"],
+            "children": inner.children,
+        }
+        return _Assembled([node], inner.edges, node["width"], node["height"])
+
+
+class LayoutPlan:
+    """The ELK graphs to lay out, and how to put their layouts back together."""
+
+    def __init__(self, elk_graph: dict, root):
+        self.elk_graph = elk_graph
+        self.root = root
+        self.graphs = root.graphs()
+
+    def assemble(self, layouts: list[dict]) -> dict:
+        """The laid-out graph, from the layouts of ``graphs`` in order."""
+        assembled = self.root.assemble(iter(layouts))
+        for edge in assembled.edges:
+            if edge.get("container") is None:
+                edge["container"] = self.elk_graph["id"]
+        return {
+            **self.elk_graph,
+            "x": 0,
+            "y": 0,
+            "width": assembled.width,
+            "height": assembled.height,
+            "children": assembled.children,
+            "edges": assembled.edges,
+        }
+
+
+class _Splitter:
+    def __init__(self, elk_graph: dict):
+        self.elk_graph = elk_graph
+        # Ids of each node's ancestors from the top level down, and its own.
+        self.paths: dict[str, tuple[str, ...]] = {}
+        stack = [(node, ()) for node in elk_graph.get("children") or []]
+        while stack:
+            node, parent_path = stack.pop()
+            path = (*parent_path, node["id"])
+            self.paths[node["id"]] = path
+            stack.extend((child, path) for child in node.get("children") or [])
+        self.edge_count_by_node: dict[str, int] = {}
+        for edge in elk_graph.get("edges") or []:
+            for node_id in _edge_ends(edge):
+                self.edge_count_by_node[node_id] = self.edge_count_by_node.get(node_id, 0) + 1
+
+    def _leaf(self, nodes: list[dict], edges: list[dict]) -> _Leaf:
+        return _Leaf(
+            {
+                "id": self.elk_graph["id"],
+                "layoutOptions": self.elk_graph.get("layoutOptions") or {},
+                "children": nodes,
+                "edges": edges,
+            }
+        )
+
+    def split(self, nodes: list[dict], edges: list[dict]):
+        """Parts for ``nodes``, one level of the hierarchy, and the edges below them."""
+        # Siblings, so they are at the same depth.
+        depth = len(self.paths[nodes[0]["id"]]) - 1
+        component_of = {node["id"]: node["id"] for node in nodes}
+
+        def find(node_id: str) -> str:
+            while component_of[node_id] != node_id:
+                component_of[node_id] = component_of[component_of[node_id]]
+                node_id = component_of[node_id]
+            return node_id
+
+        edge_ends = []
+        for edge in edges:
+            ends = [self.paths[node_id][depth] for node_id in _edge_ends(edge)]
+            edge_ends.append(ends)
+            for node_id in ends[1:]:
+                component_of[find(node_id)] = find(ends[0])
+
+        nodes_by_component: dict[str, list[dict]] = {}
+        for node in nodes:
+            nodes_by_component.setdefault(find(node["id"]), []).append(node)
+        edges_by_component: dict[str, list[dict]] = {}
+        for edge, ends in zip(edges, edge_ends):
+            edges_by_component.setdefault(find(ends[0]), []).append(edge)
+
+        if len(nodes_by_component) == 1:
+            node = nodes[0] if len(nodes) == 1 else None
+            if (
+                node is not None
+                and node.get("children")
+                and not self.edge_count_by_node.get(node["id"])
+            ):
+                return _Container(node, self.split(node["children"], edges))
+            return self._leaf(nodes, edges)
+
+        parts = []
+        # Small components are laid out together rather than one call each.
+        small_nodes, small_edges = [], []
+        for component, component_nodes in nodes_by_component.items():
+            component_edges = edges_by_component.get(component, [])
+            if _count_nodes(component_nodes) < MIN_PART_NODES:
+                small_nodes.extend(component_nodes)
+                small_edges.extend(component_edges)
+            else:
+                parts.append(self.split(component_nodes, component_edges))
+        if small_nodes:
+            parts.append(self._leaf(small_nodes, small_edges))
+        return _Packed(parts) if len(parts) > 1 else parts[0]
+
+    def is_splittable(self) -> bool:
+        # Edges must connect nodes of the graph to be assigned to a part; ELK
+        # reports the ones that don't better for the graph as a whole.
+        for edge in self.elk_graph.get("edges") or []:
+            ends = _edge_ends(edge)
+            if not ends or any(node_id not in self.paths for node_id in ends):
+                return False
+        return True
+
+
+def plan_layout(elk_graph: dict, min_nodes: int) -> LayoutPlan | None:
+    """
+    The parts ``elk_graph`` can be laid out in, or None when it has fewer than
+    ``min_nodes`` nodes (0 never splits) or doesn't come apart.
+    """
+    nodes = elk_graph.get("children") or []
+    if not min_nodes or _count_nodes(nodes) < min_nodes:
+        return None
+    splitter = _Splitter(elk_graph)
+    if not splitter.is_splittable():
+        return None
+    root = splitter.split(nodes, list(elk_graph.get("edges") or []))
+    if isinstance(root, _Leaf):
+        return None
+    plan = LayoutPlan(elk_graph, root)
+    return plan if len(plan.graphs) > 1 else None
@@ -0,0 +1,107 @@
+"""
+Layout profiles: how much work ELK puts into a graph.
+
+``quality`` runs the full ``elk.layered`` pipeline (network-simplex layering,
+thorough crossing minimization with greedy switching, Brandes-Köpf placement);
+its cost grows much faster than the graph. ``balanced`` sweeps crossings once
+without greedy switching, and ``fast`` also layers by longest path and places
+nodes simply. A profile is chosen by size and nesting depth unless a request
+names one, and a layout that exceeds ``LAYOUT_TIME_BUDGET_SECONDS`` is retried
+with the next cheaper profile.
+"""
+
+from typing import Literal
+
+from app.config.settings import settings
+
+LayoutProfile = Literal["quality", "balanced", "fast"]
+
+# Most expensive first; each profile falls back to the next.
+LAYOUT_PROFILES: tuple[LayoutProfile, ...] = ("quality", "balanced", "fast")
+
+_QUALITY_OPTIONS = {
+    "elk.hierarchyHandling": "INCLUDE_CHILDREN",
+    "elk.algorithm": "elk.layered",
+    "nodePlacement.strategy": "BRANDES_KOEPF",
+    "elk.layered.mergeEdges": False,
+    "spacing.baseValue": 80,
+    "elk.layered.crossingMinimization.forceNodeModelOrder": False,
+    "elk.layered.considerModelOrder.strategy": "NODES_AND_EDGES",
+    "elk.layered.unnecessaryBendpoints": True,
+    "elk.layered.wrapping.multiEdge.improveCuts": True,
+    "elk.layered.wrapping.multiEdge.improveWrappedEdges": True,
+    "elk.layered.edgeRouting.selfLoopDistribution": "EQUALLY",
+    "elk.layered.mergeHierarchyEdges": True,
+}
+
+_BALANCED_OPTIONS = {
+    "elk.hierarchyHandling": "INCLUDE_CHILDREN",
+    "elk.algorithm": "elk.layered",
+    "nodePlacement.strategy": "BRANDES_KOEPF",
+    "elk.layered.mergeEdges": False,
+    "spacing.baseValue": 80,
+    "elk.layered.crossingMinimization.forceNodeModelOrder": False,
+    "elk.layered.considerModelOrder.strategy": "NODES_AND_EDGES",
+    "elk.layered.thoroughness": 1,
+    "elk.layered.crossingMinimization.greedySwitch.type": "OFF",
+    "elk.layered.edgeRouting.selfLoopDistribution": "EQUALLY",
+    "elk.layered.mergeHierarchyEdges": True,
+}
+
+_FAST_OPTIONS = {
+    **_BALANCED_OPTIONS,
+    "elk.layered.layering.strategy": "LONGEST_PATH",
+    "nodePlacement.strategy": "SIMPLE",
+    "elk.layered.mergeEdges": True,
+}
+
+LAYOUT_PROFILE_OPTIONS: dict[str, dict] = {
+    "quality": _QUALITY_OPTIONS,
+    "balanced": _BALANCED_OPTIONS,
+    "fast": _FAST_OPTIONS,
+}
+
+
+def graph_size(elk_graph: dict) -> tuple[int, int, int]:
+    """Nodes, edges and nesting depth of an ELK graph."""
+    nodes = depth = 0
+    edges = len(elk_graph.get("edges") or [])
+    stack = [(child, 1) for child in elk_graph.get("children") or []]
+    while stack:
+        node, level = stack.pop()
+        nodes += 1
+        depth = max(depth, level)
+        edges += len(node.get("edges") or [])
+        stack.extend((child, level + 1) for child in node.get("children") or [])
+    return nodes, edges, depth
+
+
+def choose_layout_profile(elk_graph: dict) -> LayoutProfile:
+    nodes, edges, depth = graph_size(elk_graph)
+    if nodes + edges >= settings.LAYOUT_FAST_PROFILE_MIN_SIZE:
+        index = 2
+    elif nodes + edges >= settings.LAYOUT_BALANCED_PROFILE_MIN_SIZE:
+        index = 1
+    else:
+        index = 0
+    # Hierarchical layout gets costlier with every level of nesting.
+    if depth >= settings.LAYOUT_PROFILE_DEEP_NESTING:
+        index = min(index + 1, len(LAYOUT_PROFILES) - 1)
+    return LAYOUT_PROFILES[index]
+
+
+def cheaper_layout_profile(profile: str | None) -> LayoutProfile | None:
+    if profile not in LAYOUT_PROFILES:
+        return None
+    index = LAYOUT_PROFILES.index(profile) + 1
+    return LAYOUT_PROFILES[index] if index < len(LAYOUT_PROFILES) else None
+
+
+def apply_layout_profile(elk_graph: dict, profile: LayoutProfile, direction: str):
+    """Sets the root layout options of ``profile``; the profile is kept in ``layoutProfile``."""
+    elk_graph["layoutOptions"] = {
+        **LAYOUT_PROFILE_OPTIONS[profile],
+        "elk.direction": direction,
+    }
+    # ELK passes unknown properties through, like the nodes' ``text``.
+    elk_graph["layoutProfile"] = profile
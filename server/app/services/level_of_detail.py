@@ -0,0 +1,213 @@
+"""
+Level of detail for large scenes.
+
+A scene showing every leaf of a large architecture has tens of thousands of
+Excalidraw elements. A graph with more than ``max_elements`` nodes and edges
+has containers nested deeper than ``max_depth`` collapsed into single summary
+nodes, then the largest remaining containers until it fits. Edges within a
+collapsed container are dropped, and edges into one are redirected to it and
+bundled: edges that end up between the same nodes become one edge with their
+count. Collapsed nodes keep their ids, so one can be expanded by laying
+out its ``subtree_elk_graph``.
+"""
+
+
+def _preorder(
+    elk_graph: dict, collapsed: set[str] = frozenset()
+) -> list[tuple[dict, int]]:
+    """Nodes and their depths (1 at the top level), not descending into ``collapsed``."""
+    order = []
+    stack = [(node, 1) for node in reversed(elk_graph.get("children") or [])]
+    while stack:
+        node, depth = stack.pop()
+        order.append((node, depth))
+        if node["id"] not in collapsed:
+            stack.extend(
+                (child, depth + 1) for child in reversed(node.get("children") or [])
+            )
+    return order
+
+
+def _descendant_counts(
+    order: list[tuple[dict, int]], collapsed: set[str] = frozenset()
+) -> dict[str, int]:
+    counts = {}
+    # Children come after their parent in preorder, so they are counted first.
+    for node, _ in reversed(order):
+        counts[node["id"]] = (
+            0
+            if node["id"] in collapsed
+            else sum(1 + counts[child["id"]] for child in node.get("children") or [])
+        )
+    return counts
+
+
+def _containers_below(order: list[tuple[dict, int]], depth: int) -> set[str]:
+    return {
+        node["id"] for node, node_depth in order if node_depth > depth and node.get("children")
+    }
+
+
+def _collapse_largest(
+    elk_graph: dict, collapsed: set[str], depth: int, max_nodes: int
+) -> set[str]:
+    """
+    ``collapsed`` and the largest containers at ``depth``, until at most
+    ``max_nodes`` nodes are left.
+    """
+    order = _preorder(elk_graph, collapsed)
+    counts = _descendant_counts(order, collapsed)
+    collapsed = set(collapsed)
+    visible = len(order)
+    candidates = [
+        node for node, node_depth in order if node_depth == depth and counts[node["id"]]
+    ]
+    for node in sorted(candidates, key=lambda node: -counts[node["id"]]):
+        if visible <= max_nodes:
+            break
+        collapsed.add(node["id"])
+        visible -= counts[node["id"]]
+    return collapsed
+
+
+def _shown_as(elk_graph: dict, collapsed: set[str]) -> dict[str, str]:
+    """The node each node is drawn as: itself or its collapsed ancestor."""
+    shown_as = {}
+    stack = [(node, None) for node in elk_graph.get("children") or []]
+    while stack:
+        node, collapsed_ancestor = stack.pop()
+        if collapsed_ancestor is None and node["id"] in collapsed:
+            collapsed_ancestor = node["id"]
+        shown_as[node["id"]] = collapsed_ancestor or node["id"]
+        stack.extend(
+            (child, collapsed_ancestor) for child in node.get("children") or []
+        )
+    return shown_as
+
+
+def _bundle_edges(
+    edges: list[dict], shown_as: dict[str, str], collapsed: set[str]
+) -> tuple[list[dict], dict[str, int]]:
+    """The edges to draw, and the number of edges each collapsed node hides."""
+
+    def shown(node_ids: list[str] | None) -> list[str]:
+        return list(
+            dict.fromkeys(shown_as.get(node_id, node_id) for node_id in node_ids or [])
+        )
+
+    shown_edges, bundles = [], {}
+    hidden_edges = dict.fromkeys(collapsed, 0)
+    for edge in edges:
+        sources, targets = shown(edge.get("sources")), shown(edge.get("targets"))
+        ends = set(sources) | set(targets)
+        if not ends & collapsed:
+            shown_edges.append(edge)
+            continue
+        if len(ends) == 1:
+            hidden_edges[ends.pop()] += 1
+            continue
+        key = (tuple(sources), tuple(targets))
+        if key in bundles:
+            bundles[key]["bundled"] += 1
+        else:
+            bundles[key] = {
+                "id": edge["id"],
+                "sources": sources,
+                "targets": targets,
+                "bundled": 1,
+            }
+            shown_edges.append(bundles[key])
+    return shown_edges, hidden_edges
+
+
+def _summary_text(text: str | None, hidden_nodes: int) -> str:
+    summary = f"{hidden_nodes} nodes"
+    return f"{text} ({summary})" if text else summary
+
+
+def collapse_elk_graph(elk_graph: dict, max_elements: int, max_depth: int) -> dict:
+    """
+    ``elk_graph`` with containers collapsed until it has at most
+    ``max_elements`` nodes and edges, or ``elk_graph`` itself when it already
+    does (0 never collapses). A collapsed node has no children and a
+    ``collapsed`` property with the number of nodes and edges it hides; a
+    bundled edge has ``bundled`` set to the number of edges it stands for.
+    """
+    all_edges = elk_graph.get("edges") or []
+    order = _preorder(elk_graph)
+    if not max_elements or len(order) + len(all_edges) <= max_elements:
+        return elk_graph
+
+    def collapse(collapsed: set[str]) -> tuple[set[str], list[dict], dict[str, int], int]:
+        shown_as = _shown_as(elk_graph, collapsed)
+        edges, hidden_edges = _bundle_edges(all_edges, shown_as, collapsed)
+        return collapsed, edges, hidden_edges, len(set(shown_as.values())) + len(edges)
+
+    # Levels are collapsed from the deepest up, as long as the graph doesn't fit.
+    tree_depth = max(depth for _, depth in order)
+    depth = min(max_depth, tree_depth) if max_depth else tree_depth
+    result = collapse(_containers_below(order, depth))
+    while result[3] > max_elements and depth > 0:
+        depth -= 1
+        shallower = collapse(_containers_below(order, depth))
+        if shallower[3] > max_elements:
+            result = shallower
+            continue
+        # Collapsing all of the next level is more than needed: its largest
+        # containers are collapsed until the graph fits. How many edges are
+        # left depends on which ones, so the node budget is lowered until the
+        # edges fit as well.
+        max_nodes = len(order)
+        while result[3] > max_elements:
+            max_nodes = min(max_nodes - 1, max_nodes * max_elements // result[3])
+            result = collapse(
+                _collapse_largest(elk_graph, result[0], depth + 1, max_nodes)
+            )
+        break
+    collapsed, edges, hidden_edges, _ = result
+    if not collapsed:
+        return elk_graph
+
+    hidden_nodes = _descendant_counts(_preorder(elk_graph))
+
+    def copy_node(node: dict) -> dict:
+        if node["id"] in collapsed:
+            return {
+                **{key: value for key, value in node.items() if key != "children"},
+                "text": _summary_text(node.get("text"), hidden_nodes[node["id"]]),
+                "children": [],
+                "collapsed": {
+                    "nodes": hidden_nodes[node["id"]],
+                    "edges": hidden_edges[node["id"]],
+                },
+            }
+        return {
+            **node,
+            "children": [copy_node(child) for child in node.get("children") or []],
+        }
+
+    children = [copy_node(node) for node in elk_graph.get("children") or []]
+    return {**elk_graph, "children": children, "edges": edges}
+
+
+def subtree_elk_graph(elk_graph: dict, node_id: str) -> dict | None:
+    """
+    An ELK graph of the node ``node_id`` and everything inside it, with the
+    edges between those nodes, or None when there is no such node.
+    """
+    for node, _ in _preorder(elk_graph):
+        if node["id"] == node_id:
+            break
+    else:
+        return None
+
+    node_ids = {inner["id"] for inner, _ in _preorder({"children": [node]})}
+    edges = [
+        edge
+        for edge in elk_graph.get("edges") or []
+        if all(
+            end in node_ids
+            for end in [*(edge.get("sources") or []), *(edge.get("targets") or [])]
+        )
+    ]
+    return {**elk_graph, "children": [node], "edges": edges}
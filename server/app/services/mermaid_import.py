@@ -0,0 +1,383 @@
+"""
+Deterministic import of Mermaid flowcharts.
+
+A pasted flowchart already describes the graph, so it is parsed here into the
+agent's ``Graph`` shape and laid out directly, without an agent run: no tokens,
+and the layout call is the only thing that takes time.
+
+Supported: ``flowchart``/``graph`` headers with a direction, node shapes
+(classic brackets and ``@{ shape: ..., label: ..., icon: ... }``), chained and
+``&``-grouped links of every stroke, nested subgraphs, and ``;`` or newline
+separated statements. Styling statements (``classDef``, ``style``, ``click``,
+...) and edge labels are ignored. Nodes get the icon given with ``icon:``, or
+else the catalog icon whose service name is the node's label, if any.
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass, field
+
+from fastapi import Depends
+
+from app.services.diagram_service import DiagramService, get_diagram_service
+from app.services.graph_validation import validate_and_repair_graph
+from app.services.icon_registry import IconRegistry
+from app.services.layout_profiles import LayoutProfile
+
+MERMAID_DIRECTIONS = {"TB": "DOWN", "TD": "DOWN", "BT": "UP", "LR": "RIGHT", "RL": "LEFT"}
+
+_HEADER_PATTERN = re.compile(r"^(?:flowchart|graph)(?:\s+(TB|TD|BT|RL|LR))?$", re.IGNORECASE)
+_IGNORED_STATEMENT_PATTERN = re.compile(
+    r"^(?:classDef|class|style|linkStyle|click|direction|accTitle|accDescr|title)\b"
+)
+_SUBGRAPH_PATTERN = re.compile(r"^subgraph\s+(?P<rest>.+)$")
+_SUBGRAPH_ID_AND_TITLE_PATTERN = re.compile(r"^(?P<id>[\w-]+)\s*\[(?P<title>.*)\]$")
+_NODE_ID_PATTERN = re.compile(r"\w+(?:-\w+)*")
+_CLASS_SUFFIX_PATTERN = re.compile(r":::[\w-]+")
+# "-- text -->", "== text ==>", "-. text .->"
+_LABELED_LINK_PATTERN = re.compile(
+    r"[<ox]?(?:--|==|-\.)(?![-=.>])\s*(?P<label>.+?)\s*"
+    r"(?:-{2,}|={2,}|\.-+)(?:[>ox](?=[\s\w]))?"
+)
+# "-->", "---", "-.->", "==>", "~~~", "<-->", "--o", "--x", ...
+_LINK_PATTERN = re.compile(
+    r"[<ox]?(?P<stroke>-{2,}|={2,}|-\.+-|~{3,})(?:>|[ox](?=\s))?"
+)
+_PIPE_LABEL_PATTERN = re.compile(r"\s*\|(?P<label>[^|]*)\|")
+_LINE_BREAK_PATTERN = re.compile(r"<br\s*/?>", re.IGNORECASE)
+
+# Longest openers first, so "((" isn't read as "(".
+_BRACKET_SHAPES = [
+    ("(((", (")))",), "double_circle"),
+    ("((", ("))",), "circle"),
+    ("([", ("])",), "stadium"),
+    ("[[", ("]]",), "subroutine"),
+    ("[(", (")]",), "cylinder"),
+    ("{{", ("}}",), "hexagon"),
+    ("[/", ("/]", "\\]"), "parallelogram"),
+    ("[\\", ("\\]", "/]"), "parallelogram"),
+    ("(", (")",), "rounded_rectangle"),
+    ("[", ("]",), "rectangle"),
+    ("{", ("}",), "diamond"),
+    (">", ("]",), "rectangle"),
+]
+
+# Shape names of the "@{ shape: ... }" syntax, short and long forms.
+_NAMED_SHAPES = {
+    "rect": "rectangle",
+    "rectangle": "rectangle",
+    "rounded": "rounded_rectangle",
+    "stadium": "stadium",
+    "pill": "stadium",
+    "subproc": "subroutine",
+    "subroutine": "subroutine",
+    "cyl": "cylinder",
+    "cylinder": "cylinder",
+    "db": "cylinder",
+    "database": "cylinder",
+    "circle": "circle",
+    "circ": "circle",
+    "sm-circ": "circle",
+    "dbl-circ": "double_circle",
+    "double-circle": "double_circle",
+    "diam": "diamond",
+    "diamond": "diamond",
+    "decision": "diamond",
+    "hex": "hexagon",
+    "hexagon": "hexagon",
+    "lean-r": "parallelogram",
+    "lean-l": "parallelogram",
+    "trap-b": "trapezoid",
+    "trap-t": "trapezoid",
+}
+
+
+class MermaidParseError(ValueError):
+    """Raised when the source is not a flowchart this parser understands."""
+
+    pass
+
+
+@dataclass
+class MermaidFlowchart:
+    graph: dict
+    direction: str = "RIGHT"
+
+
+@dataclass
+class _Node:
+    id: str
+    text: str | None = None
+    shape: str | None = None
+    icon: str | None = None
+    children_ids: list[str] = field(default_factory=list)
+
+
+def _clean_label(label: str) -> str:
+    label = label.strip()
+    if len(label) >= 2 and label[0] == label[-1] and label[0] in "\"'`":
+        label = label[1:-1]
+    label = label.strip("`")
+    return " ".join(_LINE_BREAK_PATTERN.sub(" ", label).split())
+
+
+def _split_statements(source: str) -> list[str]:
+    """Splits on newlines and on ``;`` outside of quotes and brackets."""
+    statements = []
+    for line in source.splitlines():
+        line = line.strip()
+        if not line or line.startswith("%%"):
+            continue
+        current, depth, quote = [], 0, None
+        for char in line:
+            if quote:
+                quote = None if char == quote else quote
+            elif char == '"':
+                quote = char
+            elif char in "([{":
+                depth += 1
+            elif char in ")]}":
+                depth = max(depth - 1, 0)
+            elif char == ";" and depth == 0:
+                statements.append("".join(current).strip())
+                current = []
+                continue
+            current.append(char)
+        statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+class _FlowchartParser:
+    def __init__(self):
+        self.nodes: dict[str, _Node] = {}
+        self.edges: list[dict] = []
+        self.parents: dict[str, str] = {}
+        self.subgraphs: list[str] = []
+
+    def _node(self, node_id: str) -> _Node:
+        node = self.nodes.get(node_id)
+        if node is None:
+            node = self.nodes[node_id] = _Node(id=node_id)
+        # A node belongs to the first subgraph that mentions it.
+        if self.subgraphs and node_id not in self.parents and node_id != self.subgraphs[-1]:
+            self.parents[node_id] = self.subgraphs[-1]
+            self.nodes[self.subgraphs[-1]].children_ids.append(node_id)
+        return node
+
+    def parse(self, source: str) -> MermaidFlowchart:
+        statements = _split_statements(source)
+        if not statements:
+            raise MermaidParseError("The diagram is empty")
+        header = _HEADER_PATTERN.match(statements[0])
+        if header is None:
+            raise MermaidParseError(
+                "Only flowcharts are supported; the diagram must start with "
+                "'flowchart' or 'graph'"
+            )
+        direction = MERMAID_DIRECTIONS[(header.group(1) or "TB").upper()]
+
+        for statement in statements[1:]:
+            self._parse_statement(statement)
+        if self.subgraphs:
+            raise MermaidParseError(f"Subgraph '{self.subgraphs[-1]}' is never closed")
+        if not self.nodes:
+            raise MermaidParseError("The diagram has no nodes")
+
+        graph = {
+            "nodes": [
+                {
+                    "id": node.id,
+                    "text": node.text if node.text is not None else node.id,
+                    "icon_id": node.icon,
+                    "shape": node.shape,
+                    "children_ids": node.children_ids,
+                }
+                for node in self.nodes.values()
+            ],
+            "edges": self.edges,
+        }
+        return MermaidFlowchart(graph=graph, direction=direction)
+
+    def _parse_statement(self, statement: str):
+        if statement == "end":
+            if not self.subgraphs:
+                raise MermaidParseError("'end' without a matching 'subgraph'")
+            self.subgraphs.pop()
+            return
+        if _IGNORED_STATEMENT_PATTERN.match(statement):
+            return
+        subgraph = _SUBGRAPH_PATTERN.match(statement)
+        if subgraph:
+            self._open_subgraph(subgraph.group("rest").strip())
+            return
+        self._parse_chain(statement)
+
+    def _open_subgraph(self, rest: str):
+        match = _SUBGRAPH_ID_AND_TITLE_PATTERN.match(rest)
+        if match:
+            subgraph_id, title = match.group("id"), _clean_label(match.group("title"))
+        else:
+            title = _clean_label(rest)
+            subgraph_id = title if _NODE_ID_PATTERN.fullmatch(title) else title.replace(" ", "_")
+        node = self._node(subgraph_id)
+        node.text = title
+        self.subgraphs.append(subgraph_id)
+
+    def _parse_chain(self, statement: str):
+        position = 0
+        previous_group, link_visible = None, True
+        while True:
+            group, position = self._parse_node_group(statement, position)
+            if previous_group and link_visible:
+                for source in previous_group:
+                    for target in group:
+                        self.edges.append(
+                            {
+                                "id": f"edge-{len(self.edges) + 1}",
+                                "sources": [source],
+                                "targets": [target],
+                            }
+                        )
+            position = self._skip_spaces(statement, position)
+            if position >= len(statement):
+                return
+            link_visible, position = self._parse_link(statement, position)
+            previous_group = group
+
+    @staticmethod
+    def _skip_spaces(statement: str, position: int) -> int:
+        while position < len(statement) and statement[position].isspace():
+            position += 1
+        return position
+
+    def _parse_node_group(self, statement: str, position: int) -> tuple[list[str], int]:
+        group = []
+        while True:
+            node_id, position = self._parse_node(statement, position)
+            group.append(node_id)
+            position = self._skip_spaces(statement, position)
+            if position < len(statement) and statement[position] == "&":
+                position += 1
+                continue
+            return group, position
+
+    def _parse_node(self, statement: str, position: int) -> tuple[str, int]:
+        position = self._skip_spaces(statement, position)
+        match = _NODE_ID_PATTERN.match(statement, position)
+        if match is None:
+            raise MermaidParseError(f"Expected a node id in '{statement}'")
+        node = self._node(match.group(0))
+        position = match.end()
+
+        if statement.startswith("@{", position):
+            end = statement.find("}", position)
+            if end == -1:
+                raise MermaidParseError(f"Unclosed '@{{' in '{statement}'")
+            self._apply_properties(node, statement[position + 2 : end])
+            position = end + 1
+        else:
+            for opener, closers, shape in _BRACKET_SHAPES:
+                if not statement.startswith(opener, position):
+                    continue
+                start = position + len(opener)
+                ends = [
+                    end for end in (self._find_closer(statement, start, c) for c in closers)
+                    if end != -1
+                ]
+                if not ends:
+                    raise MermaidParseError(f"Unclosed '{opener}' in '{statement}'")
+                end = min(ends)
+                closer = next(c for c in closers if statement.startswith(c, end))
+                node.text = _clean_label(statement[start:end])
+                node.shape = shape
+                if opener == "[/" and closer == "\\]" or opener == "[\\" and closer == "/]":
+                    node.shape = "trapezoid"
+                position = end + len(closer)
+                break
+
+        class_suffix = _CLASS_SUFFIX_PATTERN.match(statement, position)
+        if class_suffix:
+            position = class_suffix.end()
+        return node.id, position
+
+    @staticmethod
+    def _find_closer(statement: str, start: int, closer: str) -> int:
+        # Closers inside a quoted label don't count.
+        if statement[start : start + 1] == '"':
+            quote_end = statement.find('"', start + 1)
+            if quote_end != -1:
+                return statement.find(closer, quote_end + 1)
+        return statement.find(closer, start)
+
+    @staticmethod
+    def _apply_properties(node: _Node, properties: str):
+        for part in re.split(r",(?=(?:[^\"]*\"[^\"]*\")*[^\"]*$)", properties):
+            key, separator, value = part.partition(":")
+            if not separator:
+                continue
+            key, value = key.strip(), _clean_label(value)
+            if key == "label":
+                node.text = value
+            elif key == "shape":
+                node.shape = _NAMED_SHAPES.get(value.lower(), "rectangle")
+            elif key == "icon":
+                node.icon = value
+
+    def _parse_link(self, statement: str, position: int) -> tuple[bool, int]:
+        """Consumes a link; returns whether it is drawn (``~~~`` isn't)."""
+        plain = _LINK_PATTERN.match(statement, position)
+        # A bare "--" or "==" opens a link with its label inline: "-- text -->".
+        if plain and plain.group(0) not in ("--", "=="):
+            pipe_label = _PIPE_LABEL_PATTERN.match(statement, plain.end())
+            end = pipe_label.end() if pipe_label else plain.end()
+            return not plain.group("stroke").startswith("~"), end
+        labeled = _LABELED_LINK_PATTERN.match(statement, position)
+        if labeled:
+            return True, labeled.end()
+        raise MermaidParseError(f"Expected a link in '{statement}'")
+
+
+def parse_mermaid_flowchart(source: str) -> MermaidFlowchart:
+    """Parses a Mermaid flowchart into a ``Graph`` dict and a layout direction."""
+    return _FlowchartParser().parse(source)
+
+
+def resolve_node_icons(graph: dict, icon_registry: IconRegistry) -> dict:
+    """Gives icon-less nodes the catalog icon named like their label, if any."""
+    for node in graph["nodes"]:
+        if node["icon_id"] is None and node["text"] and not node["children_ids"]:
+            node["icon_id"] = icon_registry.match_name(node["text"])
+    return graph
+
+
+class MermaidImportService:
+    def __init__(self, diagram_service: DiagramService):
+        self.diagram_service = diagram_service
+
+    async def import_flowchart(
+        self, source: str, layout_profile: LayoutProfile | None = None
+    ) -> dict:
+        """Parses and lays out a flowchart; returns its scene and ``Graph``."""
+        flowchart = parse_mermaid_flowchart(source)
+        graph = resolve_node_icons(flowchart.graph, self.diagram_service.icon_registry)
+        graph, _ = validate_and_repair_graph(graph, self.diagram_service.icon_registry)
+
+        elk_graph = self.diagram_service.collapse_for_display(
+            self.diagram_service.convert_agent_response_to_elk_json(graph)
+        )
+        self.diagram_service.add_layout_options_to_elk_graph(
+            elk_graph, direction=flowchart.direction, profile=layout_profile
+        )
+        elk_output = await asyncio.to_thread(
+            self.diagram_service.generate_elk_output_json, elk_graph
+        )
+        return {
+            "excalidraw": self.diagram_service.convert_elk_json_to_excalidraw(elk_output),
+            "graph": graph,
+        }
+
+
+def get_mermaid_import_service(
+    diagram_service: DiagramService = Depends(get_diagram_service),
+) -> MermaidImportService:
+    return MermaidImportService(diagram_service)
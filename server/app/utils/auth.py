@@ -1,6 +1,5 @@
 from fastapi.security import HTTPBearer
 from fastapi import Depends, HTTPException, status, Request
-from firebase_admin import auth
 from starlette.responses import JSONResponse
 from app.config.settings import settings
 
@@ -38,6 +37,8 @@ async def authentication_middleware(request: Request, call_next):
 
     token = auth_header.split("Bearer ")[1]
 
+    from firebase_admin import auth
+
     try:
         decoded_token = auth.verify_id_token(token)
         request.state.uid = decoded_token["uid"]
@@ -69,6 +70,8 @@ def authenticate_user(request: Request, token=Depends(security)) -> bool:
                 "status": "Unauthorized",
             },
         )
+    from firebase_admin import auth
+
     try:
         decoded_token = auth.verify_id_token(token.credentials)
         request.state.uid = decoded_token["uid"]
@@ -0,0 +1,48 @@
+import logging
+
+import orjson
+
+from app.services.icon_registry import IconRegistry
+
+logger = logging.getLogger(__name__)
+
+ICON_FILE_ID_PREFIX = "icon:"
+
+
+def icon_file_id(icon_id: str) -> str:
+    """The Excalidraw file id of an icon."""
+    return f"{ICON_FILE_ID_PREFIX}{icon_id}"
+
+
+def serialize_scene(scene: dict) -> str:
+    """
+    Serializes an Excalidraw scene for storage. Firestore can't store nested
+    arrays (e.g. arrow points), hence a JSON string, and icon data URLs are
+    dropped since ``deserialize_scene`` restores them from the icon registry.
+    """
+    files = {
+        file_id: (
+            {key: value for key, value in file.items() if key != "dataURL"}
+            if file_id.startswith(ICON_FILE_ID_PREFIX)
+            else file
+        )
+        for file_id, file in scene.get("files", {}).items()
+    }
+    return orjson.dumps({**scene, "files": files}).decode()
+
+
+def deserialize_scene(serialized: str, icon_registry: IconRegistry) -> dict:
+    """Restores a scene stored by ``serialize_scene``, icon data URLs included."""
+    scene = orjson.loads(serialized)
+    files = {}
+    for file_id, file in scene.get("files", {}).items():
+        if file_id.startswith(ICON_FILE_ID_PREFIX) and "dataURL" not in file:
+            icon_id = file_id.removeprefix(ICON_FILE_ID_PREFIX)
+            try:
+                file = {**file, "dataURL": icon_registry.data_url(icon_id)}
+            except KeyError:
+                logger.warning(f"Icon {icon_id} of a stored scene no longer exists")
+                continue
+        files[file_id] = file
+    scene["files"] = files
+    return scene
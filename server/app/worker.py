@@ -0,0 +1,183 @@
+"""
+Worker for asynchronous chat jobs.
+
+Takes jobs queued by ``POST /v1/chat/jobs`` off Redis and runs
+``ChatService.chat`` for them, so generation capacity scales with the number of
+worker processes independently of the API. Run from the ``server`` directory:
+
+    python -m app.worker
+    python -m app.worker --concurrency 8
+
+Jobs stay pending in the queue until their result is stored. A worker that dies
+stops renewing its jobs and they are picked up by another worker after
+``CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS``, up to ``CHAT_JOB_MAX_ATTEMPTS`` times.
+SIGTERM stops taking new jobs and lets running ones finish.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+
+from fastapi import HTTPException
+
+from app.config.settings import settings
+from app.db.repositories.chat_job_repository import (
+    FINISHED_CHAT_JOB_STATUSES,
+    ChatJobRepository,
+)
+from app.services.chat_service import ChatService
+from app.services.diagram_service import DiagramService
+
+logger = logging.getLogger(__name__)
+
+# How long one read of the queue waits for a job.
+CLAIM_BLOCK_MS = 5_000
+
+
+class ChatJobWorker:
+    def __init__(self, chat_service: ChatService, concurrency: int, consumer: str):
+        self.chat_service = chat_service
+        self.chat_job_repository = ChatJobRepository()
+        self.consumer = consumer
+        self._slots = asyncio.Semaphore(concurrency)
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        logger.info("Stopping: no new jobs will be taken")
+        self._stopping.set()
+
+    async def run(self):
+        await self.chat_job_repository.ensure_consumer_group()
+        renewer = asyncio.create_task(self._renew_periodically())
+        try:
+            while not self._stopping.is_set():
+                await self._slots.acquire()
+                # SIGTERM may have come while waiting for a slot.
+                if self._stopping.is_set():
+                    self._slots.release()
+                    break
+                try:
+                    jobs = await self._next_jobs()
+                except Exception:
+                    logger.exception("Reading the job queue failed")
+                    jobs = []
+                    await asyncio.sleep(1)
+                if not jobs:
+                    self._slots.release()
+                    continue
+                for entry_id, job_id in jobs:
+                    task = asyncio.create_task(self._process(entry_id, job_id))
+                    self._in_flight[entry_id] = task
+                    task.add_done_callback(
+                        lambda task, entry_id=entry_id: self._finish(entry_id, task)
+                    )
+        finally:
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+            renewer.cancel()
+
+    def _finish(self, entry_id: str, task: asyncio.Task):
+        self._in_flight.pop(entry_id, None)
+        self._slots.release()
+        if not task.cancelled() and task.exception():
+            # Left unacknowledged, so another worker retries it after the timeout.
+            logger.error(f"Queue entry {entry_id} failed", exc_info=task.exception())
+
+    async def _next_jobs(self) -> list[tuple[str, str]]:
+        if self._stopping.is_set():
+            return []
+        # Jobs abandoned by dead workers go first; they have waited longest.
+        jobs = [
+            (entry_id, job_id)
+            for entry_id, job_id in await self.chat_job_repository.reclaim_stale_jobs(
+                self.consumer, count=1
+            )
+            # A slow renewal can hand this worker one of its own running jobs.
+            if entry_id not in self._in_flight
+        ]
+        if jobs or self._stopping.is_set():
+            return jobs
+        return await self.chat_job_repository.claim_jobs(
+            self.consumer, count=1, block_ms=CLAIM_BLOCK_MS
+        )
+
+    async def _renew_periodically(self):
+        interval = settings.CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.chat_job_repository.renew_jobs(
+                    self.consumer, list(self._in_flight)
+                )
+            except Exception:
+                logger.exception("Renewing running jobs failed")
+
+    async def _process(self, entry_id: str, job_id: str):
+        job = await self.chat_job_repository.get_job_for_worker(job_id)
+        if job is None or job["status"] in FINISHED_CHAT_JOB_STATUSES:
+            # Expired, or finished by a worker that died before acknowledging it.
+            await self.chat_job_repository.acknowledge_job(entry_id)
+            return
+        if job["attempts"] >= settings.CHAT_JOB_MAX_ATTEMPTS:
+            await self.chat_job_repository.mark_failed(
+                job_id,
+                {"status_code": 500, "detail": "Chat job was abandoned too many times"},
+            )
+            await self.chat_job_repository.acknowledge_job(entry_id)
+            return
+
+        await self.chat_job_repository.mark_running(job_id)
+        request = job["request"]
+        try:
+            result = await self.chat_service.chat(
+                user_message=request["user_message"],
+                thread_id=request["thread_id"],
+                user_id=job["user_id"],
+                layout_profile=request.get("layout_profile"),
+            )
+        except HTTPException as e:
+            await self.chat_job_repository.mark_failed(
+                job_id, {"status_code": e.status_code, "detail": e.detail}
+            )
+        except Exception:
+            logger.exception(f"Chat job {job_id} failed")
+            await self.chat_job_repository.mark_failed(
+                job_id, {"status_code": 500, "detail": "Internal server error"}
+            )
+        else:
+            await self.chat_job_repository.mark_succeeded(job_id, result)
+        # Only acknowledged once the outcome is stored; otherwise it is retried.
+        await self.chat_job_repository.acknowledge_job(entry_id)
+
+
+async def run_worker(concurrency: int):
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    worker = ChatJobWorker(ChatService(DiagramService()), concurrency, consumer)
+
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signal_number, worker.stop)
+
+    logger.info(f"Chat job worker {consumer} started with {concurrency} slot(s)")
+    await worker.run()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.CHAT_JOB_WORKER_CONCURRENCY
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if settings.DEBUG else logging.INFO)
+
+    asyncio.run(run_worker(args.concurrency))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
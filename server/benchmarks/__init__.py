@@ -0,0 +1,26 @@
+"""
+Offline benchmarks for the diagram generation pipeline.
+
+Importing this package fills in the settings the server requires with harmless
+defaults so the benchmarks run without Redis, Firestore, an LLM provider or the
+rendering engine. Values already present in the environment are left untouched.
+"""
+
+import os
+
+BENCHMARK_ENVIRONMENT_DEFAULTS = {
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_PASSWORD": "benchmark",
+    "DEFAULT_CHAT_MODEL_NAME": "cerebras:gpt-oss-120b",
+    "CEREBRAS_API_KEY": "benchmark",
+    "CORES_ALLOWED_ORIGINS": "http://localhost",
+    "ELK_SERVICE_ENDPOINT": "http://127.0.0.1:3000/diagrams/render-graph",
+    "RATE_LIMIT_ENABLED": "false",
+    "LANGFUSE_PUBLIC_KEY": "pk-lf-benchmark",
+    "LANGFUSE_SECRET_KEY": "sk-lf-benchmark",
+    "LANGFUSE_TRACING_ENABLED": "false",
+}
+
+for key, value in BENCHMARK_ENVIRONMENT_DEFAULTS.items():
+    os.environ.setdefault(key, value)
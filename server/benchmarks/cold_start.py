@@ -0,0 +1,240 @@
+"""
+Cold start benchmark for the API as deployed on AWS Lambda.
+
+Every run happens in a fresh interpreter, like a new Lambda execution
+environment, and times three phases:
+
+- ``import``: importing ``app.lambda_handler`` (the Lambda init phase),
+- ``first_request``: the first request through the Mangum handler, which also
+  runs the app's startup,
+- ``first_generation``: building the production router (chat models, agents)
+  and generating one diagram, with the LLM replaced by ``ReplayChatModel``. This
+  is where the lazily created clients and the icon catalog are paid for.
+
+It also prints the modules that dominate ``python -X importtime``. Run from the
+``server`` directory:
+
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --runs 10 --top 30 --json cold_start.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixtures", "three_tier_web_app.json"
+)
+PHASES = ["import", "first_request", "first_generation"]
+
+_OPENAPI_EVENT = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": "/main_backend_service/openapi.json",
+    "rawQueryString": "",
+    "headers": {"host": "cold-start.benchmark"},
+    "requestContext": {
+        "http": {
+            "method": "GET",
+            "path": "/main_backend_service/openapi.json",
+            "protocol": "HTTP/1.1",
+            "sourceIp": "127.0.0.1",
+            "userAgent": "cold-start-benchmark",
+        },
+        "routeKey": "$default",
+        "stage": "$default",
+        "accountId": "000000000000",
+        "apiId": "benchmark",
+        "domainName": "cold-start.benchmark",
+        "domainPrefix": "cold-start",
+        "requestId": "cold-start",
+        "time": "01/Jan/2026:00:00:00 +0000",
+        "timeEpoch": 0,
+    },
+    "isBase64Encoded": False,
+}
+
+
+class _LambdaContext:
+    function_name = "cold-start-benchmark"
+    aws_request_id = "cold-start"
+
+
+def measure_cold_start() -> dict:
+    """Runs the three phases in the current (fresh) interpreter."""
+    timings = {}
+
+    start = time.perf_counter()
+    from app.lambda_handler import handler
+
+    timings["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = handler(_OPENAPI_EVENT, _LambdaContext())
+    timings["first_request"] = time.perf_counter() - start
+    if response["statusCode"] != 200:
+        raise RuntimeError(f"First request failed with {response['statusCode']}")
+
+    from app.agents.elk_input_graph_generator_agent.agent import build_agent
+    from app.agents.elk_input_graph_generator_agent.router import (
+        STRONG_ROUTE,
+        ModelRouter,
+        get_model_router,
+    )
+    from app.services.diagram_service import DiagramService
+    from benchmarks.fake_chat_model import ReplayChatModel
+
+    with open(FIXTURE_PATH, "r") as f:
+        graph = json.load(f)
+
+    start = time.perf_counter()
+    get_model_router()
+    service = DiagramService(
+        model_router=ModelRouter(
+            {STRONG_ROUTE: build_agent(ReplayChatModel(graphs=[graph]))}
+        )
+    )
+    asyncio.run(
+        service.generate_elk_json_input_using_agent(
+            {"messages": [{"role": "user", "content": "Draw a three tier web app"}]}
+        )
+    )
+    timings["first_generation"] = time.perf_counter() - start
+
+    return timings
+
+
+def _child_environment() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in [SERVER_DIR, env.get("PYTHONPATH")] if path
+    )
+    env.setdefault("AUTH_DISABLED", "true")
+    return env
+
+
+def run_cold_starts(runs: int) -> list[dict]:
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+            cwd=SERVER_DIR,
+            env=_child_environment(),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def profile_imports(top: int) -> dict:
+    """
+    Returns the slowest modules by cumulative import time, and the self time
+    summed per top-level package, from ``python -X importtime``.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import benchmarks, app.lambda_handler"],
+        cwd=SERVER_DIR,
+        env=_child_environment(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    packages: dict[str, int] = {}
+    for name, self_us, _ in modules:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    slowest = sorted(modules, key=lambda module: module[2], reverse=True)[:top]
+    return {
+        "modules": [
+            {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+            for name, self_us, cumulative_us in slowest
+        ],
+        "packages": [
+            {"package": package, "self_ms": self_us / 1000}
+            for package, self_us in sorted(
+                packages.items(), key=lambda item: item[1], reverse=True
+            )[:top]
+        ],
+    }
+
+
+def _summarize(samples: list[dict]) -> dict:
+    summary = {}
+    for phase in PHASES + ["total"]:
+        values = [
+            sum(sample[p] for p in PHASES) if phase == "total" else sample[phase]
+            for sample in samples
+        ]
+        summary[phase] = {
+            "p50_ms": statistics.median(values) * 1000,
+            "min_ms": min(values) * 1000,
+            "max_ms": max(values) * 1000,
+        }
+    return summary
+
+
+def _print_report(summary: dict, profile: dict, runs: int):
+    print(f"Cold start over {runs} fresh interpreter(s)")
+    print(f"  {'phase':<18} {'p50 ms':>9} {'min ms':>9} {'max ms':>9}")
+    for phase, metrics in summary.items():
+        print(
+            f"  {phase:<18} {metrics['p50_ms']:>9.1f} {metrics['min_ms']:>9.1f} "
+            f"{metrics['max_ms']:>9.1f}"
+        )
+
+    print("\nSlowest imports (cumulative)")
+    for module in profile["modules"]:
+        print(
+            f"  {module['cumulative_ms']:>9.1f} ms  {module['module']}"
+            f"  (self {module['self_ms']:.1f} ms)"
+        )
+
+    print("\nImport self time by package")
+    for package in profile["packages"]:
+        print(f"  {package['self_ms']:>9.1f} ms  {package['package']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--top", type=int, default=20, help="How many modules and packages to list"
+    )
+    parser.add_argument("--json", default=None, help="Also write the results here")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_cold_start()))
+        return 0
+
+    summary = _summarize(run_cold_starts(args.runs))
+    profile = profile_imports(args.top)
+    _print_report(summary, profile, args.runs)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cold_start": summary, "imports": profile}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
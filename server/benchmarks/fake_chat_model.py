@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+from uuid import uuid4
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Chat model that replays recorded ``Graph`` outputs.
+
+    Each call answers with a tool call to the ``Graph`` structured-output tool, the
+    same shape a real provider produces under ``ToolStrategy(Graph)``, so the agent
+    graph, structured-output parsing and everything downstream run unchanged.
+    Recorded graphs are replayed round-robin. When the agent is streamed, the
+    tool call arguments arrive in chunks of ``stream_chunk_characters``, the way
+    providers stream them. LangChain parses the arguments of every chunk as it
+    is created, which costs about as much per character as the rest of the
+    streamed run; a provider pays it at the pace tokens arrive, a replay all at
+    once.
+    """
+
+    graphs: list[dict]
+    latency_seconds: float = 0.0
+    stream_chunk_characters: int = 256
+    _cursor: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next_message(self) -> AIMessage:
+        graph = self.graphs[self._cursor % len(self.graphs)]
+        self._cursor += 1
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "Graph",
+                    "args": graph,
+                    "id": f"call_{uuid4().hex}",
+                    "type": "tool_call",
+                }
+            ],
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message())])
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message())])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        tool_call = self._next_message().tool_calls[0]
+        arguments = json.dumps(tool_call["args"])
+        for start in range(0, len(arguments), self.stream_chunk_characters):
+            first = start == 0
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": tool_call["name"] if first else None,
+                            "args": arguments[start : start + self.stream_chunk_characters],
+                            "id": tool_call["id"] if first else None,
+                            "index": 0,
+                            "type": "tool_call_chunk",
+                        }
+                    ],
+                )
+            )
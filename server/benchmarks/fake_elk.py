@@ -0,0 +1,166 @@
+"""
+Local stand-in for the rendering engine's ``/diagrams/render-graph`` and
+``/diagrams/render-graphs`` endpoints.
+
+It accepts the same ``{"jsonGraph": ...}`` and ``{"jsonGraphs": [...]}`` payloads
+and answers with an ELK-shaped
+result (relative ``x``/``y`` on nodes, ``sections`` on edges) computed with a cheap
+grid layout. The numbers are not meant to look good, only to exercise the HTTP
+round trip and the Excalidraw conversion with realistic output shapes.
+"""
+
+import json
+import math
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PADDING_PATTERN = re.compile(r"(top|left|bottom|right)=(\d+(?:\.\d+)?)")
+
+
+def _padding(node: dict) -> dict:
+    padding = {"top": 0.0, "left": 0.0, "bottom": 0.0, "right": 0.0}
+    raw = node.get("layoutOptions", {}).get("elk.padding", "")
+    for side, value in _PADDING_PATTERN.findall(raw):
+        padding[side] = float(value)
+    return padding
+
+
+def _layout_node(node: dict):
+    children = node.get("children") or []
+    if children:
+        padding = _padding(node)
+        spacing = float(node.get("layoutOptions", {}).get("elk.spacing.nodeNode", 50))
+        columns = max(1, math.ceil(math.sqrt(len(children))))
+
+        # Lay out children first so their sizes are known.
+        for child in children:
+            _layout_node(child)
+
+        column_widths = [0.0] * columns
+        row_heights = [0.0] * math.ceil(len(children) / columns)
+        for index, child in enumerate(children):
+            row, column = divmod(index, columns)
+            column_widths[column] = max(column_widths[column], child["width"])
+            row_heights[row] = max(row_heights[row], child["height"])
+
+        for index, child in enumerate(children):
+            row, column = divmod(index, columns)
+            child["x"] = padding["left"] + sum(column_widths[:column]) + spacing * column
+            child["y"] = padding["top"] + sum(row_heights[:row]) + spacing * row
+
+        node["width"] = (
+            padding["left"]
+            + sum(column_widths)
+            + spacing * (columns - 1)
+            + padding["right"]
+        )
+        node["height"] = (
+            padding["top"]
+            + sum(row_heights)
+            + spacing * (len(row_heights) - 1)
+            + padding["bottom"]
+        )
+    else:
+        node.setdefault("width", 128)
+        node.setdefault("height", 128)
+
+
+def _record_absolute_positions(node: dict, positions: dict, parent_x: float, parent_y: float):
+    for child in node.get("children") or []:
+        x = parent_x + child.get("x", 0)
+        y = parent_y + child.get("y", 0)
+        positions[child["id"]] = (x, y, child["width"], child["height"])
+        _record_absolute_positions(child, positions, x, y)
+
+
+def layout_graph(graph: dict) -> dict:
+    """Lays out ``graph`` in place and returns it."""
+    positions = {}
+    _layout_node(graph)
+    graph.setdefault("x", 0)
+    graph.setdefault("y", 0)
+    _record_absolute_positions(graph, positions, 0, 0)
+
+    for edge in graph.get("edges", []):
+        sources = edge.get("sources") or []
+        targets = edge.get("targets") or []
+        if not sources or not targets:
+            continue
+        if sources[0] not in positions or targets[0] not in positions:
+            continue
+        sx, sy, sw, sh = positions[sources[0]]
+        tx, ty, tw, th = positions[targets[0]]
+        start = {"x": sx + sw, "y": sy + sh / 2}
+        end = {"x": tx, "y": ty + th / 2}
+        middle_x = (start["x"] + end["x"]) / 2
+        edge["container"] = "root"
+        edge["sections"] = [
+            {
+                "id": f"{edge.get('id')}_s0",
+                "startPoint": start,
+                "endPoint": end,
+                "bendPoints": [
+                    {"x": middle_x, "y": start["y"]},
+                    {"x": middle_x, "y": end["y"]},
+                ],
+                "incomingShape": sources[0],
+                "outgoingShape": targets[0],
+            }
+        ]
+    return graph
+
+
+class _ElkRequestHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/render-graphs"):
+            if not isinstance(payload.get("jsonGraphs"), list):
+                self._send(400, {"error": "jsonGraphs array is required"})
+                return
+            self._send(
+                200,
+                {"results": [{"graph": layout_graph(g)} for g in payload["jsonGraphs"]]},
+            )
+            return
+        if "jsonGraph" not in payload:
+            self._send(400, {"error": "jsonGraph field is required"})
+            return
+        self._send(200, layout_graph(payload["jsonGraph"]))
+
+    def _send(self, status: int, body: dict):
+        encoded = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeElkServer:
+    """Serves ``layout_graph`` over HTTP on a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), _ElkRequestHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/diagrams/render-graph"
+
+    @property
+    def batch_endpoint(self) -> str:
+        return f"{self.endpoint}s"
+
+    def __enter__(self) -> "FakeElkServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,200 @@
+"""
+Synthetic ``Graph`` generators.
+
+Every generator returns a dict shaped like ``Graph.model_dump(mode="json")`` so the
+output can be replayed by the fake chat model or fed straight into
+``DiagramService.convert_agent_response_to_elk_json``.
+"""
+
+import random
+
+SERVICE_ICON_IDS = [
+    "Arch_Amazon-EC2_64",
+    "Arch_AWS-Lambda_64",
+    "Arch_Amazon-DynamoDB_64",
+    "Arch_Amazon-Simple-Storage-Service_64",
+    "Arch_Amazon-RDS_64",
+    "Arch_Elastic-Load-Balancing_64",
+    "Arch_Amazon-API-Gateway_64",
+    "Arch_Amazon-CloudFront_64",
+    "Arch_Amazon-Simple-Queue-Service_64",
+    "Arch_Amazon-ElastiCache_64",
+]
+
+CONTAINER_ICON_IDS = [
+    "AWS-Account_32",
+    "Region_32",
+    "Virtual-private-cloud-VPC_32",
+    "Private-subnet_32",
+    "Public-subnet_32",
+]
+
+
+def _node(node_id: str, text: str, icon_id: str | None, children_ids=None) -> dict:
+    return {
+        "id": node_id,
+        "text": text,
+        "icon_id": icon_id,
+        "children_ids": list(children_ids or []),
+    }
+
+
+def _edge(edge_id: str, source: str, target: str) -> dict:
+    return {"id": edge_id, "sources": [source], "targets": [target]}
+
+
+def deep_nesting(depth: int = 12, leaves_per_level: int = 2) -> dict:
+    """A chain of containers nested ``depth`` levels deep, with a few services per level."""
+    nodes = []
+    edges = []
+    previous_leaf = None
+
+    for level in range(depth):
+        container_id = f"container_{level}"
+        leaf_ids = [f"service_{level}_{i}" for i in range(leaves_per_level)]
+        children_ids = list(leaf_ids)
+        if level + 1 < depth:
+            children_ids.append(f"container_{level + 1}")
+
+        nodes.append(
+            _node(
+                container_id,
+                f"Container level {level}",
+                CONTAINER_ICON_IDS[level % len(CONTAINER_ICON_IDS)],
+                children_ids,
+            )
+        )
+        for i, leaf_id in enumerate(leaf_ids):
+            nodes.append(
+                _node(
+                    leaf_id,
+                    f"Service {level}.{i}",
+                    SERVICE_ICON_IDS[(level + i) % len(SERVICE_ICON_IDS)],
+                )
+            )
+            if previous_leaf:
+                edges.append(_edge(f"edge_{len(edges)}", previous_leaf, leaf_id))
+        previous_leaf = leaf_ids[-1] if leaf_ids else previous_leaf
+
+    return {"nodes": nodes, "edges": edges}
+
+
+def wide_fanout(width: int = 500) -> dict:
+    """One load balancer connected to ``width`` sibling services."""
+    nodes = [_node("load_balancer", "Load Balancer", "Arch_Elastic-Load-Balancing_64")]
+    edges = []
+    for i in range(width):
+        node_id = f"worker_{i}"
+        nodes.append(
+            _node(node_id, f"Worker {i}", SERVICE_ICON_IDS[i % len(SERVICE_ICON_IDS)])
+        )
+        edges.append(_edge(f"edge_{i}", "load_balancer", node_id))
+    return {"nodes": nodes, "edges": edges}
+
+
+def large_architecture(
+    node_count: int = 1000,
+    edges_per_service: float = 1.5,
+    seed: int = 42,
+) -> dict:
+    """
+    A multi-region architecture with roughly ``node_count`` nodes.
+
+    Regions contain VPCs, VPCs contain subnets and subnets contain services.
+    Edges connect random services, mostly within the same region.
+    """
+    rng = random.Random(seed)
+    nodes = []
+    edges = []
+
+    subnet_count = max(1, node_count // 12)
+    vpcs_per_region = 3
+    subnets_per_vpc = 4
+    vpc_count = max(1, subnet_count // subnets_per_vpc)
+    region_count = max(1, vpc_count // vpcs_per_region)
+    service_count = max(1, node_count - subnet_count - vpc_count - region_count)
+
+    region_ids = [f"region_{r}" for r in range(region_count)]
+    vpc_ids = [f"vpc_{v}" for v in range(vpc_count)]
+    subnet_ids = [f"subnet_{s}" for s in range(subnet_count)]
+
+    region_children = {region_id: [] for region_id in region_ids}
+    for v, vpc_id in enumerate(vpc_ids):
+        region_children[region_ids[v % region_count]].append(vpc_id)
+
+    vpc_children = {vpc_id: [] for vpc_id in vpc_ids}
+    for s, subnet_id in enumerate(subnet_ids):
+        vpc_children[vpc_ids[s % vpc_count]].append(subnet_id)
+
+    subnet_children = {subnet_id: [] for subnet_id in subnet_ids}
+    service_ids = []
+    for i in range(service_count):
+        service_id = f"service_{i}"
+        service_ids.append(service_id)
+        subnet_children[subnet_ids[i % subnet_count]].append(service_id)
+
+    for region_id in region_ids:
+        nodes.append(
+            _node(region_id, region_id.replace("_", " "), "Region_32", region_children[region_id])
+        )
+    for vpc_id in vpc_ids:
+        nodes.append(
+            _node(vpc_id, vpc_id.replace("_", " "), "Virtual-private-cloud-VPC_32", vpc_children[vpc_id])
+        )
+    for s, subnet_id in enumerate(subnet_ids):
+        icon_id = "Private-subnet_32" if s % 2 else "Public-subnet_32"
+        nodes.append(
+            _node(subnet_id, subnet_id.replace("_", " "), icon_id, subnet_children[subnet_id])
+        )
+    for i, service_id in enumerate(service_ids):
+        nodes.append(
+            _node(
+                service_id,
+                f"Service {i}",
+                SERVICE_ICON_IDS[rng.randrange(len(SERVICE_ICON_IDS))],
+            )
+        )
+
+    edge_count = int(service_count * edges_per_service)
+    for i in range(edge_count):
+        source = rng.choice(service_ids)
+        target = rng.choice(service_ids)
+        if source != target:
+            edges.append(_edge(f"edge_{i}", source, target))
+
+    return {"nodes": nodes, "edges": edges}
+
+
+def multi_region(region_count: int = 8, nodes_per_region: int = 250, seed: int = 42) -> dict:
+    """
+    An account holding ``region_count`` regions with no edges between them, each
+    shaped like ``large_architecture(nodes_per_region)``.
+    """
+    nodes = [_node("account", "Account", "AWS-Account_32")]
+    edges = []
+    for r in range(region_count):
+        region = large_architecture(nodes_per_region, seed=seed + r)
+        prefix = f"r{r}_"
+        child_ids = {
+            child_id for node in region["nodes"] for child_id in node["children_ids"]
+        }
+        nodes[0]["children_ids"].extend(
+            prefix + node["id"] for node in region["nodes"] if node["id"] not in child_ids
+        )
+        for node in region["nodes"]:
+            nodes.append(
+                {
+                    **node,
+                    "id": prefix + node["id"],
+                    "children_ids": [prefix + child_id for child_id in node["children_ids"]],
+                }
+            )
+        for edge in region["edges"]:
+            edges.append(
+                _edge(
+                    prefix + edge["id"],
+                    prefix + edge["sources"][0],
+                    prefix + edge["targets"][0],
+                )
+            )
+    return {"nodes": nodes, "edges": edges}
@@ -0,0 +1,370 @@
+"""
+Benchmark for the generation-to-scene pipeline of ``DiagramService``.
+
+The LLM is replaced by ``ReplayChatModel`` and the rendering engine by
+``FakeElkServer``, so the numbers only cover our own code plus one local HTTP round
+trip for layout. Run from the ``server`` directory:
+
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --scenarios recorded,large_1k --iterations 20
+    python -m benchmarks.pipeline --save-baseline benchmarks/baseline.json
+    python -m benchmarks.pipeline --baseline benchmarks/baseline.json --max-regression 0.2
+
+With ``--baseline`` the process exits with status 1 when any stage's p50 latency or
+peak memory regressed by more than ``--max-regression`` (a fraction).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable
+
+from benchmarks.fake_chat_model import ReplayChatModel
+from benchmarks.fake_elk import FakeElkServer
+from benchmarks.graph_generators import (
+    deep_nesting,
+    large_architecture,
+    multi_region,
+    wide_fanout,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+ICON_SEARCH_QUERIES = [
+    "ec2",
+    "lambda",
+    "dynamodb",
+    "s3",
+    "simple storage",
+    "rds",
+    "load balancing",
+    "api gateway",
+    "vpc",
+    "subnet",
+    "cloudfront",
+    "queue",
+    "elasticache",
+    "route 53",
+    "cognito",
+    "kinesis",
+    "sagemaker",
+    "step functions",
+    "eventbridge",
+    "cloudwatch",
+]
+
+
+def _load_recorded_graphs() -> list[dict]:
+    graphs = []
+    for file_name in sorted(os.listdir(FIXTURES_DIR)):
+        if file_name.endswith(".json"):
+            with open(os.path.join(FIXTURES_DIR, file_name), "r") as f:
+                graphs.append(json.load(f))
+    return graphs
+
+
+SCENARIOS: dict[str, Callable[[], list[dict]]] = {
+    "recorded": _load_recorded_graphs,
+    "deep_nesting": lambda: [deep_nesting(depth=16, leaves_per_level=3)],
+    "wide_fanout": lambda: [wide_fanout(width=1000)],
+    "large_1k": lambda: [large_architecture(node_count=1_000)],
+    "large_5k": lambda: [large_architecture(node_count=5_000)],
+    "large_10k": lambda: [large_architecture(node_count=10_000)],
+    "multi_region": lambda: [multi_region(region_count=8, nodes_per_region=250)],
+}
+
+
+def _percentile(sorted_samples: list[float], fraction: float) -> float:
+    index = max(0, math.ceil(fraction * len(sorted_samples)) - 1)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+
+async def _measure(
+    run: Callable[[], Awaitable[None]], iterations: int, units: int
+) -> dict:
+    """
+    Times ``run``. ``units`` is how much work one run does (nodes, or queries for
+    the icon search) and is used for the per-unit throughput.
+    """
+    # Warm-up run so lazy imports and connection setup are not counted.
+    await run()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await run()
+        samples.append(time.perf_counter() - start)
+
+    # Peak memory is measured on a separate run because tracemalloc slows
+    # allocation-heavy code down considerably.
+    tracemalloc.start()
+    try:
+        await run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    total = sum(samples)
+    return {
+        "iterations": iterations,
+        "p50_ms": _percentile(samples, 0.50) * 1000,
+        "p99_ms": _percentile(samples, 0.99) * 1000,
+        "mean_ms": total / len(samples) * 1000,
+        "throughput_per_s": len(samples) / total if total else float("inf"),
+        "units": units,
+        "units_per_s": units * len(samples) / total if total else float("inf"),
+        "peak_memory_mb": peak / (1024 * 1024),
+    }
+
+
+async def run_scenario(name: str, graphs: list[dict], iterations: int) -> dict:
+    from langchain.agents import create_agent
+    from langchain.agents.structured_output import ToolStrategy
+
+    import app.services.diagram_service as diagram_service_module
+    from app.agents.elk_input_graph_generator_agent.graph_dsl import (
+        format_graph_dsl,
+        parse_graph_dsl,
+    )
+    from app.agents.elk_input_graph_generator_agent.prompt_cache import (
+        PromptCacheMiddleware,
+    )
+    from app.agents.elk_input_graph_generator_agent.prompts import SYSTEM_PROMPT
+    from app.agents.elk_input_graph_generator_agent.router import (
+        STRONG_ROUTE,
+        ModelRouter,
+    )
+    from app.agents.elk_input_graph_generator_agent.schemas import Graph
+    from app.agents.elk_input_graph_generator_agent.tools import search_icons
+    from app.services.batch_service import BatchService
+    from app.services.graph_validation import validate_and_repair_graph
+
+    replay_agent = create_agent(
+        model=ReplayChatModel(graphs=graphs),
+        tools=[search_icons],
+        response_format=ToolStrategy(Graph),
+        system_prompt=SYSTEM_PROMPT,
+        middleware=[PromptCacheMiddleware()],
+    )
+    service = diagram_service_module.DiagramService(
+        model_router=ModelRouter({STRONG_ROUTE: replay_agent})
+    )
+
+    node_count = sum(len(graph["nodes"]) for graph in graphs)
+    graph_state = {"messages": [{"role": "user", "content": f"Draw {name}"}]}
+
+    # Precomputed inputs so every stage is timed in isolation.
+    elk_inputs = [
+        service.add_layout_options_to_elk_graph(
+            service.convert_agent_response_to_elk_json(graph)
+        )
+        for graph in graphs
+    ]
+    elk_outputs = [service.generate_elk_output_json(elk_input) for elk_input in elk_inputs]
+
+    async def agent_stage():
+        for _ in graphs:
+            await replay_agent.ainvoke(graph_state)
+
+    async def validation_stage():
+        for graph in graphs:
+            validate_and_repair_graph(graph, service.icon_registry)
+
+    async def elk_input_stage():
+        for graph in graphs:
+            service.add_layout_options_to_elk_graph(
+                service.convert_agent_response_to_elk_json(graph)
+            )
+
+    async def layout_stage():
+        for elk_input in elk_inputs:
+            service.generate_elk_output_json(elk_input)
+
+    async def excalidraw_stage():
+        for elk_output in elk_outputs:
+            service.convert_elk_json_to_excalidraw(elk_output)
+
+    # The recorded graphs as the agent writes them with AGENT_RESPONSE_FORMAT=dsl.
+    dsl_texts = [format_graph_dsl(graph) for graph in graphs]
+
+    async def dsl_parse_stage():
+        for dsl_text in dsl_texts:
+            parse_graph_dsl(dsl_text)
+
+    async def icon_search_stage():
+        for query in ICON_SEARCH_QUERIES:
+            search_icons.invoke({"search_string": query})
+
+    # One prompt naming every service the icon search stage looks up.
+    candidates_state = {
+        "messages": [
+            {"role": "user", "content": "Draw " + ", ".join(ICON_SEARCH_QUERIES)}
+        ]
+    }
+
+    async def icon_candidates_stage():
+        service.add_icon_candidates(candidates_state)
+
+    edit_states = [
+        {
+            "messages": [
+                *graph_state["messages"],
+                {"role": "user", "content": f"rename {graph['nodes'][-1]['id']} to Renamed"},
+            ],
+            "structured_response": graph,
+        }
+        for graph in graphs
+    ]
+
+    async def edit_fast_path_stage():
+        for edit_state in edit_states:
+            await service.generate_elk_json_input_using_agent(edit_state)
+
+    async def end_to_end_stage():
+        for _ in graphs:
+            await service.generate_excalidraw_from_description(graph_state)
+
+    async def progressive_stage():
+        for _ in graphs:
+            async for _ in service.generate_excalidraw_progressively(graph_state):
+                pass
+
+    batch_service = BatchService(service)
+    batch_descriptions = [f"Draw {name}"] * len(graphs)
+
+    async def batch_stage():
+        async for _ in batch_service.generate_batch(batch_descriptions):
+            pass
+
+    stages = {
+        "agent": (agent_stage, node_count),
+        "validation": (validation_stage, node_count),
+        "dsl_parse": (dsl_parse_stage, node_count),
+        "elk_input": (elk_input_stage, node_count),
+        "layout": (layout_stage, node_count),
+        "excalidraw": (excalidraw_stage, node_count),
+        "icon_search": (icon_search_stage, len(ICON_SEARCH_QUERIES)),
+        "icon_retrieval": (icon_candidates_stage, len(ICON_SEARCH_QUERIES)),
+        "edit_fast_path": (edit_fast_path_stage, node_count),
+        "end_to_end": (end_to_end_stage, node_count),
+        "progressive": (progressive_stage, node_count),
+        "batch": (batch_stage, node_count),
+    }
+
+    results = {}
+    for stage_name, (run, units) in stages.items():
+        results[stage_name] = await _measure(run, iterations, units)
+    return results
+
+
+def _print_results(results: dict):
+    header = (
+        f"{'scenario':<14} {'stage':<14} {'units':>7} {'p50 ms':>10} {'p99 ms':>10} "
+        f"{'runs/s':>9} {'units/s':>11} {'peak MB':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for scenario, stages in results.items():
+        for stage, metrics in stages.items():
+            print(
+                f"{scenario:<14} {stage:<14} {metrics['units']:>7} "
+                f"{metrics['p50_ms']:>10.2f} {metrics['p99_ms']:>10.2f} "
+                f"{metrics['throughput_per_s']:>9.1f} {metrics['units_per_s']:>11.0f} "
+                f"{metrics['peak_memory_mb']:>9.2f}"
+            )
+
+
+# Absolute slack added on top of the relative threshold, so sub-millisecond
+# stages and tiny allocations don't flag noise as regressions.
+REGRESSION_ABSOLUTE_SLACK = {"p50_ms": 0.5, "peak_memory_mb": 0.25}
+
+
+def find_regressions(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Returns a description of every metric that got worse than the baseline allows."""
+    regressions = []
+    for scenario, stages in results.items():
+        for stage, metrics in stages.items():
+            base = baseline.get(scenario, {}).get(stage)
+            if not base:
+                continue
+            for metric, slack in REGRESSION_ABSOLUTE_SLACK.items():
+                allowed = base[metric] * (1 + max_regression) + slack
+                if metrics[metric] > allowed:
+                    regressions.append(
+                        f"{scenario}/{stage} {metric}: {metrics[metric]:.2f} "
+                        f"> {allowed:.2f} (baseline {base[metric]:.2f})"
+                    )
+    return regressions
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    from app.config.settings import settings
+
+    scenario_names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    results = {}
+    with FakeElkServer() as elk_server:
+        settings.ELK_SERVICE_ENDPOINT = args.elk_endpoint or elk_server.endpoint
+        settings.ELK_BATCH_SERVICE_ENDPOINT = args.elk_batch_endpoint or (
+            None if args.elk_endpoint else elk_server.batch_endpoint
+        )
+        for name in scenario_names:
+            results[name] = await run_scenario(name, SCENARIOS[name](), args.iterations)
+
+    _print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions found:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions above {args.max_regression:.0%} against {args.baseline}")
+
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"Comma separated scenarios to run (default: all of {', '.join(SCENARIOS)})",
+    )
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument(
+        "--elk-endpoint",
+        default=None,
+        help="Use a running rendering engine instead of the local stand-in",
+    )
+    parser.add_argument(
+        "--elk-batch-endpoint",
+        default=None,
+        help="Batch route of that rendering engine (graphs are laid out one by one without it)",
+    )
+    parser.add_argument("--save-baseline", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Throughput benchmark for the chat storage backends.
+
+Runs the store operations of a chat turn (create the session, add the user
+message, read the session, store the turn, reopen the scene, list the user's
+chats, page the messages) against each backend, one operation at a time for
+latency and from several threads for throughput. Checkpoints and scenes are
+built from the recorded fixtures. Run from the ``server`` directory:
+
+    python -m benchmarks.storage
+    python -m benchmarks.storage --backends sqlite,firestore --sessions 500 --threads 8
+
+SQLite uses a database in a temporary directory. Firestore needs credentials
+or the emulator (``FIRESTORE_EMULATOR_HOST``) and writes real documents, under
+a throwaway user id.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Callable
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BACKENDS = ["sqlite", "firestore"]
+OPERATIONS = [
+    "create_session",
+    "add_message",
+    "get_session",
+    "store_turn",
+    "get_fields",
+    "get_scene",
+    "list_chats",
+    "get_messages",
+]
+
+
+def _percentile(sorted_samples: list[float], fraction: float) -> float:
+    index = max(0, math.ceil(fraction * len(sorted_samples)) - 1)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+
+def _turn_payload() -> tuple[dict, str]:
+    """A checkpoint and scene of realistic size, from the first recorded graph."""
+    file_name = sorted(name for name in os.listdir(FIXTURES_DIR) if name.endswith(".json"))[0]
+    with open(os.path.join(FIXTURES_DIR, file_name), "r") as f:
+        graph = json.load(f)
+    checkpoint = {
+        "messages": [
+            {"role": "user", "content": "Draw a three tier web app on AWS"},
+            {"role": "ai", "content": json.dumps(graph)},
+        ],
+        "structured_response": graph,
+    }
+    # Scenes are stored as JSON strings, several times the size of the graph.
+    scene = json.dumps({"type": "excalidraw", "elements": [graph] * 8})
+    return checkpoint, scene
+
+
+def _create_store(backend: str, directory: str):
+    if backend == "sqlite":
+        from app.db.storage.sqlite_chat_store import SqliteChatStore
+
+        return SqliteChatStore(os.path.join(directory, "chats.db"))
+    from app.db.storage.firestore_chat_store import FirestoreChatStore
+
+    return FirestoreChatStore()
+
+
+def _operations(store, checkpoint: dict, scene: str, user_id: str) -> dict[str, Callable]:
+    def store_turn(session_id: str):
+        store.store_turn(session_id, user_id, checkpoint, scene, 0)
+
+    return {
+        "create_session": lambda session_id: store.create_session(session_id, user_id),
+        "add_message": lambda session_id: store.add_message(
+            session_id, {"role": "user", "content": "Draw a three tier web app on AWS"}
+        ),
+        "get_session": store.get_session,
+        "store_turn": store_turn,
+        "get_fields": lambda session_id: store.get_session_fields(
+            session_id, ["user_id", "checkpoint.structured_response"]
+        ),
+        "get_scene": store.get_scene,
+        "list_chats": lambda session_id: store.list_user_sessions(user_id, 20, 0),
+        "get_messages": lambda session_id: store.get_messages(session_id, None, 50),
+    }
+
+
+def run_backend(backend: str, sessions: int, threads: int, directory: str) -> dict:
+    store = _create_store(backend, directory)
+    checkpoint, scene = _turn_payload()
+    user_id = f"benchmark-{uuid.uuid4()}"
+    operations = _operations(store, checkpoint, scene, user_id)
+
+    # Sequential: every operation on every session, in turn order.
+    session_ids = [str(uuid.uuid4()) for _ in range(sessions)]
+    samples = {name: [] for name in OPERATIONS}
+    for session_id in session_ids:
+        for name in OPERATIONS:
+            start = time.perf_counter()
+            operations[name](session_id)
+            samples[name].append(time.perf_counter() - start)
+
+    results = {}
+    for name in OPERATIONS:
+        operation_samples = sorted(samples[name])
+        results[name] = {
+            "p50_ms": _percentile(operation_samples, 0.50) * 1000,
+            "p99_ms": _percentile(operation_samples, 0.99) * 1000,
+            "ops_per_s": len(operation_samples) / sum(operation_samples),
+        }
+
+    # Concurrent: whole turns on fresh sessions from ``threads`` threads.
+    def run_turns(thread_session_ids: list[str]):
+        for session_id in thread_session_ids:
+            for name in OPERATIONS:
+                operations[name](session_id)
+
+    concurrent_ids = [str(uuid.uuid4()) for _ in range(sessions)]
+    workers = [
+        threading.Thread(target=run_turns, args=(concurrent_ids[index::threads],))
+        for index in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    results["turns"] = {
+        "threads": threads,
+        "turns_per_s": sessions / elapsed,
+        "ops_per_s": sessions * len(OPERATIONS) / elapsed,
+    }
+    return results
+
+
+def _print_results(results: dict):
+    header = f"{'backend':<10} {'operation':<15} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for backend, operations in results.items():
+        for name in OPERATIONS:
+            metrics = operations[name]
+            print(
+                f"{backend:<10} {name:<15} {metrics['p50_ms']:>10.3f} "
+                f"{metrics['p99_ms']:>10.3f} {metrics['ops_per_s']:>10.0f}"
+            )
+    print()
+    for backend, operations in results.items():
+        turns = operations["turns"]
+        print(
+            f"{backend:<10} {turns['threads']} threads: {turns['turns_per_s']:.0f} turns/s, "
+            f"{turns['ops_per_s']:.0f} ops/s"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backends",
+        default="sqlite",
+        help=f"Comma separated backends to run (default: sqlite; any of {', '.join(BACKENDS)})",
+    )
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--json", default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown:
+        print(f"Unknown backends: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in backends:
+            results[backend] = run_backend(backend, args.sessions, args.threads, directory)
+
+    _print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())